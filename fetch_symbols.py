@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Download the NASDAQ Trader symbol directories into TICKER_UNIVERSE_PATH.
+
+The ticker parser uses this file to validate symbols and to resolve company
+names ("tesla memes?" -> TSLA). Re-run it now and then to pick up listings.
+
+    python fetch_symbols.py [output_path]
+"""
+import csv
+import os
+import sys
+import requests
+from src.ai_meme_stock_predictor.data_sources.ticker_universe import NASDAQ_TRADER_URLS, parse_symbol_table
+from src.ai_meme_stock_predictor.utils.config import get_settings
+
+
+def fetch_symbols() -> dict:
+    symbols = {}
+    for url in NASDAQ_TRADER_URLS:
+        r = requests.get(url, timeout=30)
+        r.raise_for_status()
+        listing = parse_symbol_table(r.text.splitlines())
+        print(f"📥 {len(listing)} symbols from {url}")
+        for symbol, name in listing.items():
+            symbols.setdefault(symbol, name)
+    return symbols
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else get_settings().ticker_universe_path
+    if not path:
+        print("❌ TICKER_UNIVERSE_PATH is empty; pass an output path")
+        return 1
+    symbols = fetch_symbols()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["symbol", "name"])
+        writer.writerows(sorted(symbols.items()))
+    os.replace(tmp, path)
+    print(f"✅ Wrote {len(symbols)} symbols to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
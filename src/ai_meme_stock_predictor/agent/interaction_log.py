@@ -0,0 +1,124 @@
+"""Background batching of interaction logs sent to Portia.
+
+Replies never wait on the logging LLM call: interactions are queued, a
+daemon thread groups them into one prompt per batch, and the queue is
+bounded so a slow or failing sink sheds load instead of growing memory.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import atexit
+import queue
+import random
+import threading
+import time
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Above this fill ratio new records are only sampled in
+HIGH_WATERMARK = 0.8
+
+_STOP = object()
+
+
+def format_batch(records: List[Dict]) -> str:
+    lines = [f"Log these {len(records)} interactions for analysis:"]
+    for i, r in enumerate(records, 1):
+        lines.append(
+            f"{i}. User: {r['user_text']}\n"
+            f"   Assistant: {r['assistant_text']}\n"
+            f"   Metadata: {r['meta']}"
+        )
+    lines.append("This helps improve future stock analysis accuracy.")
+    return "\n".join(lines)
+
+
+class InteractionLogger:
+    """Bounded queue + worker thread that ships interaction batches to ``sink``."""
+
+    def __init__(self, sink: Callable[[str], Any], maxsize: Optional[int] = None,
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 sample_rate: Optional[float] = None):
+        settings = get_settings()
+        self._sink = sink
+        self._maxsize = maxsize or settings.portia_log_queue_size
+        self._batch_size = batch_size or settings.portia_log_batch_size
+        self._flush_interval = flush_interval if flush_interval is not None else settings.portia_log_flush_interval
+        self._sample_rate = sample_rate if sample_rate is not None else settings.portia_log_sample_rate
+        self._queue: queue.Queue = queue.Queue(maxsize=self._maxsize)
+        self._closed = False
+        self.stats = {'submitted': 0, 'sampled_out': 0, 'dropped': 0, 'batches': 0, 'failed_batches': 0}
+        self._thread = threading.Thread(target=self._worker, name="portia-interaction-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, conversation_id: str, user_text: str, assistant_text: str, meta: Dict) -> bool:
+        """Queue one interaction; returns False if it was sampled out or dropped."""
+        if self._closed:
+            return False
+        if self._queue.qsize() >= self._maxsize * HIGH_WATERMARK and random.random() >= self._sample_rate:
+            self.stats['sampled_out'] += 1
+            return False
+        record = {
+            'conversation_id': conversation_id,
+            'user_text': user_text,
+            'assistant_text': assistant_text,
+            'meta': meta,
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['submitted'] += 1
+        return True
+
+    def _next_batch(self) -> List[Any]:
+        first = self._queue.get()
+        batch = [first]
+        if first is _STOP:
+            return batch
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _send(self, records: List[Dict]):
+        if not records:
+            return
+        try:
+            self._sink(format_batch(records))
+            self.stats['batches'] += 1
+        except Exception as e:
+            self.stats['failed_batches'] += 1
+            logger.debug(f"Portia interaction logging failed: {e}")
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            self._send([r for r in batch if r is not _STOP])
+            if stop:
+                return
+
+    def close(self, timeout: float = 10.0):
+        """Flush everything queued so far and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        # Blocking put: the stop marker must land even when the queue is full
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Interaction log queue still full at shutdown; pending records dropped")
+            return
+        self._thread.join(timeout)
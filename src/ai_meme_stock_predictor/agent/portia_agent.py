@@ -1,7 +1,10 @@
 import os
-from typing import Dict, List, Any
-from .workflow import MemeStockWorkflow
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+from .workflow import MemeStockWorkflow, AsyncMemeStockWorkflow
 from .feedback import record_feedback
+from .interaction_log import InteractionLogger
+from ..data_sources.ticker_universe import get_universe, parse_ticker
 from ..utils.logging_setup import get_logger
 from ..utils.config import get_settings
 
@@ -20,15 +23,22 @@ logger = get_logger(__name__)
 class PortiaMemeAgent:
     def __init__(self):
         self.workflow = MemeStockWorkflow()
+        self.async_workflow = AsyncMemeStockWorkflow()
         self._history: Dict[str, List[Dict]] = {}
         self._portia_client = None
         self._cloud_tools_available = False
         self._tool_count = 0
         
+        self._interaction_log: Optional[InteractionLogger] = None
+        # Load the symbol file now, so a missing one is reported at startup rather than on the first query
+        get_universe()
+
         if PORTIA_AVAILABLE:
             self._initialize_portia()
         else:
             logger.warning("Portia SDK not available - running in basic mode")
+        if self._portia_client:
+            self._interaction_log = InteractionLogger(sink=self._portia_client.run)
 
     def _initialize_portia(self):
         """Initialize Portia client with Google Gemini LLM (graceful degradation)."""
@@ -96,7 +106,12 @@ class PortiaMemeAgent:
         if len(self._history[conversation_id]) > 50:
             self._history[conversation_id] = self._history[conversation_id][-50:]
 
-    def handle_query(self, conversation_id: str, text: str) -> Dict:
+    def _route(self, conversation_id: str, text: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Answer non-analysis messages directly.
+
+        Returns ``(response, None)`` when the message was handled here, or
+        ``(None, ticker)`` when a ticker analysis is required.
+        """
         self._append_history(conversation_id, "user", text)
         lower = text.lower().strip()
 
@@ -108,54 +123,61 @@ class PortiaMemeAgent:
             response = {"response": "Feedback appreciated!"}
             self._append_history(conversation_id, "assistant", response["response"])
             self._send_to_portia(conversation_id, text, response["response"], meta={"type": "feedback"})
-            return response
+            return response, None
 
         if any(k in lower for k in ["explain", "methodology", "how"]):
             msg = "Ask about a ticker like 'TSLA memes?' to get a playful sentiment+memes analysis."
             self._append_history(conversation_id, "assistant", msg)
             self._send_to_portia(conversation_id, text, msg, meta={"type": "help"})
-            return {"response": msg}
-
-        words = [w.strip("$?!. ,") for w in lower.split()]
-        ticker = None
-        for w in words:
-            if w.isalpha() and 2 < len(w) <= 5:
-                ticker = w.upper()
-                break
+            return {"response": msg}, None
+
+        ticker = parse_ticker(text)
         if not ticker:
             msg = "Please specify a ticker (e.g., 'GME memes?')."
             self._append_history(conversation_id, "assistant", msg)
             self._send_to_portia(conversation_id, text, msg, meta={"type": "no_ticker"})
-            return {"response": msg}
+            return {"response": msg}, None
+        return None, ticker
 
-        # Enhanced analysis with Portia AI if available
-        if self._portia_client:
-            try:
-                enhanced_result = self._analyze_with_portia_ai(ticker, conversation_id)
-                if enhanced_result:
-                    message = enhanced_result['message']
-                    self._append_history(conversation_id, "assistant", message)
-                    self._send_to_portia(conversation_id, text, message, meta={"type": "enhanced_analysis", "ticker": ticker, **enhanced_result.get('prediction', {})})
-                    return {"response": message, "details": enhanced_result}
-            except Exception as e:
-                logger.warning(f"Enhanced analysis failed, falling back to basic: {e}")
-
-        # Fallback to basic analysis
-        result = self.workflow.run(ticker)
+    def _finish_analysis(self, conversation_id: str, text: str, ticker: str, result: Dict) -> Dict:
         message = result['message']
+        kind = "enhanced_analysis" if result.get('ai_enhanced') else "analysis"
         self._append_history(conversation_id, "assistant", message)
-        self._send_to_portia(conversation_id, text, message, meta={"type": "analysis", "ticker": ticker, **result.get('prediction', {})})
+        self._send_to_portia(conversation_id, text, message, meta={"type": kind, "ticker": ticker, **result.get('prediction', {})})
         return {"response": message, "details": result}
 
-    def _analyze_with_portia_ai(self, ticker: str, user_id: str) -> Dict[str, Any]:
-        """Enhanced analysis using Portia AI with Google Gemini"""
+    def handle_query(self, conversation_id: str, text: str) -> Dict:
+        response, ticker = self._route(conversation_id, text)
+        if response is not None:
+            return response
+
+        result = self.workflow.run(ticker)
+        # Enhanced analysis with Portia AI if available, reusing the basic run
+        if self._portia_client:
+            result = self._enhance_with_portia(ticker, result) or result
+        return self._finish_analysis(conversation_id, text, ticker, result)
+
+    async def ahandle_query(self, conversation_id: str, text: str) -> Dict:
+        """Async variant of :meth:`handle_query` built on ``AsyncMemeStockWorkflow``.
+
+        Source fetches are awaited on the event loop; the blocking Portia
+        enhancement call is pushed to a worker thread.
+        """
+        response, ticker = self._route(conversation_id, text)
+        if response is not None:
+            return response
+
+        result = await self.async_workflow.run(ticker)
+        if self._portia_client:
+            result = await asyncio.to_thread(self._enhance_with_portia, ticker, result) or result
+        return self._finish_analysis(conversation_id, text, ticker, result)
+
+    def _enhance_with_portia(self, ticker: str, basic_result: Dict) -> Optional[Dict[str, Any]]:
+        """Ask Gemini (via Portia) to enrich an already computed analysis."""
         if not self._portia_client:
             return None
-        
+
         try:
-            # Get basic analysis first
-            basic_result = self.workflow.run(ticker)
-            
             # Create enhanced analysis prompt for Google Gemini
             analysis_prompt = f"""
             Enhance this meme stock analysis for {ticker} using the provided data:
@@ -195,25 +217,12 @@ class PortiaMemeAgent:
             return None
 
     def _send_to_portia(self, conversation_id: str, user_text: str, assistant_text: str, meta: Dict):
-        """Log interaction to Portia for learning and improvement"""
-        if not self._portia_client:
+        """Queue interaction for batched logging to Portia (never blocks the reply)."""
+        if self._interaction_log is None:
             return
-        try:
-            # Use Portia to analyze and log the conversation for continuous improvement
-            log_prompt = f"""
-            Log this interaction for analysis:
-            User: {user_text}
-            Assistant: {assistant_text}
-            Metadata: {meta}
-            
-            This helps improve future stock analysis accuracy.
-            """
-            
-            # Run async to avoid blocking
-            try:
-                self._portia_client.run(log_prompt)
-            except Exception:
-                pass  # Don't block on logging failures
-                
-        except Exception as e:
-            logger.debug(f"Portia interaction logging failed: {e}")
+        self._interaction_log.submit(conversation_id, user_text, assistant_text, meta)
+
+    def close(self):
+        """Flush pending interaction logs; call on application shutdown."""
+        if self._interaction_log is not None:
+            self._interaction_log.close()
@@ -1,37 +1,271 @@
-from typing import Dict
-from ..data_sources.reddit_source import RedditSource
-from ..data_sources.twitter_source import TwitterSource
-from ..data_sources.market_data import MarketData
-from ..analysis.features import build_features
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+import asyncio
+import threading
+import time
+from ..data_sources.reddit_source import RedditSource, AsyncRedditSource
+from ..data_sources.twitter_source import TwitterSource, AsyncTwitterSource
+from ..data_sources.market_data import MarketData, AsyncMarketData
+from ..data_sources.price_store import bars_to_rows
+from ..data_sources.http_client import close_async_client
+from ..analysis.aggregates import pending_indices
+from ..analysis.features import Scores, build_features, keyed_texts, score_keyed
 from ..models.predictor import MemeStockPredictor
 from ..agent.prompts import EXPLANATION_TEMPLATE, HUMOR_TEMPLATES
+from ..utils.cache import FRESH, SourceCache, Uncached, get_cache, unwrap
+from ..utils.config import get_settings
+from ..utils.singleflight import AsyncSingleFlight, SingleFlight
 from ..utils.logging_setup import get_logger
 import random
 
 logger = get_logger(__name__)
 
+# Shared by every workflow instance in the process so that a burst of
+# "GME memes?" messages runs one analysis, not one per chat
+_inflight = SingleFlight()
+_ainflight = AsyncSingleFlight()
+
+# Batch pools are process-wide so concurrent batches share one budget of
+# BATCH_MAX_IN_FLIGHT tickers. Four source jobs per ticker slot means source
+# jobs never queue behind each other and eat into their deadlines.
+_batch_pools: Optional[Tuple[ThreadPoolExecutor, ThreadPoolExecutor]] = None
+_batch_pools_lock = threading.Lock()
+
+
+def _get_batch_pools() -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _batch_pools
+    with _batch_pools_lock:
+        if _batch_pools is None:
+            in_flight = max(1, get_settings().batch_max_in_flight)
+            _batch_pools = (
+                ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="batch-ticker"),
+                ThreadPoolExecutor(max_workers=in_flight * 4, thread_name_prefix="batch-source"),
+            )
+    return _batch_pools
+
+
+def _result_cache() -> SourceCache:
+    # Whole results are cheap to recompute from cached sources; no stale window
+    return get_cache("workflow", ttl=lambda: get_settings().workflow_result_ttl, stale_ttl=0)
+
+
+def _all_sources_failed(sources: Dict[str, Any]) -> bool:
+    return not (sources['reddit_posts'] or sources['tweets'] or sources['quote'] or len(sources['history']))
+
+
+def _memoizable(result: Dict, sources: Dict[str, Any]) -> Union[Dict, Uncached]:
+    """``result``, or an :class:`Uncached` wrapper when every source came back empty.
+
+    Such a result is an outage, not an analysis; memoising it would serve
+    "zero mentions" for a whole ``WORKFLOW_RESULT_TTL`` after the sources recover.
+    """
+    if _all_sources_failed(sources):
+        logger.warning(f"Every source came back empty for {result['ticker']}; not memoising the result")
+        return Uncached(result)
+    return result
+
+
+def _assemble_result(ticker: str, sources: Dict[str, Any], predictor: MemeStockPredictor,
+                     scores: Optional[Scores] = None) -> Dict:
+    feats = build_features(ticker, sources['reddit_posts'], sources['tweets'], sources['quote'], scores)
+    pred = predictor.predict(feats)
+    humor = random.choice(HUMOR_TEMPLATES).format(ticker=ticker.upper(), **pred)
+    explanation = EXPLANATION_TEMPLATE.format(**feats)
+    return {
+        'ticker': ticker.upper(),
+        'features': feats,
+        'prediction': pred,
+        'message': humor,
+        'explanation': explanation,
+        # Bars stay arrays through the workflow; rows only for the response payload
+        'history': bars_to_rows(sources['history'])
+    }
+
+
 class MemeStockWorkflow:
     def __init__(self):
         self.reddit = RedditSource()
         self.twitter = TwitterSource()
         self.market = MarketData()
         self.predictor = MemeStockPredictor()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().workflow_max_workers),
+            thread_name_prefix="workflow-source",
+        )
+
+    def _fetch_sources(self, ticker: str, executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+        """Fetch all sources concurrently, each bounded by its own deadline.
+
+        A source that misses its deadline (or raises) contributes its empty
+        default so features are still built from whatever arrived in time.
+        """
+        executor = executor or self._executor
+        settings = get_settings()
+        jobs: Dict[str, tuple] = {
+            'reddit_posts': (lambda: self.reddit.fetch_mentions(ticker), settings.reddit_timeout, []),
+            'tweets': (lambda: self.twitter.fetch_mentions(ticker), settings.twitter_timeout, []),
+            'quote': (lambda: self.market.quote(ticker), settings.quote_timeout, {}),
+            'history': (lambda: self.market.bars(ticker, days=30), settings.history_timeout, []),
+        }
+        started = time.monotonic()
+        futures = {name: executor.submit(fn) for name, (fn, _, _) in jobs.items()}
+        results: Dict[str, Any] = {}
+        for name, future in futures.items():
+            _, timeout, default = jobs[name]
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeout:
+                logger.warning(f"{name} for {ticker} missed its {timeout}s deadline; continuing without it")
+                future.cancel()
+                results[name] = default
+            except Exception as e:
+                logger.error(f"{name} fetch failed for {ticker}: {e}")
+                results[name] = default
+        logger.info(f"Sources for {ticker} gathered in {time.monotonic() - started:.2f}s")
+        return results
 
     def run(self, ticker: str) -> Dict:
+        """Analyse ``ticker``; concurrent calls for it share one execution and
+        repeats within ``WORKFLOW_RESULT_TTL`` are served from the result memo."""
+        key = ticker.upper()
+        if get_settings().workflow_result_ttl <= 0:
+            return _inflight.do(key, lambda: unwrap(self._run(ticker)))
+        return _result_cache().get_or_fetch(key, lambda: self._run(ticker))
+
+    def _run(self, ticker: str) -> Union[Dict, Uncached]:
         logger.info(f"Workflow run for ticker {ticker}")
-        reddit_posts = self.reddit.fetch_mentions(ticker)
-        tweets = self.twitter.fetch_mentions(ticker)
-        quote = self.market.quote(ticker)
-        feats = build_features(ticker, reddit_posts, tweets, quote)
-        pred = self.predictor.predict(feats)
-        humor = random.choice(HUMOR_TEMPLATES).format(ticker=ticker.upper(), **pred)
-        explanation = EXPLANATION_TEMPLATE.format(**feats)
-        history = self.market.history(ticker, days=30)
-        return {
-            'ticker': ticker.upper(),
-            'features': feats,
-            'prediction': pred,
-            'message': humor,
-            'explanation': explanation,
-            'history': history
-        }
+        sources = self._fetch_sources(ticker)
+        return _memoizable(_assemble_result(ticker, sources, self.predictor), sources)
+
+    def run_many(self, tickers: Iterable[str], max_in_flight: Optional[int] = None) -> Iterator[Dict]:
+        """Analyse a watchlist, yielding each result as soon as it is ready.
+
+        Tickers are deduped and memoised results are yielded first. At most
+        ``max_in_flight`` tickers fetch sources at a time, on pools shared by
+        every batch in the process (``BATCH_MAX_IN_FLIGHT`` tickers in total);
+        whenever the scorer is free, every fetch that has landed is scored
+        together in one sentiment batch. A ticker whose fetch raises
+        yields ``{'ticker': ..., 'error': ...}`` instead of aborting the batch.
+        """
+        settings = get_settings()
+        use_memo = settings.workflow_result_ttl > 0
+        unique = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        todo = []
+        for ticker in unique:
+            value, state = _result_cache().lookup(ticker) if use_memo else (None, None)
+            if state == FRESH:
+                yield value
+            else:
+                todo.append(ticker)
+        if not todo:
+            return
+
+        cap = max(1, settings.batch_max_in_flight)
+        in_flight = min(cap, max(1, max_in_flight or cap))
+        logger.info(f"Batch run for {len(todo)} tickers ({len(unique) - len(todo)} memoised), {in_flight} in flight")
+        ticker_pool, source_pool = _get_batch_pools()
+        queue = iter(todo)
+        futures: Dict[Future, str] = {}
+
+        def submit_next():
+            ticker = next(queue, None)
+            if ticker is not None:
+                futures[ticker_pool.submit(self._fetch_sources, ticker, source_pool)] = ticker
+
+        for _ in range(in_flight):
+            submit_next()
+        try:
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                fetched: List[Tuple[str, Dict[str, Any]]] = []
+                for future in done:
+                    ticker = futures.pop(future)
+                    submit_next()
+                    try:
+                        fetched.append((ticker, future.result()))
+                    except Exception as e:
+                        logger.error(f"Batch fetch failed for {ticker}: {e}")
+                        yield {'ticker': ticker, 'error': str(e)}
+                for (_, sources), result in zip(fetched, self._score_batch(fetched)):
+                    if use_memo:
+                        _result_cache().store(result['ticker'], _memoizable(result, sources))
+                    yield result
+        finally:
+            # An abandoned batch must not keep the shared pools busy
+            for future in futures:
+                future.cancel()
+
+    def _score_batch(self, fetched: List[Tuple[str, Dict[str, Any]]]) -> Iterator[Dict]:
+        """Score every ticker's unseen items in one sentiment pass, then assemble results.
+
+        Items the ticker's running aggregate already holds are left as None
+        rather than rescored.
+        """
+        texts_per_ticker = [keyed_texts(s['reddit_posts'], s['tweets']) for _, s in fetched]
+        wanted = []
+        for (ticker, sources), texts in zip(fetched, texts_per_ticker):
+            pending = pending_indices(ticker, sources['reddit_posts'], sources['tweets'])
+            wanted.append(range(len(texts)) if pending is None else pending)
+        vader_vals, finbert_vals = score_keyed([texts[i] for texts, idx in zip(texts_per_ticker, wanted)
+                                                for i in idx])
+        offset = 0
+        for (ticker, sources), texts, idx in zip(fetched, texts_per_ticker, wanted):
+            vader: List[Optional[float]] = [None] * len(texts)
+            finbert: List[Optional[float]] = [None] * len(texts)
+            for i in idx:
+                vader[i], finbert[i] = vader_vals[offset], finbert_vals[offset]
+                offset += 1
+            yield _assemble_result(ticker, sources, self.predictor, (vader, finbert))
+
+
+class AsyncMemeStockWorkflow:
+    """Event-loop friendly counterpart of :class:`MemeStockWorkflow`.
+
+    Sources are awaited concurrently on the caller's loop, so a single
+    process can keep many analyses in flight without a thread per query.
+    """
+
+    def __init__(self):
+        self.reddit = AsyncRedditSource()
+        self.twitter = AsyncTwitterSource()
+        self.market = AsyncMarketData()
+        self.predictor = MemeStockPredictor()
+
+    async def _fetch_sources(self, ticker: str) -> Dict[str, Any]:
+        settings = get_settings()
+
+        async def guarded(name: str, coro, timeout: float, default):
+            try:
+                return await asyncio.wait_for(coro, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{name} for {ticker} missed its {timeout}s deadline; continuing without it")
+            except Exception as e:
+                logger.error(f"{name} fetch failed for {ticker}: {e}")
+            return default
+
+        started = time.monotonic()
+        reddit_posts, tweets, quote, history = await asyncio.gather(
+            guarded('reddit_posts', self.reddit.fetch_mentions(ticker), settings.reddit_timeout, []),
+            guarded('tweets', self.twitter.fetch_mentions(ticker), settings.twitter_timeout, []),
+            guarded('quote', self.market.quote(ticker), settings.quote_timeout, {}),
+            guarded('history', self.market.bars(ticker, days=30), settings.history_timeout, []),
+        )
+        logger.info(f"Sources for {ticker} gathered in {time.monotonic() - started:.2f}s")
+        return {'reddit_posts': reddit_posts, 'tweets': tweets, 'quote': quote, 'history': history}
+
+    async def run(self, ticker: str) -> Dict:
+        key = ticker.upper()
+        if get_settings().workflow_result_ttl <= 0:
+            return unwrap(await _ainflight.do(key, lambda: self._run(ticker)))
+        return await _result_cache().aget_or_fetch(key, lambda: self._run(ticker))
+
+    async def _run(self, ticker: str) -> Union[Dict, Uncached]:
+        logger.info(f"Async workflow run for ticker {ticker}")
+        sources = await self._fetch_sources(ticker)
+        # Feature extraction is CPU-bound (VADER/FinBERT); keep it off the loop
+        result = await asyncio.to_thread(_assemble_result, ticker, sources, self.predictor)
+        return _memoizable(result, sources)
+
+    async def aclose(self):
+        await asyncio.gather(self.reddit.aclose(), close_async_client())
@@ -0,0 +1,230 @@
+"""Incremental per-ticker feature aggregation.
+
+Consecutive refreshes of a ticker mostly return posts that were already
+seen. :class:`TickerAggregate` keeps running sums (tokens, meme hits,
+sentiment) plus a per-source high-water mark - ``created_utc`` for Reddit,
+the monotonically increasing tweet id for Twitter - so a refresh only scans
+and scores items above the mark. Comments arrive from many threads in no
+particular time order, so they are recognised by id alone. Items older than
+``FEATURE_WINDOW_HOURS`` (by default ``REDDIT_SEARCH_HOURS``, the span each
+fetch covers) are subtracted out again once they drop out of the fetched results.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import threading
+import time
+from cachetools import LRUCache
+from .meme_extraction import MemeMatcher, get_matcher, intensity_from_counts
+from .sentiment import scoring_text
+from ..utils.config import get_settings
+from ..utils.posts import reddit_source
+
+# Batch callers may leave None for items the aggregate already holds
+Scores = Tuple[List[Optional[float]], List[Optional[float]]]
+ScoreFn = Callable[[List[Tuple[str, Optional[str], str]]], Scores]
+
+# Sources with no usable watermark order
+_UNORDERED_SOURCES = frozenset({'reddit_comment'})
+
+
+class _Item(NamedTuple):
+    source: str
+    post_id: str
+    order: float  # watermark key: created_utc, or the tweet id as an int
+    ts: float     # epoch seconds, for window eviction
+    text: str
+
+
+class _Contribution(NamedTuple):
+    tokens: int
+    hits: int
+    vader: float
+    finbert: float
+    ts: float
+
+
+def _parse_ts(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _items(reddit_posts: List[Dict], tweets: List[Dict]) -> Optional[List[_Item]]:
+    """Watermarkable items in :func:`.features.keyed_texts` order, or None if any lacks an id/timestamp."""
+    items = []
+    for p in reddit_posts:
+        ts = _parse_ts(p.get('created_utc'))
+        if not p.get('id') or ts is None:
+            return None
+        source = reddit_source(p)
+        items.append(_Item(source, str(p['id']), ts, ts, scoring_text(p, source)))
+    for t in tweets:
+        ts = _parse_ts(t.get('created_at'))
+        if not str(t.get('id') or '').isdigit() or ts is None:
+            return None
+        items.append(_Item('twitter', str(t['id']), int(t['id']), ts, scoring_text(t, 'twitter')))
+    return items
+
+
+class TickerAggregate:
+    """Running meme/sentiment sums for one ticker."""
+
+    def __init__(self, ticker: str, window_seconds: float):
+        self.ticker = ticker
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._matcher: Optional[MemeMatcher] = None
+        self.reset()
+
+    def reset(self):
+        self._contributions: Dict[Tuple[str, str], _Contribution] = {}
+        self._expiry: List[Tuple[float, Tuple[str, str]]] = []
+        self.watermarks: Dict[str, float] = {}
+        self.tokens = 0
+        self.hits = 0
+        self.vader_sum = 0.0
+        self.finbert_sum = 0.0
+        self.processed = 0
+
+    def _is_new(self, item: _Item) -> bool:
+        if item.source in _UNORDERED_SOURCES:
+            return (item.source, item.post_id) not in self._contributions
+        mark = self.watermarks.get(item.source)
+        if mark is None or item.order > mark:
+            return True
+        return item.order == mark and (item.source, item.post_id) not in self._contributions
+
+    def _sync_matcher(self) -> MemeMatcher:
+        matcher = get_matcher()
+        if matcher is not self._matcher:
+            # Lexicon reloaded: old per-item meme counts are no longer comparable
+            self.reset()
+            self._matcher = matcher
+        return matcher
+
+    def fresh(self, items: List[_Item]) -> List[int]:
+        """Positions of the items :meth:`update` would fold in (and need scores for)."""
+        with self._lock:
+            self._sync_matcher()
+            return [i for i, item in enumerate(items) if self._is_new(item)]
+
+    def update(self, items: List[_Item], score_fn: ScoreFn, scores: Optional[Scores] = None,
+               now: Optional[float] = None):
+        """Fold in the items above the watermarks, then evict expired ones.
+
+        ``scores``, if given, lines up with ``items`` and may hold None for
+        items that are not fresh; fresh items without a score (or all of
+        them, without ``scores``) are scored through ``score_fn``.
+        """
+        with self._lock:
+            matcher = self._sync_matcher()
+            fresh = [i for i, item in enumerate(items) if self._is_new(item)]
+            vader_vals = [scores[0][i] for i in fresh] if scores is not None else [None] * len(fresh)
+            finbert_vals = [scores[1][i] for i in fresh] if scores is not None else [None] * len(fresh)
+            missing = [j for j, v in enumerate(vader_vals) if v is None]
+            if missing:
+                extra_vader, extra_finbert = score_fn([(items[fresh[j]].source, items[fresh[j]].post_id,
+                                                        items[fresh[j]].text) for j in missing])
+                for j, vader, finbert in zip(missing, extra_vader, extra_finbert):
+                    vader_vals[j], finbert_vals[j] = vader, finbert
+            for i, vader, finbert in zip(fresh, vader_vals, finbert_vals):
+                item = items[i]
+                key = (item.source, item.post_id)
+                counts = matcher.scan(item.text, self.ticker)
+                self._add(key, _Contribution(counts.tokens, counts.keyword_hits + counts.ticker_hashtags,
+                                             vader, finbert, item.ts))
+                if item.order > self.watermarks.get(item.source, float("-inf")):
+                    self.watermarks[item.source] = item.order
+            self.processed += len(fresh)
+            self._evict({(item.source, item.post_id) for item in items},
+                        (now if now is not None else time.time()) - self.window_seconds)
+
+    def _add(self, key: Tuple[str, str], c: _Contribution):
+        old = self._contributions.get(key)
+        if old is not None:
+            self._apply(old, -1)
+        self._contributions[key] = c
+        self._apply(c, 1)
+        heapq.heappush(self._expiry, (c.ts, key))
+
+    def _apply(self, c: _Contribution, sign: int):
+        self.tokens += sign * c.tokens
+        self.hits += sign * c.hits
+        self.vader_sum += sign * c.vader
+        self.finbert_sum += sign * c.finbert
+
+    def _evict(self, current: set, cutoff: float):
+        # Items still in the latest fetch stay, however old, so the features
+        # never cover less than a from-scratch computation would
+        kept = []
+        while self._expiry and self._expiry[0][0] < cutoff:
+            entry = heapq.heappop(self._expiry)
+            if entry[1] in current:
+                kept.append(entry)
+                continue
+            c = self._contributions.get(entry[1])
+            if c is not None and c.ts == entry[0]:
+                del self._contributions[entry[1]]
+                self._apply(c, -1)
+        for entry in kept:
+            heapq.heappush(self._expiry, entry)
+
+    def features(self) -> Dict[str, float]:
+        with self._lock:
+            count = len(self._contributions)
+            return {
+                "meme_intensity": intensity_from_counts(self.tokens, self.hits) if count else 0.0,
+                "social_sentiment": self.vader_sum / count if count else 0,
+                "financial_sentiment": self.finbert_sum / count if count else 0,
+            }
+
+
+_aggregates: LRUCache = LRUCache(get_settings().cache_maxsize)
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregate(ticker: str) -> TickerAggregate:
+    key = ticker.upper()
+    with _aggregates_lock:
+        agg = _aggregates.get(key)
+        if agg is None:
+            agg = TickerAggregate(ticker, get_settings().feature_window_seconds())
+            _aggregates[key] = agg
+        return agg
+
+
+def pending_indices(ticker: str, reddit_posts: List[Dict], tweets: List[Dict]) -> Optional[List[int]]:
+    """Positions (in :func:`.features.keyed_texts` order) that still need sentiment scores.
+
+    None means the running aggregate cannot be used and every item needs one.
+    """
+    if get_settings().feature_window_seconds() <= 0:
+        return None
+    items = _items(reddit_posts, tweets)
+    if items is None:
+        return None
+    return get_aggregate(ticker).fresh(items)
+
+
+def incremental_features(ticker: str, reddit_posts: List[Dict], tweets: List[Dict], score_fn: ScoreFn,
+                         scores: Optional[Scores] = None) -> Optional[Dict[str, float]]:
+    """Sentiment and meme features from the ticker's running aggregate.
+
+    Returns None when aggregation is disabled (``FEATURE_WINDOW_HOURS=0``) or
+    some item has no id/timestamp to watermark on; callers then compute the
+    features from scratch.
+    """
+    if get_settings().feature_window_seconds() <= 0:
+        return None
+    items = _items(reddit_posts, tweets)
+    if items is None:
+        return None
+    agg = get_aggregate(ticker)
+    agg.update(items, score_fn, scores)
+    return agg.features()
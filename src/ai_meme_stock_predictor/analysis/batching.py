@@ -0,0 +1,77 @@
+"""Dynamic micro-batching across concurrent callers.
+
+Model forward passes cost far less per item in one large batch than in many
+small ones. :class:`MicroBatcher` holds the first request for a short window,
+folds in whatever other callers submit meanwhile (up to a size cap), runs a
+single call and hands each caller back its own slice of the results.
+"""
+from typing import Callable, Generic, List, Tuple, TypeVar
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Run ``fn`` over items gathered from concurrent :meth:`submit` calls.
+
+    ``fn`` must return exactly one result per input item, in order. A request
+    larger than ``max_batch_size`` is never split; it simply runs alone.
+    """
+
+    def __init__(self, fn: Callable[[List[T]], List[R]], max_batch_size: int, max_wait_ms: float,
+                 name: str = "micro-batcher"):
+        self._fn = fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._requests: "queue.Queue[Tuple[List[T], Future]]" = queue.Queue()
+        self.batches_run = 0
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[T]) -> List[R]:
+        """Block until ``items`` have been processed as part of some batch."""
+        if not items:
+            return []
+        future: Future = Future()
+        self._requests.put((list(items), future))
+        return future.result()
+
+    def _collect(self) -> List[Tuple[List[T], Future]]:
+        batch = [self._requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self._max_wait
+        while size < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            items = [item for chunk, _ in batch for item in chunk]
+            try:
+                results = self._fn(items)
+                self.batches_run += 1
+            except BaseException as e:
+                logger.warning(f"Micro-batch of {len(items)} items failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for chunk, future in batch:
+                future.set_result(results[offset:offset + len(chunk)])
+                offset += len(chunk)
@@ -1,17 +1,91 @@
-from typing import Dict, List
-from .sentiment import vader_compound, finbert_scores
+from typing import Dict, List, Optional, Tuple
+from .sentiment import vader_batch, finbert_scores, model_version, scoring_text, text_key
 from .meme_extraction import meme_intensity
+from .score_store import get_score_store
+from .aggregates import incremental_features
+from ..data_sources.mention_index import mention_features
+from ..utils.posts import reddit_source
 
+Scores = Tuple[List[float], List[float]]
+# (source, post id or None, text)
+KeyedText = Tuple[str, Optional[str], str]
 
-def build_features(ticker: str, reddit_posts: List[Dict], tweets: List[Dict], quote: Dict) -> Dict:
-    combined_texts = []
+
+def _post_id(item: Dict) -> Optional[str]:
+    post_id = item.get('id')
+    return str(post_id) if post_id else None
+
+
+def keyed_texts(reddit_posts: List[Dict], tweets: List[Dict]) -> List[KeyedText]:
+    items: List[KeyedText] = []
     for p in reddit_posts:
-        combined_texts.append((p.get('title') or '') + ' ' + (p.get('selftext') or ''))
+        source = reddit_source(p)
+        items.append((source, _post_id(p), scoring_text(p, source)))
     for t in tweets:
-        combined_texts.append(t.get('text') or '')
+        items.append(('twitter', _post_id(t), scoring_text(t, 'twitter')))
+    return items
+
+
+def collect_texts(reddit_posts: List[Dict], tweets: List[Dict]) -> List[str]:
+    return [text for _, _, text in keyed_texts(reddit_posts, tweets)]
+
+
+def score_texts(texts: List[str]) -> Scores:
+    """VADER and FinBERT scores for ``texts``, in order."""
+    vader_vals = vader_batch(texts)
+    finbert_vals = finbert_scores(texts) if texts else []
+    return vader_vals, finbert_vals
+
+
+def score_keyed(items: List[KeyedText]) -> Scores:
+    """Like :func:`score_texts`, but reuses persisted scores for posts with an id.
+
+    Known posts are fetched from the score store in one bulk lookup; only the
+    misses are scored, and their results are written back.
+    """
+    store = get_score_store()
+    if store is None or not items:
+        return score_texts([text for _, _, text in items])
+    version = model_version()
+    hashes = [text_key(text).hex() for _, _, text in items]
+    known = store.get_many(version, [(source, post_id, h) for (source, post_id, _), h in zip(items, hashes)
+                                     if post_id])
+    misses = [i for i, (source, post_id, _) in enumerate(items) if (source, post_id) not in known]
+    miss_vader, miss_finbert = score_texts([items[i][2] for i in misses])
+
+    vader_vals = [0.0] * len(items)
+    finbert_vals = [0.0] * len(items)
+    for i, (source, post_id, _) in enumerate(items):
+        if (source, post_id) in known:
+            vader_vals[i], finbert_vals[i] = known[(source, post_id)]
+    rows = []
+    for i, vader, finbert in zip(misses, miss_vader, miss_finbert):
+        vader_vals[i], finbert_vals[i] = vader, finbert
+        source, post_id, _ = items[i]
+        if post_id:
+            rows.append((source, post_id, hashes[i], vader, finbert))
+    store.put_many(version, rows)
+    return vader_vals, finbert_vals
+
+
+def build_features(ticker: str, reddit_posts: List[Dict], tweets: List[Dict], quote: Dict,
+                   scores: Optional[Scores] = None) -> Dict:
+    """Aggregate features for one ticker.
+
+    ``scores`` lets batch callers pass sentiment computed for many tickers in
+    one pass; it must line up with :func:`collect_texts` for these inputs and
+    may hold None for items the running aggregate already holds.
+    When every item carries an id and timestamp, features come from the
+    ticker's running aggregate and only previously unseen items are scored.
+    """
+    running = incremental_features(ticker, reddit_posts, tweets, score_keyed, scores)
+    if running is not None:
+        return {**running, "price": quote.get('price', 0), "volume": quote.get('volume', 0),
+                **mention_features(ticker)}
 
-    vader_vals = [vader_compound(t) for t in combined_texts]
-    finbert_vals = finbert_scores(combined_texts) if combined_texts else []
+    if scores is None or None in scores[0]:
+        scores = score_keyed(keyed_texts(reddit_posts, tweets))
+    vader_vals, finbert_vals = scores
 
     meme_score = meme_intensity(reddit_posts + tweets, ticker)
     avg_vader = sum(vader_vals)/len(vader_vals) if vader_vals else 0
@@ -23,4 +97,5 @@ def build_features(ticker: str, reddit_posts: List[Dict], tweets: List[Dict], qu
         "financial_sentiment": avg_finbert,
         "price": quote.get('price', 0),
         "volume": quote.get('volume', 0),
+        **mention_features(ticker),
     }
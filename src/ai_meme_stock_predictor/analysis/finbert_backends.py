@@ -0,0 +1,145 @@
+"""Interchangeable inference backends for the financial sentiment model.
+
+Every backend is a callable with the Hugging Face text-classification
+pipeline contract used by :mod:`.sentiment`::
+
+    backend(texts, batch_size=..., truncation=True, max_length=...)
+        -> [[{"label": ..., "score": ...}, ...], ...]
+
+and exposes ``tokenizer``. ``FINBERT_BACKEND`` selects one of:
+
+* ``torch`` - the reference fp32 pipeline;
+* ``int8``  - the same model with dynamic int8 quantization of its Linear
+  layers (smaller RSS, faster CPU matmuls);
+* ``onnx``  - ONNX Runtime on an exported graph (``FINBERT_ONNX_PATH``,
+  exported on first use when the file does not exist yet).
+
+Use :func:`parity_check` to confirm a candidate backend tracks the
+reference before switching production traffic to it.
+"""
+from typing import Dict, List, Optional
+import inspect
+import math
+import os
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def label_score(out: List[Dict]) -> float:
+    """Positive-minus-negative probability for one pipeline output row."""
+    pos = next((d['score'] for d in out if d['label'].lower() == 'positive'), 0)
+    neg = next((d['score'] for d in out if d['label'].lower() == 'negative'), 0)
+    return pos - neg
+
+
+class TorchBackend:
+    """Reference fp32 ``transformers`` pipeline."""
+
+    def __init__(self, model_name: str):
+        from transformers import pipeline
+        self._pipeline = pipeline("text-classification", model=model_name, top_k=None)
+        self.tokenizer = self._pipeline.tokenizer
+
+    def __call__(self, texts: List[str], batch_size: int = 8, truncation: bool = True,
+                 max_length: Optional[int] = None) -> List[List[Dict]]:
+        return self._pipeline(texts, batch_size=batch_size, truncation=truncation, max_length=max_length)
+
+
+class Int8Backend(TorchBackend):
+    """Pipeline over a dynamically int8-quantized copy of the model."""
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._pipeline = pipeline("text-classification", model=quantized, tokenizer=self.tokenizer, top_k=None)
+
+
+def export_onnx(model_name: str, path: str, opset: int = 17):
+    """Export ``model_name`` to an ONNX graph with dynamic batch/sequence axes."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["logits"] = {0: "batch"}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Newer torch defaults to the dynamo exporter; the TorchScript one handles BERT fine
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.inference_mode():
+        torch.onnx.export(model, tuple(sample[n] for n in names), path, input_names=names,
+                          output_names=["logits"], dynamic_axes=axes, opset_version=opset, **extra)
+    logger.info(f"Exported {model_name} to ONNX at {path}")
+
+
+class OnnxBackend:
+    """ONNX Runtime session fed by the model's own tokenizer."""
+
+    def __init__(self, model_name: str, onnx_path: str, num_threads: int = 0):
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+        if not os.path.exists(onnx_path):
+            export_onnx(model_name, onnx_path)
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._labels = AutoConfig.from_pretrained(model_name).id2label
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def __call__(self, texts: List[str], batch_size: int = 8, truncation: bool = True,
+                 max_length: Optional[int] = None) -> List[List[Dict]]:
+        outputs: List[List[Dict]] = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            enc = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=truncation,
+                                 max_length=max_length, return_tensors="np")
+            feeds = {k: v.astype("int64") for k, v in enc.items() if k in self._input_names}
+            logits = self._session.run(["logits"], feeds)[0]
+            for row in logits:
+                peak = max(row)
+                exps = [math.exp(float(x) - peak) for x in row]
+                total = sum(exps)
+                outputs.append([{"label": self._labels[i], "score": e / total} for i, e in enumerate(exps)])
+        return outputs
+
+
+def load_backend(kind: str, model_name: str, onnx_path: str = "", num_threads: int = 0):
+    kind = kind.lower()
+    if kind == "torch":
+        return TorchBackend(model_name)
+    if kind == "int8":
+        return Int8Backend(model_name)
+    if kind == "onnx":
+        return OnnxBackend(model_name, onnx_path, num_threads)
+    raise ValueError(f"Unknown FinBERT backend {kind!r}; expected one of {BACKENDS}")
+
+
+def parity_check(reference, candidate, texts: List[str], tolerance: float = 0.05,
+                 max_length: int = 512) -> Dict:
+    """Compare a candidate backend's scores with the reference on ``texts``.
+
+    Scores are the positive-minus-negative values :mod:`.sentiment` uses.
+    ``passed`` requires every per-text difference to be within ``tolerance``
+    and the top label to agree on every text.
+    """
+    ref = reference(texts, batch_size=len(texts) or 1, truncation=True, max_length=max_length)
+    cand = candidate(texts, batch_size=len(texts) or 1, truncation=True, max_length=max_length)
+    diffs = [abs(label_score(r) - label_score(c)) for r, c in zip(ref, cand)]
+    top = lambda out: max(out, key=lambda d: d['score'])['label']
+    agreement = sum(top(r) == top(c) for r, c in zip(ref, cand)) / len(texts) if texts else 1.0
+    max_diff = max(diffs, default=0.0)
+    return {
+        'texts': len(texts),
+        'max_abs_diff': max_diff,
+        'mean_abs_diff': sum(diffs) / len(diffs) if diffs else 0.0,
+        'label_agreement': agreement,
+        'passed': max_diff <= tolerance and agreement == 1.0,
+    }
@@ -1,38 +1,159 @@
-from typing import List, Dict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import os
 import re
-from collections import Counter
+import threading
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
 
 MEME_KEYWORDS = [
     "tendies", "diamond hands", "paper hands", "HODL", "YOLO", "stonks", "moon", "bagholder", "apes"
 ]
 
 HASHTAG_PATTERN = re.compile(r"#\w+")
+_WORD = re.compile(r"\w+")
 
 
 def extract_hashtags(text: str) -> List[str]:
     return HASHTAG_PATTERN.findall(text.lower())
 
 
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation shaped like a trie, so matching cost tracks the text, not the lexicon size."""
+    trie: Dict = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: Dict) -> str:
+        branches = []
+        optional = False
+        for ch in sorted(node):
+            if ch == "":
+                optional = True
+                continue
+            head = r"\s+" if ch == " " else re.escape(ch)
+            branches.append(head + render(node[ch]))
+        if not branches:
+            return ""
+        if optional:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return render(trie)
+
+
+class MemeCounts(NamedTuple):
+    tokens: int
+    keyword_hits: int
+    ticker_hashtags: int
+
+
+class MemeMatcher:
+    """Counts tokens, lexicon keywords, ticker mentions and hashtags in one scan.
+
+    Keywords match on word boundaries ("moon" does not fire on "mooning") and
+    may span several words. Each keyword, and the ticker, counts at most once
+    per post; every hashtag containing the ticker counts.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(_normalize(k) for k in keywords if k.strip())
+        self._widths = {k: len(_WORD.findall(k)) for k in self.keywords}
+        alternation = _trie_pattern(sorted(self.keywords))
+        keyword_group = rf"|(?P<kw>(?<!\w){alternation}(?!\w))" if alternation else ""
+        self._pattern = re.compile(rf"(?P<tag>#\w+){keyword_group}|(?P<tok>\w+)")
+
+    def scan(self, text: str, ticker: str) -> MemeCounts:
+        ticker = ticker.lower()
+        tokens = 0
+        tag_hits = 0
+        ticker_seen = False
+        seen = set()
+        for m in self._pattern.finditer(text.lower()):
+            kind = m.lastgroup
+            if kind == "tok":
+                tokens += 1
+                if m.group() == ticker:
+                    ticker_seen = True
+            elif kind == "kw":
+                kw = _normalize(m.group())
+                seen.add(kw)
+                tokens += self._widths[kw]
+            else:
+                tokens += 1
+                tag = m.group()[1:]
+                if ticker in tag:
+                    tag_hits += 1
+                    ticker_seen = True
+                if tag in self.keywords:
+                    seen.add(tag)
+        return MemeCounts(tokens, len(seen) + ticker_seen, tag_hits)
+
+
+def _read_lexicon(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+_matcher = MemeMatcher(MEME_KEYWORDS)
+_lexicon_state: Optional[tuple] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> MemeMatcher:
+    """Current matcher; recompiled when ``MEME_LEXICON_PATH`` changes on disk.
+
+    Terms in the lexicon file (one per line) extend :data:`MEME_KEYWORDS`.
+    """
+    global _matcher, _lexicon_state
+    path = get_settings().meme_lexicon_path
+    if not path:
+        return _matcher
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return _matcher
+    state = (path, stat.st_mtime_ns, stat.st_size)
+    if state == _lexicon_state:
+        return _matcher
+    with _matcher_lock:
+        if state != _lexicon_state:
+            try:
+                terms = _read_lexicon(path)
+            except OSError as e:
+                logger.warning(f"Could not read meme lexicon {path}: {e}")
+                return _matcher
+            _matcher = MemeMatcher(MEME_KEYWORDS + terms)
+            _lexicon_state = state
+            logger.info(f"Loaded meme lexicon with {len(_matcher.keywords)} terms from {path}")
+    return _matcher
+
+
+def post_text(p: Dict) -> str:
+    return (p.get('title') or '') + ' ' + (p.get('selftext') or '') + ' ' + (p.get('text') or '')
+
+
+def intensity_from_counts(tokens: int, hits: int) -> float:
+    base = hits / max(1, tokens)
+    return round(min(1.0, base * 15), 4)
+
+
 def meme_intensity(posts: List[Dict], ticker: str) -> float:
     if not posts:
         return 0.0
-    keyword_counts = 0
-    total_tokens = 0
-    hashtags = []
-    ticker_lower = ticker.lower()
+    matcher = get_matcher()
+    tokens = 0
+    hits = 0
     for p in posts:
-        body = (p.get('title') or '') + ' ' + (p.get('selftext') or '') + ' ' + (p.get('text') or '')
-        lower = body.lower()
-        tokens = re.findall(r"\w+", lower)
-        total_tokens += len(tokens)
-        for kw in MEME_KEYWORDS:
-            if kw in lower:
-                keyword_counts += 1
-        if ticker_lower in lower:
-            keyword_counts += 1
-        hashtags.extend(extract_hashtags(lower))
-    hashtag_counts = Counter(hashtags)
-    top_hashtag_score = sum(c for h, c in hashtag_counts.items() if ticker_lower in h)
-    base = (keyword_counts + top_hashtag_score) / max(1, total_tokens)
-    scaled = min(1.0, base * 15)
-    return round(scaled, 4)
+        counts = matcher.scan(post_text(p), ticker)
+        tokens += counts.tokens
+        hits += counts.keyword_hits + counts.ticker_hashtags
+    return intensity_from_counts(tokens, hits)
@@ -0,0 +1,111 @@
+"""Durable per-post sentiment scores.
+
+A WSB thread stays in search results for days, so the same post is scored
+on every query. Scores are kept in SQLite (WAL mode, so concurrent readers
+never block the writer) keyed by source, post id and model version; the
+stored text hash turns edited posts into misses instead of stale hits.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# (vader, finbert)
+ScoreRow = Tuple[float, float]
+
+# SQLite's default bound-parameter limit is 999 on older builds
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_scores (
+    source TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vader REAL NOT NULL,
+    finbert REAL NOT NULL,
+    scored_at REAL NOT NULL,
+    PRIMARY KEY (source, post_id, model_version)
+) WITHOUT ROWID
+"""
+
+
+class ScoreStore:
+    """SQLite-backed score table shared by every thread in the process."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def get_many(self, model_version: str,
+                 keys: Iterable[Tuple[str, str, str]]) -> Dict[Tuple[str, str], ScoreRow]:
+        """Look up ``(source, post_id, text_hash)`` keys; only exact hash matches are returned."""
+        wanted: Dict[str, Dict[str, str]] = {}
+        for source, post_id, text_hash in keys:
+            wanted.setdefault(source, {})[post_id] = text_hash
+        found: Dict[Tuple[str, str], ScoreRow] = {}
+        with self._lock:
+            for source, hashes in wanted.items():
+                ids = list(hashes)
+                for start in range(0, len(ids), _LOOKUP_CHUNK):
+                    chunk = ids[start:start + _LOOKUP_CHUNK]
+                    rows = self._conn.execute(
+                        "SELECT post_id, text_hash, vader, finbert FROM post_scores "
+                        f"WHERE model_version = ? AND source = ? AND post_id IN ({','.join('?' * len(chunk))})",
+                        [model_version, source, *chunk],
+                    ).fetchall()
+                    for post_id, text_hash, vader, finbert in rows:
+                        if hashes[post_id] == text_hash:
+                            found[(source, post_id)] = (vader, finbert)
+        return found
+
+    def put_many(self, model_version: str, rows: Iterable[Tuple[str, str, str, float, float]]):
+        """Upsert ``(source, post_id, text_hash, vader, finbert)`` rows in one transaction."""
+        now = time.time()
+        params = [(source, post_id, model_version, text_hash, vader, finbert, now)
+                  for source, post_id, text_hash, vader, finbert in rows]
+        if not params:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO post_scores VALUES (?, ?, ?, ?, ?, ?, ?)", params)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM post_scores").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[ScoreStore] = None
+_store_lock = threading.Lock()
+
+
+def get_score_store() -> Optional[ScoreStore]:
+    """Process-wide store, or None when ``SCORE_STORE_PATH`` is empty or unusable."""
+    global _store
+    path = get_settings().score_store_path
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != path:
+            try:
+                _store = ScoreStore(path)
+            except sqlite3.Error as e:
+                logger.warning(f"Score store at {path} unavailable, scoring without it: {e}")
+                return None
+        return _store
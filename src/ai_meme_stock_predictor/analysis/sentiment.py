@@ -1,6 +1,16 @@
-from typing import List
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import hashlib
+import importlib.metadata
+import multiprocessing
 import os
+import threading
+from cachetools import LRUCache
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from .batching import MicroBatcher
+from .finbert_backends import label_score, load_backend
+from ..utils.config import get_settings
 from ..utils.logging_setup import get_logger
 
 _ENABLE_FINBERT = os.getenv("ENABLE_FINBERT", "0").lower() in {"1", "true", "yes"}
@@ -8,8 +18,40 @@ _ENABLE_FINBERT = os.getenv("ENABLE_FINBERT", "0").lower() in {"1", "true", "yes
 logger = get_logger(__name__)
 
 _vader = SentimentIntensityAnalyzer()
+try:
+    _VADER_VERSION = importlib.metadata.version("vaderSentiment")
+except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+    _VADER_VERSION = "unknown"
 _finbert = None  # lazy-loaded
 
+# VADER memo keyed by content hash, so repeated titles/tweets are scored once
+_vader_cache: LRUCache = LRUCache(get_settings().sentiment_cache_size)
+_vader_lock = threading.Lock()
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+_finbert_batcher: Optional[MicroBatcher] = None
+_finbert_batcher_lock = threading.Lock()
+
+def _limit_torch_threads():
+    """Cap intra-op threads so several workers per host don't oversubscribe cores."""
+    threads = get_settings().finbert_num_threads
+    if not threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:  # pragma: no cover
+        pass
+
+
+def _inference_mode():
+    try:
+        import torch
+        return torch.inference_mode()
+    except ImportError:
+        return contextlib.nullcontext()
+
+
 def _load_finbert():  # pragma: no cover - heavy download
     global _finbert
     if _finbert is not None:
@@ -17,29 +59,165 @@ def _load_finbert():  # pragma: no cover - heavy download
     if not _ENABLE_FINBERT:
         logger.info("FinBERT disabled (set ENABLE_FINBERT=1 to enable). Returning neutral scores.")
         return None
+    settings = get_settings()
     try:
-        from transformers import pipeline  # local import to avoid import cost if disabled
-        logger.info("Loading FinBERT sentiment model ... this may take a while the first time.")
-        _finbert = pipeline("text-classification", model="yiyanghkust/finbert-tone", top_k=None)
+        _limit_torch_threads()
+        logger.info(f"Loading FinBERT sentiment model ({settings.finbert_backend} backend) ... this may take a while the first time.")
+        _finbert = load_backend(settings.finbert_backend, settings.finbert_model,
+                                settings.finbert_onnx_path, settings.finbert_num_threads)
     except Exception as e:  # pragma: no cover
         logger.warning(f"FinBERT pipeline load failed: {e}")
         _finbert = None
     return _finbert
 
 
+def model_version() -> str:
+    """Identifies the models behind a score; persisted scores are only reused on a match."""
+    settings = get_settings()
+    if _load_finbert() is None:
+        finbert = "off"
+    else:
+        finbert = f"{settings.finbert_backend}:{settings.finbert_model}:{settings.finbert_long_text}:{settings.finbert_max_length}"
+    return f"vader={_VADER_VERSION};finbert={finbert}"
+
+
 def vader_compound(text: str) -> float:
     return _vader.polarity_scores(text).get('compound', 0.0)
 
 
+def scoring_text(item: Dict, source: str) -> str:
+    """Text an item is scored and persisted under; every scoring path must build it here."""
+    if source == 'twitter':
+        return item.get('text') or ''
+    return (item.get('title') or '') + ' ' + (item.get('selftext') or '')
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _vader_chunk(texts: List[str]) -> List[float]:
+    return [vader_compound(t) for t in texts]
+
+
+def _process_workers() -> int:
+    return get_settings().sentiment_processes or os.cpu_count() or 1
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    # Batch threads and to_thread callers may score concurrently; only one pool may be spawned
+    with _process_pool_lock:
+        if _process_pool is None:
+            workers = _process_workers()
+            # spawn: forking a process that already runs cache/log threads can deadlock
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+def _score_misses(texts: List[str]) -> List[float]:
+    settings = get_settings()
+    if len(texts) < settings.sentiment_process_threshold:
+        return _vader_chunk(texts)
+    pool = _get_process_pool()
+    chunk = max(1, -(-len(texts) // (_process_workers() * 4)))
+    scores: List[float] = []
+    for part in pool.map(_vader_chunk, [texts[i:i + chunk] for i in range(0, len(texts), chunk)]):
+        scores.extend(part)
+    return scores
+
+
+def vader_batch(texts: List[str]) -> List[float]:
+    """VADER compound scores for ``texts``, in order.
+
+    Identical texts are scored once and results are kept in a bounded LRU,
+    so cost follows new text rather than query volume. Batches with at least
+    ``SENTIMENT_PROCESS_THRESHOLD`` unseen texts fan out over a process pool.
+    """
+    keys = [text_key(t) for t in texts]
+    scores: Dict[bytes, float] = {}
+    with _vader_lock:
+        for k in keys:
+            v = _vader_cache.get(k)
+            if v is not None:
+                scores[k] = v
+    misses = {k: t for k, t in zip(keys, texts) if k not in scores}
+    if misses:
+        miss_keys = list(misses)
+        fresh = _score_misses([misses[k] for k in miss_keys])
+        with _vader_lock:
+            for k, v in zip(miss_keys, fresh):
+                _vader_cache[k] = v
+                scores[k] = v
+    return [scores[k] for k in keys]
+
+
+def _split_long(tokenizer, text: str, max_length: int) -> List[str]:
+    """Split ``text`` into pieces that fit the model window (minus [CLS]/[SEP])."""
+    body = max(1, max_length - 2)
+    # Every wordpiece spans at least one character, so short texts can skip tokenizing
+    if len(text) <= body:
+        return [text]
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    if len(ids) <= body:
+        return [text]
+    return [tokenizer.decode(ids[i:i + body]) for i in range(0, len(ids), body)]
+
+
 def finbert_scores(texts: List[str]) -> List[float]:
+    """FinBERT positive-minus-negative score per text (0.0 when disabled).
+
+    With ``FINBERT_MICROBATCH_WAIT_MS`` > 0, texts from concurrent callers
+    are merged into shared forward passes by a :class:`MicroBatcher`.
+    """
     fb = _load_finbert()
     if fb is None:
         return [0.0 for _ in texts]
-    outputs = fb(texts)
-    scores = []
-    for out in outputs:
-        # out is a list of dicts with label & score
-        pos = next((d['score'] for d in out if d['label'].lower() == 'positive'), 0)
-        neg = next((d['score'] for d in out if d['label'].lower() == 'negative'), 0)
-        scores.append(pos - neg)
-    return scores
+    if get_settings().finbert_microbatch_wait_ms > 0:
+        return _get_finbert_batcher().submit(texts)
+    return _finbert_forward(texts)
+
+
+def _get_finbert_batcher() -> MicroBatcher:
+    global _finbert_batcher
+    with _finbert_batcher_lock:
+        if _finbert_batcher is None:
+            settings = get_settings()
+            _finbert_batcher = MicroBatcher(
+                _finbert_forward,
+                max_batch_size=settings.finbert_microbatch_max_size,
+                max_wait_ms=settings.finbert_microbatch_wait_ms,
+                name="finbert-batcher",
+            )
+    return _finbert_batcher
+
+
+def _finbert_forward(texts: List[str]) -> List[float]:
+    """Score ``texts`` with the loaded pipeline in one bucketed pass.
+
+    Long posts are either chunked to the model window and averaged
+    (``FINBERT_LONG_TEXT=chunk``) or truncated. Inputs are sorted by length
+    before batching so each batch pads to similar lengths, then restored.
+    """
+    fb = _load_finbert()
+    settings = get_settings()
+    max_length = settings.finbert_max_length
+
+    pieces: List[str] = []
+    owners: List[int] = []
+    for i, text in enumerate(texts):
+        parts = _split_long(fb.tokenizer, text, max_length) if settings.finbert_long_text == "chunk" else [text]
+        pieces.extend(parts)
+        owners.extend([i] * len(parts))
+
+    order = sorted(range(len(pieces)), key=lambda j: len(pieces[j]))
+    with _inference_mode():
+        outputs = fb([pieces[j] for j in order], batch_size=settings.finbert_batch_size,
+                     truncation=True, max_length=max_length)
+
+    sums = [0.0] * len(texts)
+    counts = [0] * len(texts)
+    for j, out in zip(order, outputs):
+        sums[owners[j]] += label_score(out)
+        counts[owners[j]] += 1
+    return [s / c if c else 0.0 for s, c in zip(sums, counts)]
@@ -0,0 +1,127 @@
+"""Shared keep-alive HTTP clients for the data-source layer.
+
+Every source goes through one pooled ``requests.Session`` (sync) or one
+``httpx.AsyncClient`` per event loop (async), so DNS/TCP/TLS setup is paid
+once per connection instead of once per call. Both retry idempotent requests
+on timeouts and 5xx responses with jittered exponential backoff.
+"""
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import random
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with additive jitter for retry ``attempt`` (0-based)."""
+    settings = get_settings()
+    return settings.http_backoff_factor * (2 ** attempt) + random.uniform(0, settings.http_backoff_jitter)
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use.
+
+    ``pool_maxsize`` with ``pool_block`` caps concurrent connections per host;
+    ``pool_connections`` is the number of distinct host pools kept alive.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            settings = get_settings()
+            retry = Retry(
+                total=settings.http_max_retries,
+                connect=settings.http_max_retries,
+                read=settings.http_max_retries,
+                status=settings.http_max_retries,
+                backoff_factor=settings.http_backoff_factor,
+                backoff_jitter=settings.http_backoff_jitter,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=settings.http_pool_connections,
+                pool_maxsize=settings.http_pool_maxsize,
+                pool_block=True,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared ``httpx.AsyncClient`` for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        settings = get_settings()
+        limits = httpx.Limits(
+            max_connections=settings.http_pool_connections * settings.http_pool_maxsize,
+            max_keepalive_connections=settings.http_pool_maxsize,
+        )
+        client = httpx.AsyncClient(limits=limits)
+        _async_clients[loop] = client
+    return client
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    per_loop = _host_semaphores.setdefault(loop, {})
+    host = urlsplit(url).netloc
+    sem = per_loop.get(host)
+    if sem is None:
+        sem = per_loop[host] = asyncio.Semaphore(get_settings().http_pool_maxsize)
+    return sem
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    """GET through the shared async client with per-host limits and retries.
+
+    Timeouts and 5xx responses are retried up to ``HTTP_MAX_RETRIES`` times;
+    the last response (or exception) is returned/raised to the caller.
+    """
+    settings = get_settings()
+    client = get_async_client()
+    async with _host_semaphore(url):
+        for attempt in range(settings.http_max_retries + 1):
+            last_attempt = attempt == settings.http_max_retries
+            try:
+                r = await client.get(url, **kwargs)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last_attempt:
+                    raise
+                logger.debug(f"GET {url} failed ({e}); retrying")
+            else:
+                if r.status_code not in RETRY_STATUSES or last_attempt:
+                    return r
+                logger.debug(f"GET {url} returned {r.status_code}; retrying")
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+async def close_async_client():
+    """Close the shared async client bound to the running loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
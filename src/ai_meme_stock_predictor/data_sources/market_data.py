@@ -1,11 +1,194 @@
-from typing import Dict, List
-import requests
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+import asyncio
+import threading
+import numpy as np
+from .http_client import aget, get_session
+from .price_store import PriceStore, bars_to_rows, get_price_store, last_complete_session, rows_to_bars
+from .ticker_universe import mark_unknown
+from ..utils.cache import FRESH, SourceCache, Uncached, get_cache, is_market_open, seconds_until_market_close
 from ..utils.config import settings
 from ..utils.logging_setup import get_logger
+from ..utils.rate_budget import BACKGROUND, INTERACTIVE, TokenBucket
 
 logger = get_logger(__name__)
 
 ALPHA_URL = "https://www.alphavantage.co/query"
+# Rows in an outputsize=compact daily series; cached whole, sliced per caller
+HISTORY_ROWS = 100
+
+_budget: Optional[TokenBucket] = None
+_budget_lock = threading.Lock()
+
+
+def alpha_budget() -> TokenBucket:
+    """Process-wide Alpha Vantage call budget shared by the sync and async clients."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = TokenBucket(
+                settings.alphavantage_calls_per_minute,
+                settings.alphavantage_burst,
+                {INTERACTIVE: settings.alphavantage_interactive_wait, BACKGROUND: settings.alphavantage_background_wait},
+            )
+        return _budget
+
+
+def _quote_cache() -> SourceCache:
+    return get_cache("quote", ttl=lambda: settings.cache_quote_ttl)
+
+
+def _history_cache() -> SourceCache:
+    # Daily bars only change once the session closes
+    return get_cache("history", ttl=seconds_until_market_close)
+
+
+def _store_refresh_cache() -> SourceCache:
+    # One delta fetch per symbol per session once the session's bar is stored
+    return get_cache("history_store", ttl=seconds_until_market_close)
+
+
+def _store_retry_cache() -> SourceCache:
+    # Delta fetches that came back without the session's bar (not yet published, or a
+    # holiday) are retried after PRICE_STORE_RETRY_SECONDS rather than on every query
+    return get_cache("history_store_retry", ttl=lambda: settings.price_store_retry_seconds, stale_ttl=0)
+
+
+def _needs_delta(store: PriceStore, symbol: str) -> bool:
+    if store.is_current(symbol):
+        return False
+    return _store_retry_cache().lookup(symbol.upper())[1] != FRESH
+
+
+async def _aneeds_delta(store: PriceStore, symbol: str) -> bool:
+    """:func:`_needs_delta` with the file and cache reads kept off the event loop."""
+    if await asyncio.to_thread(store.is_current, symbol):
+        return False
+    return (await _store_retry_cache().alookup(symbol.upper()))[1] != FRESH
+
+
+def _quote_params(symbol: str, api_key: str) -> Dict:
+    return {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": api_key}
+
+
+def _history_params(symbol: str, api_key: str) -> Dict:
+    return {"function": "TIME_SERIES_DAILY_ADJUSTED", "symbol": symbol, "apikey": api_key, "outputsize": "compact"}
+
+
+def _parse_quote(payload: Dict, symbol: str = "") -> Dict:
+    data = payload.get("Global Quote", {})
+    if not data:
+        # An empty "Global Quote" means no such symbol; throttling sends "Note"/"Information" instead
+        if symbol and "Global Quote" in payload:
+            mark_unknown(symbol)
+        return {}
+    return {
+        "symbol": data.get("01. symbol"),
+        "price": float(data.get("05. price", 0) or 0),
+        "change_percent": data.get("10. change percent"),
+        "volume": int(float(data.get("06. volume", 0) or 0)),
+    }
+
+
+def _derive_quote(symbol: str, bars: np.ndarray) -> Dict:
+    """Quote built from the latest daily bar, saving a GLOBAL_QUOTE call."""
+    if not len(bars):
+        return {}
+    close = float(bars['close'][-1])
+    prev_close = float(bars['close'][-2]) if len(bars) > 1 else 0
+    change = (close - prev_close) / prev_close * 100 if prev_close else 0.0
+    return {
+        "symbol": symbol.upper(),
+        "price": close,
+        "change_percent": f"{change:.4f}%",
+        "volume": int(bars['volume'][-1]),
+        "as_of": str(bars['date'][-1]),
+    }
+
+
+def _session_quote(symbol: str, bars: np.ndarray) -> Dict:
+    """:func:`_derive_quote`, but only when the last bar is the last completed session.
+
+    An older last bar (delta fetch denied by the budget, or the session's bar
+    not published yet) would otherwise be cached as a fresh quote.
+    """
+    if not len(bars) or bars['date'][-1].item() != last_complete_session():
+        return {}
+    return _derive_quote(symbol, bars)
+
+
+def _stored_bars(symbol: str) -> np.ndarray:
+    """Bars already on hand (local store or memory cache), without a network call."""
+    store = get_price_store()
+    if store is not None:
+        return store.bars(symbol)
+    return rows_to_bars(_history_cache().peek(symbol.upper()) or [])
+
+
+def _cached_quote(symbol: str) -> Uncached:
+    """Best data on hand when the call budget is exhausted: last quote, else one derived from history.
+
+    Wrapped in :class:`Uncached` so the fallback is not re-stored as fresh.
+    """
+    logger.warning(f"Alpha Vantage budget exhausted; serving cached data for {symbol.upper()}")
+    return Uncached(_quote_cache().peek(symbol.upper()) or _derive_quote(symbol, _stored_bars(symbol)))
+
+
+def _parse_history(payload: Dict, days: int, after: Optional[date] = None,
+                   through: Optional[date] = None) -> List[Dict]:
+    """Ascending bars from a daily series, keeping only dates in ``(after, through]`` when given."""
+    data = payload.get("Time Series (Daily)", {})
+    rows = []
+    for day, vals in list(data.items())[:days]:
+        if through is not None and day > through.isoformat():
+            continue
+        if after is not None and day <= after.isoformat():
+            # The series is newest first; everything from here on is already stored
+            break
+        try:
+            rows.append({
+                "date": day,
+                "open": float(vals.get("1. open", 0) or 0),
+                "high": float(vals.get("2. high", 0) or 0),
+                "low": float(vals.get("3. low", 0) or 0),
+                "close": float(vals.get("4. close", 0) or 0),
+                "volume": int(float(vals.get("6. volume", 0) or 0))
+            })
+        except Exception:
+            continue
+    rows.sort(key=lambda x: x['date'])
+    return rows
+
+
+def _append_delta(store: PriceStore, symbol: str, rows: List[Dict]) -> Tuple[Optional[date], bool]:
+    """Append fetched ``rows``; returns the stored last date and whether the store is now current."""
+    added = store.append(symbol, rows_to_bars(rows))
+    last = store.last_date(symbol)
+    logger.info(f"Price store for {symbol.upper()}: +{added} bars, last {last}")
+    return last, store.is_current(symbol)
+
+
+def _store_delta(store: PriceStore, symbol: str, rows: Optional[List[Dict]]) -> Union[str, Uncached]:
+    """Append fetched ``rows``; the returned marker is only cached once the store is current."""
+    if rows is None:
+        return ""
+    last, current = _append_delta(store, symbol, rows)
+    if current:
+        return str(last)
+    _store_retry_cache().store(symbol.upper(), str(last or "pending"))
+    return Uncached(str(last or ""))
+
+
+async def _astore_delta(store: PriceStore, symbol: str, rows: Optional[List[Dict]]) -> Union[str, Uncached]:
+    """:func:`_store_delta` with the file writes and cache store kept off the event loop."""
+    if rows is None:
+        return ""
+    last, current = await asyncio.to_thread(_append_delta, store, symbol, rows)
+    if current:
+        return str(last)
+    await _store_retry_cache().astore(symbol.upper(), str(last or "pending"))
+    return Uncached(str(last or ""))
+
 
 class MarketData:
     def __init__(self):
@@ -16,46 +199,141 @@ class MarketData:
     def quote(self, symbol: str) -> Dict:
         if not self.api_key:
             return {}
-        params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": self.api_key}
-        r = requests.get(ALPHA_URL, params=params, timeout=10)
+        return _quote_cache().get_or_fetch(symbol.upper(), lambda: self._fetch_quote(symbol))
+
+    def _fetch_quote(self, symbol: str) -> Union[Dict, Uncached]:
+        # Outside the session the last daily close is the quote: one call instead of two
+        if not is_market_open():
+            derived = _session_quote(symbol, self.bars(symbol, days=2))
+            if derived:
+                return derived
+        if not alpha_budget().acquire():
+            return _cached_quote(symbol)
+        params = _quote_params(symbol, self.api_key)
+        try:
+            r = get_session().get(ALPHA_URL, params=params, timeout=10)
+        except Exception as e:
+            logger.error(f"AlphaVantage quote network error: {e}")
+            return {}
         if r.status_code != 200:
             logger.error(f"AlphaVantage error {r.status_code}: {r.text}")
             return {}
-        data = r.json().get("Global Quote", {})
-        return {
-            "symbol": data.get("01. symbol"),
-            "price": float(data.get("05. price", 0) or 0),
-            "change_percent": data.get("10. change percent"),
-            "volume": int(float(data.get("06. volume", 0) or 0)),
-        }
+        return _parse_quote(r.json(), symbol)
 
     def history(self, symbol: str, days: int = 30) -> List[Dict]:
         """Fetch recent daily adjusted price history (up to `days`).
         Returns list sorted ascending by date: [{date, open, high, low, close, volume}]"""
+        return bars_to_rows(self.bars(symbol, days))
+
+    def bars(self, symbol: str, days: int = 30) -> np.ndarray:
+        """Like :meth:`history` but as a :data:`.price_store.BAR_DTYPE` array (a mapped view when stored)."""
+        if not self.api_key:
+            return rows_to_bars([])
+        store = get_price_store()
+        if store is None:
+            rows = _history_cache().get_or_fetch(symbol.upper(), lambda: self._fetch_history(symbol))
+            return rows_to_bars(rows[-days:] if days else rows)
+        if _needs_delta(store, symbol):
+            _store_refresh_cache().get_or_fetch(symbol.upper(), lambda: self._update_store(store, symbol))
+        bars = store.bars(symbol)
+        return bars[-days:] if days else bars
+
+    def _fetch_history(self, symbol: str) -> Union[List[Dict], Uncached]:
+        if not alpha_budget().acquire():
+            logger.warning(f"Alpha Vantage budget exhausted; serving cached history for {symbol.upper()}")
+            return Uncached(_history_cache().peek(symbol.upper()) or [])
+        return self._download_history(symbol) or []
+
+    def _update_store(self, store: PriceStore, symbol: str) -> Union[str, Uncached]:
+        """Append the bars after the stored last date; returns the new last date ("" if nothing was fetched)."""
+        if not alpha_budget().acquire():
+            logger.warning(f"Alpha Vantage budget exhausted; serving stored history for {symbol.upper()}")
+            return ""
+        rows = self._download_history(symbol, store.last_date(symbol), last_complete_session())
+        return _store_delta(store, symbol, rows)
+
+    def _download_history(self, symbol: str, after: Optional[date] = None,
+                          through: Optional[date] = None) -> Optional[List[Dict]]:
+        params = _history_params(symbol, self.api_key)
+        try:
+            r = get_session().get(ALPHA_URL, params=params, timeout=15)
+        except Exception as e:
+            logger.error(f"AlphaVantage history network error: {e}")
+            return None
+        if r.status_code != 200:
+            logger.error(f"AlphaVantage history error {r.status_code}: {r.text[:180]}")
+            return None
+        return _parse_history(r.json(), HISTORY_ROWS, after, through)
+
+
+class AsyncMarketData:
+    """Non-blocking Alpha Vantage client for use from ``async def`` handlers."""
+
+    def __init__(self):
+        self.api_key = settings.alphavantage_api_key
+        if not self.api_key:
+            logger.warning("Alpha Vantage API key missing; market data will fail")
+
+    async def quote(self, symbol: str) -> Dict:
         if not self.api_key:
-            return []
-        params = {"function": "TIME_SERIES_DAILY_ADJUSTED", "symbol": symbol, "apikey": self.api_key, "outputsize": "compact"}
+            return {}
+        return await _quote_cache().aget_or_fetch(symbol.upper(), lambda: self._fetch_quote(symbol))
+
+    async def _fetch_quote(self, symbol: str) -> Union[Dict, Uncached]:
+        if not is_market_open():
+            derived = _session_quote(symbol, await self.bars(symbol, days=2))
+            if derived:
+                return derived
+        if not await alpha_budget().aacquire():
+            return await asyncio.to_thread(_cached_quote, symbol)
+        try:
+            r = await aget(ALPHA_URL, params=_quote_params(symbol, self.api_key), timeout=10)
+        except Exception as e:
+            logger.error(f"AlphaVantage quote network error: {e}")
+            return {}
+        if r.status_code != 200:
+            logger.error(f"AlphaVantage error {r.status_code}: {r.text}")
+            return {}
+        return _parse_quote(r.json(), symbol)
+
+    async def history(self, symbol: str, days: int = 30) -> List[Dict]:
+        return bars_to_rows(await self.bars(symbol, days))
+
+    async def bars(self, symbol: str, days: int = 30) -> np.ndarray:
+        if not self.api_key:
+            return rows_to_bars([])
+        store = get_price_store()
+        if store is None:
+            rows = await _history_cache().aget_or_fetch(symbol.upper(), lambda: self._fetch_history(symbol))
+            return rows_to_bars(rows[-days:] if days else rows)
+        # Price files and the retry marker are read and written off the event loop
+        if await _aneeds_delta(store, symbol):
+            await _store_refresh_cache().aget_or_fetch(symbol.upper(), lambda: self._update_store(store, symbol))
+        bars = await asyncio.to_thread(store.bars, symbol)
+        return bars[-days:] if days else bars
+
+    async def _fetch_history(self, symbol: str) -> Union[List[Dict], Uncached]:
+        if not await alpha_budget().aacquire():
+            logger.warning(f"Alpha Vantage budget exhausted; serving cached history for {symbol.upper()}")
+            return Uncached(_history_cache().peek(symbol.upper()) or [])
+        return await self._download_history(symbol) or []
+
+    async def _update_store(self, store: PriceStore, symbol: str) -> Union[str, Uncached]:
+        if not await alpha_budget().aacquire():
+            logger.warning(f"Alpha Vantage budget exhausted; serving stored history for {symbol.upper()}")
+            return ""
+        after = await asyncio.to_thread(store.last_date, symbol)
+        rows = await self._download_history(symbol, after, last_complete_session())
+        return await _astore_delta(store, symbol, rows)
+
+    async def _download_history(self, symbol: str, after: Optional[date] = None,
+                                through: Optional[date] = None) -> Optional[List[Dict]]:
         try:
-            r = requests.get(ALPHA_URL, params=params, timeout=15)
+            r = await aget(ALPHA_URL, params=_history_params(symbol, self.api_key), timeout=15)
         except Exception as e:
             logger.error(f"AlphaVantage history network error: {e}")
-            return []
+            return None
         if r.status_code != 200:
             logger.error(f"AlphaVantage history error {r.status_code}: {r.text[:180]}")
-            return []
-        data = r.json().get("Time Series (Daily)", {})
-        rows = []
-        for date, vals in list(data.items())[:days]:
-            try:
-                rows.append({
-                    "date": date,
-                    "open": float(vals.get("1. open", 0) or 0),
-                    "high": float(vals.get("2. high", 0) or 0),
-                    "low": float(vals.get("3. low", 0) or 0),
-                    "close": float(vals.get("4. close", 0) or 0),
-                    "volume": int(float(vals.get("6. volume", 0) or 0))
-                })
-            except Exception:
-                continue
-        rows.sort(key=lambda x: x['date'])
-        return rows
+            return None
+        return _parse_history(r.json(), HISTORY_ROWS, after, through)
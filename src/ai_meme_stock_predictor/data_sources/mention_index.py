@@ -0,0 +1,121 @@
+"""Time-bucketed inverted index from ticker to ingested posts.
+
+Each bucket (``MENTION_BUCKET_SECONDS`` wide) maps ticker -> list of
+``(created_utc, post_id)`` refs, so "how many AMC mentions per hour this
+week" is one ``len`` per bucket and "AMC posts in the last 6 h" only walks
+the buckets it needs. Buckets older than ``MENTION_RETENTION_HOURS`` are
+dropped whole, which bounds memory regardless of ingest rate.
+"""
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+from ..utils.config import get_settings
+
+Ref = Tuple[float, str]
+
+
+class MentionIndex:
+    def __init__(self, bucket_seconds: float, retention_seconds: float):
+        self.bucket_seconds = bucket_seconds
+        self.retention_buckets = max(1, int(retention_seconds // bucket_seconds))
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Dict[str, List[Ref]]] = {}
+        self._oldest: Optional[int] = None
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _cutoff(self, now: Optional[float]) -> int:
+        return self._bucket(now if now is not None else time.time()) - self.retention_buckets + 1
+
+    def _evict(self, cutoff: int):
+        # Runs once per bucket rollover and there are at most retention_buckets keys
+        for b in [b for b in self._buckets if b < cutoff]:
+            del self._buckets[b]
+        self._oldest = min(self._buckets, default=None)
+
+    def add(self, post_id: str, tickers, created_utc: float, now: Optional[float] = None):
+        with self._lock:
+            cutoff = self._cutoff(now)
+            if self._oldest is not None and self._oldest < cutoff:
+                self._evict(cutoff)
+            b = self._bucket(created_utc)
+            if b < cutoff:
+                return
+            bucket = self._buckets.setdefault(b, {})
+            for t in tickers:
+                bucket.setdefault(t.upper(), []).append((created_utc, post_id))
+            if self._oldest is None or b < self._oldest:
+                self._oldest = b
+
+    def bucket_counts(self, ticker: str, buckets: int, now: Optional[float] = None) -> List[int]:
+        """Mention counts for the last ``buckets`` buckets, oldest first (current bucket last)."""
+        ticker = ticker.upper()
+        current = self._bucket(now if now is not None else time.time())
+        with self._lock:
+            return [len(self._buckets.get(b, {}).get(ticker, ())) for b in range(current - buckets + 1, current + 1)]
+
+    def posts(self, ticker: str, since_seconds: float, limit: Optional[int] = None, now: Optional[float] = None,
+              keep: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """Newest-first post ids mentioning ``ticker`` within ``since_seconds``."""
+        ticker = ticker.upper()
+        now = now if now is not None else time.time()
+        start = now - since_seconds
+        found: List[Ref] = []
+        with self._lock:
+            for b in range(self._bucket(now), self._bucket(start) - 1, -1):
+                refs = self._buckets.get(b, {}).get(ticker)
+                if not refs:
+                    continue
+                found.extend(r for r in refs if r[0] >= start and (keep is None or keep(r[1])))
+                if limit is not None and len(found) >= limit:
+                    # Older buckets cannot contain anything newer than what we have
+                    break
+        found.sort(reverse=True)
+        return [post_id for _, post_id in found[:limit]]
+
+    def count(self, ticker: str, since_seconds: float, now: Optional[float] = None) -> int:
+        """Mentions within ``since_seconds``; full buckets are O(1), only the edge bucket is scanned."""
+        ticker = ticker.upper()
+        now = now if now is not None else time.time()
+        start = now - since_seconds
+        first = self._bucket(start)
+        with self._lock:
+            total = sum(len(self._buckets.get(b, {}).get(ticker, ())) for b in range(first + 1, self._bucket(now) + 1))
+            total += sum(1 for ts, _ in self._buckets.get(first, {}).get(ticker, ()) if ts >= start)
+        return total
+
+    def trending(self, since_seconds: float, top: int = 10, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Most-mentioned tickers over the last ``since_seconds`` (bucket-aligned)."""
+        now = now if now is not None else time.time()
+        counts: Counter = Counter()
+        with self._lock:
+            for b in range(self._bucket(now - since_seconds), self._bucket(now) + 1):
+                for ticker, refs in self._buckets.get(b, {}).items():
+                    counts[ticker] += len(refs)
+        return counts.most_common(top)
+
+
+_index: Optional[MentionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_mention_index() -> MentionIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            settings = get_settings()
+            _index = MentionIndex(settings.mention_bucket_seconds, settings.mention_retention_hours * 3600)
+        return _index
+
+
+def mention_features(ticker: str) -> Dict[str, int]:
+    """Mention velocity for ``build_features``; empty unless the subreddit stream is feeding the index."""
+    if not get_settings().reddit_stream_enabled:
+        return {}
+    index = get_mention_index()
+    return {
+        "mentions_1h": index.count(ticker, 3600),
+        "mentions_24h": index.count(ticker, 24 * 3600),
+    }
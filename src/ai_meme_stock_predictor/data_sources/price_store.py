@@ -0,0 +1,134 @@
+"""Local daily OHLCV store, one memory-mapped numpy file per symbol.
+
+Each ``<PRICE_STORE_PATH>/<SYMBOL>.npy`` holds a structured array of
+completed daily bars (:data:`BAR_DTYPE`), ascending by date. Reads are
+``np.load(mmap_mode="r")`` views, so slicing the last 20 closes copies
+nothing. A refresh only appends the bars after the stored last date.
+Today's bar is not stored until the session has closed, so a partial
+intraday bar is never kept as final. Files are replaced atomically, so
+readers holding an old map keep seeing a consistent array.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import os
+import threading
+import numpy as np
+from cachetools import LRUCache
+from ..utils.cache import MARKET_CLOSE_HOUR, MARKET_TZ
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+])
+_EMPTY = np.empty(0, dtype=BAR_DTYPE)
+
+
+def last_complete_session(now: Optional[datetime] = None) -> date:
+    """Date of the most recent weekday session that has closed (holidays ignored)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = now.date() if now.hour >= MARKET_CLOSE_HOUR else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def rows_to_bars(rows: List[Dict]) -> np.ndarray:
+    """Ascending ``[{date, open, high, low, close, volume}]`` rows as a :data:`BAR_DTYPE` array."""
+    return np.array([(r["date"], r["open"], r["high"], r["low"], r["close"], r["volume"]) for r in rows],
+                    dtype=BAR_DTYPE)
+
+
+def bars_to_rows(bars: np.ndarray) -> List[Dict]:
+    return [
+        {"date": str(b["date"]), "open": float(b["open"]), "high": float(b["high"]), "low": float(b["low"]),
+         "close": float(b["close"]), "volume": int(b["volume"])}
+        for b in bars
+    ]
+
+
+class PriceStore:
+    def __init__(self, root: str, max_open: int = 64):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # symbol -> ((mtime_ns, size), mapped array); each map holds a file
+        # descriptor, so only the most recently read symbols stay open
+        self._maps: LRUCache = LRUCache(max(1, max_open))
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}.npy")
+
+    def _read(self, symbol: str) -> np.ndarray:
+        path = self._path(symbol)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else _EMPTY
+
+    def bars(self, symbol: str) -> np.ndarray:
+        """Read-only mapped bars for ``symbol``, oldest first (empty if none are stored)."""
+        path = self._path(symbol)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return _EMPTY
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._maps.get(symbol.upper())
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        try:
+            bars = self._read(symbol)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable price file {path}: {e}")
+            return _EMPTY
+        with self._lock:
+            self._maps[symbol.upper()] = (stamp, bars)
+        return bars
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        bars = self.bars(symbol)
+        return bars["date"][-1].item() if len(bars) else None
+
+    def is_current(self, symbol: str, now: Optional[datetime] = None) -> bool:
+        """True when the last completed session is already stored, so no fetch is needed."""
+        last = self.last_date(symbol)
+        return last is not None and last >= last_complete_session(now)
+
+    def append(self, symbol: str, new_bars: np.ndarray) -> int:
+        """Merge ``new_bars`` after the stored ones (newer dates win); returns the net bars added."""
+        if not len(new_bars):
+            return 0
+        with self._lock:
+            old = self._read(symbol)
+            new_bars = np.sort(new_bars, order="date")
+            keep = old[old["date"] < new_bars["date"][0]] if len(old) else old
+            merged = np.concatenate([keep, new_bars]).astype(BAR_DTYPE)
+            path = self._path(symbol)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, merged)
+            os.replace(tmp, path)
+            self._maps.pop(symbol.upper(), None)
+        return len(merged) - len(old)
+
+
+_store: Optional[PriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_price_store() -> Optional[PriceStore]:
+    """Process-wide store, or None when ``PRICE_STORE_PATH`` is empty."""
+    global _store
+    path = get_settings().price_store_path
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != path:
+            _store = PriceStore(path, get_settings().price_store_max_open)
+        return _store
@@ -0,0 +1,128 @@
+"""Bounded, concurrent comment fetch for the busiest search results.
+
+Most of the sentiment on WSB sits in comments, but PRAW's ``replace_more``
+expands every "load more comments" stub with one request each. Instead, the
+top ``REDDIT_COMMENT_THREADS`` threads (by comment count) are walked
+concurrently on a small process-wide pool. PRAW is not thread-safe, so each
+pool thread walks with its own client. The walk reads at most ``REDDIT_COMMENTS_MAX`` comments per ticker and
+follows replies down to ``REDDIT_COMMENT_DEPTH``. ``MoreComments`` stubs are
+only expanded above ``REDDIT_COMMENT_MORE_DEPTH`` and while the
+``REDDIT_COMMENT_BUDGET`` time budget lasts. Sentiment is left to
+``build_features``, so the walk spends its budget on fetching only.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import Callable, Dict, List, Optional
+import threading
+import time
+from praw.models import MoreComments
+from ..utils.config import settings
+from ..utils.logging_setup import get_logger
+from ..utils.posts import comment_to_dict
+
+logger = get_logger(__name__)
+
+_REMOVED = frozenset({"[deleted]", "[removed]"})
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Each pool thread's own PRAW client; a Reddit instance must not be shared across threads
+_local = threading.local()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, settings.reddit_comment_workers),
+                                       thread_name_prefix="reddit-comments")
+    return _pool
+
+
+def _thread_client(make_client: Callable[[], object]):
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = make_client()
+    return client
+
+
+class _Quota:
+    """Comment allowance shared by the threads walking one ticker's results."""
+
+    def __init__(self, total: int):
+        self._left = total
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self._left <= 0:
+                return False
+            self._left -= 1
+            return True
+
+
+def _walk(submission, quota: _Quota, deadline: float, max_depth: int, more_depth: int) -> List[Dict]:
+    """Breadth-first comments of one thread, stopping at the quota, depth or deadline."""
+    comments = []
+    queue = deque((c, 0) for c in submission.comments)
+    while queue and time.monotonic() < deadline:
+        node, depth = queue.popleft()
+        if isinstance(node, MoreComments):
+            if depth < more_depth:
+                try:
+                    # update=True attaches the submission to nested stubs so they can expand too
+                    queue.extend((c, depth) for c in node.comments())
+                except Exception as e:
+                    logger.warning(f"Skipping a 'more comments' stub: {e}")
+            continue
+        if node.body in _REMOVED:
+            continue
+        if not quota.take():
+            break
+        comments.append(comment_to_dict(node))
+        if depth + 1 < max_depth:
+            queue.extend((r, depth + 1) for r in node.replies)
+    return comments
+
+
+def _top_threads(posts: List[Dict], n: int) -> List[Dict]:
+    threads = [p for p in posts if p.get('kind') != 'comment' and p.get('num_comments')]
+    return sorted(threads, key=lambda p: p['num_comments'], reverse=True)[:n]
+
+
+def fetch_comments(make_client: Callable[[], object], posts: List[Dict]) -> List[Dict]:
+    """Comments from the most-discussed of ``posts``, in the order their threads finished.
+
+    ``make_client`` builds a PRAW client; it is called once per pool thread.
+    """
+    threads = _top_threads(posts, settings.reddit_comment_threads)
+    if not threads or settings.reddit_comments_max <= 0:
+        return []
+    quota = _Quota(settings.reddit_comments_max)
+    started = time.monotonic()
+    deadline = started + settings.reddit_comment_budget
+
+    def load(post: Dict) -> List[Dict]:
+        submission = _thread_client(make_client).submission(id=post['id'])
+        submission.comment_sort = "top"
+        submission.comment_limit = settings.reddit_comments_max
+        return _walk(submission, quota, deadline, settings.reddit_comment_depth,
+                     settings.reddit_comment_more_depth)
+
+    comments: List[Dict] = []
+    futures = [_get_pool().submit(load, post) for post in threads]
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            try:
+                comments.extend(future.result())
+            except Exception as e:
+                logger.warning(f"Reddit comment fetch failed: {e}")
+    except FutureTimeout:
+        logger.info(f"Reddit comment budget spent; continuing with {len(comments)} comments")
+    finally:
+        # Walks already running stop at the deadline; queued ones are dropped
+        for future in futures:
+            future.cancel()
+    logger.info(f"Reddit fetched {len(comments)} comments from {len(threads)} threads "
+                f"in {time.monotonic() - started:.2f}s")
+    return comments
@@ -1,47 +1,170 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
+import asyncio
 import praw
+import time
 import warnings
+from .reddit_comments import fetch_comments
+from .reddit_stream import ensure_ingestor, stream_mentions
+from ..utils.cache import SourceCache, get_cache
 from ..utils.config import settings
 from ..utils.logging_setup import get_logger
+from ..utils.posts import submission_to_dict
+
+try:
+    import asyncpraw
+    ASYNCPRAW_AVAILABLE = True
+except ImportError:
+    ASYNCPRAW_AVAILABLE = False
 
 # Suppress PRAW async warnings since we handle it properly
 warnings.filterwarnings("ignore", message="It appears that you are using PRAW in an asynchronous environment")
 
 logger = get_logger(__name__)
 
+
+def _mentions_cache() -> SourceCache:
+    return get_cache("reddit", ttl=lambda: settings.cache_mentions_ttl)
+
+
+# Smallest search time_filter that still covers a cutoff of that many hours
+_TIME_FILTERS = ((1, "hour"), (24, "day"), (24 * 7, "week"), (24 * 31, "month"), (24 * 366, "year"))
+
+
+def _multireddit() -> str:
+    """``REDDIT_SEARCH_SUBREDDITS`` as one ``a+b+c`` multireddit, searched in a single request."""
+    names = [s.strip() for s in settings.reddit_search_subreddits.split(",") if s.strip()]
+    return "+".join(dict.fromkeys(names)) or "wallstreetbets"
+
+
+def _time_filter(hours: float) -> str:
+    if hours <= 0:
+        return "all"
+    return next((name for limit, name in _TIME_FILTERS if hours <= limit), "all")
+
+
+class _PostCollector:
+    """Newest-first search results, deduped by post id and cut off at ``REDDIT_SEARCH_HOURS``.
+
+    Listings are paged lazily, so stopping at the first post older than the
+    cutoff means older pages are never requested.
+    """
+
+    def __init__(self, limit: int, hours: float, now: Optional[float] = None):
+        self.limit = limit
+        self.cutoff = (now if now is not None else time.time()) - hours * 3600 if hours > 0 else None
+        self.posts: List[Dict] = []
+        self._seen: Set[str] = set()
+
+    def add(self, submission) -> bool:
+        """Keep ``submission`` if new; False once nothing further is wanted."""
+        post = submission_to_dict(submission)
+        if self.cutoff is not None and post['created_utc'] < self.cutoff:
+            return False
+        if post['id'] not in self._seen:
+            self._seen.add(post['id'])
+            self.posts.append(post)
+        return len(self.posts) < self.limit
+
+
+def _search_kwargs(limit: int) -> Dict:
+    return {"limit": limit, "sort": "new", "time_filter": _time_filter(settings.reddit_search_hours)}
+
+
+def _praw_client() -> praw.Reddit:
+    return praw.Reddit(
+        client_id=settings.reddit_client_id,
+        client_secret=settings.reddit_client_secret,
+        user_agent=settings.reddit_user_agent,
+    )
+
+
+def _with_comments(posts: List[Dict]) -> List[Dict]:
+    """``posts`` plus comments from the busiest threads, when ``REDDIT_COMMENTS_ENABLED`` is set."""
+    if not settings.reddit_comments_enabled or not posts:
+        return posts
+    return posts + fetch_comments(_praw_client, posts)
+
+
 class RedditSource:
     def __init__(self):
         if not settings.reddit_client_id:
             logger.warning("Reddit credentials missing; RedditSource disabled")
             self._client = None
         else:
-            self._client = praw.Reddit(
+            self._client = _praw_client()
+        ensure_ingestor(self._client)
+
+    def fetch_mentions(self, ticker: str, limit: int = 50) -> List[Dict]:
+        if not self._client:
+            logger.warning("Reddit client not configured")
+            return []
+        posts = stream_mentions(ticker, limit)
+        if posts is not None:
+            return posts
+        return _mentions_cache().get_or_fetch((ticker.upper(), limit), lambda: self._search(ticker, limit))
+
+    def _search(self, ticker: str, limit: int) -> List[Dict]:
+        try:
+            collector = _PostCollector(limit, settings.reddit_search_hours)
+            for s in self._client.subreddit(_multireddit()).search(f"{ticker}", **_search_kwargs(limit)):
+                if not collector.add(s):
+                    break
+            logger.info(f"Reddit fetched {len(collector.posts)} posts for {ticker}")
+            return _with_comments(collector.posts)
+        except Exception as e:
+            logger.error(f"Reddit API error for {ticker}: {e}")
+            return []
+
+
+class AsyncRedditSource:
+    """asyncpraw-backed variant of :class:`RedditSource`.
+
+    The asyncpraw client binds to the running event loop, so it is created
+    lazily on first use rather than in ``__init__``. The comment walk is
+    blocking PRAW code, so it runs in a worker thread on sync clients of its own.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._enabled = bool(settings.reddit_client_id) and ASYNCPRAW_AVAILABLE
+        if not settings.reddit_client_id:
+            logger.warning("Reddit credentials missing; AsyncRedditSource disabled")
+        elif not ASYNCPRAW_AVAILABLE:
+            logger.warning("asyncpraw not installed; AsyncRedditSource disabled")
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = asyncpraw.Reddit(
                 client_id=settings.reddit_client_id,
                 client_secret=settings.reddit_client_secret,
                 user_agent=settings.reddit_user_agent,
             )
+        return self._client
 
-    def fetch_mentions(self, ticker: str, limit: int = 50) -> List[Dict]:
-        if not self._client:
-            logger.warning("Reddit client not configured")
+    async def fetch_mentions(self, ticker: str, limit: int = 50) -> List[Dict]:
+        if not self._enabled:
             return []
-        
+        posts = stream_mentions(ticker, limit)
+        if posts is not None:
+            return posts
+        return await _mentions_cache().aget_or_fetch((ticker.upper(), limit), lambda: self._search(ticker, limit))
+
+    async def _search(self, ticker: str, limit: int) -> List[Dict]:
         try:
-            query = f"{ticker}"
-            submissions = self._client.subreddit("wallstreetbets").search(query, limit=limit, sort="new")
-            results = []
-            for s in submissions:
-                results.append({
-                    "id": s.id,
-                    "title": s.title,
-                    "selftext": s.selftext,
-                    "score": s.score,
-                    "num_comments": s.num_comments,
-                    "created_utc": s.created_utc,
-                    "url": s.url,
-                })
-            logger.info(f"Reddit fetched {len(results)} posts for {ticker}")
-            return results
+            subreddit = await self._get_client().subreddit(_multireddit())
+            collector = _PostCollector(limit, settings.reddit_search_hours)
+            async for s in subreddit.search(f"{ticker}", **_search_kwargs(limit)):
+                if not collector.add(s):
+                    break
+            logger.info(f"Reddit fetched {len(collector.posts)} posts for {ticker}")
+            if not settings.reddit_comments_enabled:
+                return collector.posts
+            return await asyncio.to_thread(_with_comments, collector.posts)
         except Exception as e:
             logger.error(f"Reddit API error for {ticker}: {e}")
             return []
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
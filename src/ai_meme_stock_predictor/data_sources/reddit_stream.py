@@ -0,0 +1,200 @@
+"""Continuous subreddit ingestion.
+
+Instead of one Reddit search per ticker query, a background thread streams
+new submissions (and optionally comments) from ``REDDIT_STREAM_SUBREDDITS``
+once, tags each with the tickers it mentions and keeps them in a rolling
+in-memory window. Once the stream has been live for a whole window,
+:class:`.reddit_source.RedditSource` serves queries from it and the hot path
+makes no Reddit API calls for tickers the window has seen. Before that (the
+backfill is only the last ~100 submissions), or for tickers it has no posts
+for, queries still go to search.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+import re
+import threading
+import time
+from .mention_index import MentionIndex, get_mention_index
+from .ticker_universe import get_universe
+from ..utils.config import settings
+from ..utils.logging_setup import get_logger
+from ..utils.posts import comment_to_dict, submission_to_dict
+
+logger = get_logger(__name__)
+
+CASHTAG_PATTERN = re.compile(r"\$([A-Za-z]{1,5})\b")
+UPPER_WORD_PATTERN = re.compile(r"\b[A-Z]{2,5}\b")
+
+# All-caps words that are common on WSB but are not tickers worth tracking
+COMMON_WORDS = frozenset({
+    "AI", "ALL", "AM", "AN", "AND", "ARE", "AT", "ATH", "BE", "BUY", "CEO", "CFO", "DD", "DO", "EOD",
+    "EPS", "ETF", "FD", "FOMO", "FOR", "GDP", "GO", "HODL", "I", "IF", "IMO", "IN", "IPO", "IS", "IT",
+    "ITM", "LOL", "ME", "MY", "NO", "NOT", "NOW", "OF", "OK", "ON", "OR", "OTM", "PM", "PT", "SEC",
+    "SO", "THE", "TO", "UP", "US", "USA", "USD", "WSB", "YOLO", "YOU",
+})
+
+
+def extract_tickers(text: str) -> Set[str]:
+    """Cashtags (any case) plus bare all-caps words that are not common WSB jargon.
+
+    When a ticker universe is loaded, only listed symbols are kept.
+    """
+    tickers = {m.upper() for m in CASHTAG_PATTERN.findall(text)}
+    tickers.update(w for w in UPPER_WORD_PATTERN.findall(text) if w not in COMMON_WORDS)
+    universe = get_universe()
+    if len(universe):
+        tickers = {t for t in tickers if t in universe}
+    return tickers
+
+
+class PostWindow:
+    """Rolling window of ingested post payloads, looked up through a :class:`MentionIndex`.
+
+    Payloads are evicted once older than ``window_seconds`` or when more than
+    ``max_posts`` are held, oldest first. The index keeps its own (longer)
+    retention for mention counts.
+    """
+
+    def __init__(self, window_seconds: float, max_posts: int, index: Optional[MentionIndex] = None):
+        self.window_seconds = window_seconds
+        self.max_posts = max(1, max_posts)
+        self.index = index or get_mention_index()
+        self._lock = threading.Lock()
+        self._posts: Dict[str, Dict] = {}
+        self._order: Deque[Tuple[float, str]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def add(self, post: Dict, tickers: Iterable[str], now: Optional[float] = None) -> bool:
+        tickers = set(tickers)
+        if not tickers:
+            return False
+        now = now if now is not None else time.time()
+        created = post.get('created_utc') or now
+        with self._lock:
+            if post['id'] in self._posts:
+                return False
+            self._posts[post['id']] = post
+            self._order.append((created, post['id']))
+            self._evict(now)
+        self.index.add(post['id'], tickers, created, now=now)
+        return True
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._order and (self._order[0][0] < cutoff or len(self._order) > self.max_posts):
+            _, post_id = self._order.popleft()
+            self._posts.pop(post_id, None)
+
+    def mentions(self, ticker: str, limit: int = 50, now: Optional[float] = None) -> List[Dict]:
+        """Newest-first posts mentioning ``ticker`` still inside the window."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._evict(now)
+        ids = self.index.posts(ticker, self.window_seconds, limit=limit, now=now, keep=self._posts.__contains__)
+        with self._lock:
+            return [self._posts[i] for i in ids if i in self._posts]
+
+
+class RedditStreamIngestor:
+    """Background threads feeding a :class:`PostWindow` from subreddit streams."""
+
+    def __init__(self, client, subreddits: List[str], include_comments: bool = False,
+                 window: Optional[PostWindow] = None):
+        self._client = client
+        self.subreddits = subreddits
+        self.include_comments = include_comments
+        # An empty PostWindow is falsy, so test for None explicitly
+        self.window = window if window is not None else PostWindow(settings.reddit_stream_window_hours * 3600,
+                                                                   settings.reddit_stream_max_posts)
+        # Set once the initial backfill has drained and the stream is live
+        self.ready = threading.Event()
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.ingested = 0
+
+    def start(self):
+        self.started_at = time.time()
+        streams = [("submissions", submission_to_dict)]
+        if self.include_comments:
+            streams.append(("comments", comment_to_dict))
+        for kind, convert in streams:
+            t = threading.Thread(target=self._run, args=(kind, convert), name=f"reddit-stream-{kind}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info(f"Reddit stream ingestion started for r/{'+'.join(self.subreddits)}")
+
+    def _run(self, kind: str, convert):
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                subreddit = self._client.subreddit("+".join(self.subreddits))
+                # pause_after=0 yields None whenever a poll returns nothing new
+                for item in getattr(subreddit.stream, kind)(pause_after=0):
+                    if self._stop.is_set():
+                        return
+                    if item is None:
+                        if kind == "submissions":
+                            self.ready.set()
+                        continue
+                    post = convert(item)
+                    if self.window.add(post, extract_tickers(f"{post['title']} {post['selftext']}")):
+                        self.ingested += 1
+                    delay = 1.0
+            except Exception as e:
+                logger.warning(f"Reddit {kind} stream error, reconnecting in {delay:.0f}s: {e}")
+                self._stop.wait(delay)
+                delay = min(delay * 2, 60.0)
+
+    def covers_window(self, now: Optional[float] = None) -> bool:
+        """True once the stream has been live for the whole window, so its posts are complete."""
+        now = now if now is not None else time.time()
+        return (self.ready.is_set() and self.started_at is not None
+                and now - self.started_at >= self.window.window_seconds)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+
+_ingestor: Optional[RedditStreamIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def ensure_ingestor(client) -> Optional[RedditStreamIngestor]:
+    """Start the process-wide ingestor on first call when ``REDDIT_STREAM_ENABLED`` is set."""
+    global _ingestor
+    if not settings.reddit_stream_enabled or client is None:
+        return None
+    with _ingestor_lock:
+        if _ingestor is None:
+            subreddits = [s.strip() for s in settings.reddit_stream_subreddits.split(",") if s.strip()]
+            _ingestor = RedditStreamIngestor(client, subreddits, settings.reddit_stream_comments)
+            _ingestor.start()
+        return _ingestor
+
+
+def get_ingestor() -> Optional[RedditStreamIngestor]:
+    """The running ingestor if it has finished its backfill, else None."""
+    if _ingestor is not None and _ingestor.ready.is_set():
+        return _ingestor
+    return None
+
+
+def stream_mentions(ticker: str, limit: int) -> Optional[List[Dict]]:
+    """Posts for ``ticker`` from the stream window, or None when a search is still needed."""
+    ingestor = get_ingestor()
+    if ingestor is None or not ingestor.covers_window():
+        return None
+    return ingestor.window.mentions(ticker, limit) or None
+
+
+def stop_ingestor():
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is not None:
+            _ingestor.stop()
+            _ingestor = None
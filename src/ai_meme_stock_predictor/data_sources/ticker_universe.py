@@ -0,0 +1,220 @@
+"""Ticker universe and query parsing.
+
+Symbols and company names come from a local symbol file
+(``TICKER_UNIVERSE_PATH``). Both NASDAQ Trader's pipe-delimited
+``nasdaqlisted.txt``/``otherlisted.txt`` and a plain ``symbol,name`` CSV
+work. Exact symbols are a set lookup; company names sit in a sorted list,
+so "tesla" finds TSLA with a bisect prefix search. Symbols the market API
+reported as unknown are negatively cached, so they are never analyzed
+again within ``TICKER_NEGATIVE_TTL``.
+
+Without a symbol file, parsing falls back to the old word heuristic,
+minus common English and WSB words, and company names are not recognised.
+``python fetch_symbols.py`` downloads the NASDAQ Trader listings
+(:data:`NASDAQ_TRADER_URLS`) into ``TICKER_UNIVERSE_PATH``.
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
+import itertools
+import os
+import re
+import threading
+from cachetools import TTLCache
+from ..utils.config import get_settings
+from ..utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# NASDAQ-listed and other-exchange (NYSE, NYSE American, Cboe, ...) symbol directories
+NASDAQ_TRADER_URLS = (
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+)
+
+_WORD_PATTERN = re.compile(r"\$?[A-Za-z][A-Za-z.\-]*")
+
+# Words that read as tickers but almost never are in a chat message
+STOP_WORDS = frozenset({
+    "A", "ABOUT", "AI", "ALL", "AM", "AN", "AND", "ANY", "ARE", "AT", "ATH", "BE", "BUY", "CAN", "CEO",
+    "CHART", "DD", "DO", "DOES", "EOD", "FOR", "FROM", "GET", "GO", "GOOD", "HAS", "HELLO", "HELP", "HEY",
+    "HI", "HODL", "HOW", "I", "IF", "IMO", "IN", "IS", "IT", "LIKE", "LOL", "ME", "MEME", "MEMES", "MOON",
+    "MY", "NEW", "NEWS", "NO", "NOT", "NOW", "OF", "OK", "ON", "ONE", "OR", "OUT", "PLEASE", "PRICE",
+    "REAL", "SEE", "SELL", "SO", "STOCK", "STOCKS", "TELL", "THANKS", "THE", "THINK", "THIS", "TO",
+    "TODAY", "UP", "US", "WHAT", "WHEN", "WHO", "WHY", "WILL", "WITH", "WSB", "YOLO", "YOU", "YOUR",
+})
+
+# Company-name suffixes dropped before prefix indexing
+_NAME_SUFFIXES = frozenset({"inc", "corp", "corporation", "co", "ltd", "plc", "class", "common", "stock",
+                            "holdings", "the", "company", "group", "shares", "ordinary"})
+
+
+def _normalize_name(name: str) -> str:
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    while words and words[-1] in _NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def parse_symbol_table(lines: Iterable[str]) -> Dict[str, str]:
+    """``{symbol: company name}`` from the lines of a NASDAQ Trader listing or a ``symbol,name`` CSV."""
+    lines = iter(lines)
+    first = next(lines, "")
+    delimiter = "|" if "|" in first else ","
+    reader = csv.reader(itertools.chain([first], lines), delimiter=delimiter)
+    header = [h.strip().lower() for h in next(reader, [])]
+    sym_col = next((i for i, h in enumerate(header) if h in ("symbol", "act symbol", "ticker")), 0)
+    name_col = next((i for i, h in enumerate(header) if "name" in h), 1)
+    test_col = next((i for i, h in enumerate(header) if h == "test issue"), None)
+    symbols = {}
+    for row in reader:
+        if len(row) <= max(sym_col, name_col) or row[0].startswith("File Creation Time"):
+            continue
+        if test_col is not None and len(row) > test_col and row[test_col].strip() == "Y":
+            continue
+        symbol = row[sym_col].strip().upper()
+        if symbol:
+            symbols[symbol] = row[name_col].strip()
+    return symbols
+
+
+def read_symbol_file(path: str) -> Dict[str, str]:
+    """``{symbol: company name}`` from a NASDAQ Trader listing or a ``symbol,name`` CSV."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return parse_symbol_table(f)
+
+
+class TickerUniverse:
+    def __init__(self, symbols: Dict[str, str]):
+        self.symbols = frozenset(symbols)
+        # Shortest name first among equal prefixes, so "apple" prefers Apple Inc.
+        self._names: List[Tuple[str, str]] = sorted(
+            (n, s) for s, n in ((s, _normalize_name(name)) for s, name in symbols.items()) if n
+        )
+        self._negative: TTLCache = TTLCache(maxsize=10_000, ttl=get_settings().ticker_negative_ttl)
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.symbols
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def is_known_bad(self, symbol: str) -> bool:
+        with self._lock:
+            return symbol.upper() in self._negative
+
+    def mark_unknown(self, symbol: str):
+        with self._lock:
+            self._negative[symbol.upper()] = True
+        _parse_memo.cache_clear()
+
+    def expire_negative(self) -> bool:
+        """Drop lapsed negative entries; True if any did, since memoized parses may now differ."""
+        with self._lock:
+            return bool(self._negative.expire())
+
+    def by_name(self, prefix: str) -> Optional[str]:
+        """Symbol whose company name starts with the whole words of ``prefix`` (shortest such name wins).
+
+        "tesla" finds "Tesla, Inc." but "price" does not find "PriceSmart".
+        """
+        prefix = _normalize_name(prefix)
+        if not prefix:
+            return None
+        i = bisect_left(self._names, (prefix, ""))
+        best = None
+        while i < len(self._names) and self._names[i][0].startswith(prefix):
+            name, symbol = self._names[i]
+            whole_words = len(name) == len(prefix) or name[len(prefix)] == " "
+            if whole_words and (best is None or len(name) < len(best[0])):
+                best = (name, symbol)
+            i += 1
+        return best[1] if best else None
+
+    def valid(self, symbol: str) -> bool:
+        """Usable as an analysis target: listed (when a universe is loaded) and not negatively cached."""
+        symbol = symbol.upper()
+        if self.is_known_bad(symbol):
+            return False
+        return symbol in self.symbols if self.symbols else True
+
+    def parse(self, text: str) -> Optional[str]:
+        """Best ticker in ``text``: a cashtag, a typed all-caps symbol, any-case symbol, then a company name."""
+        words = _WORD_PATTERN.findall(text)
+        cashtags = [w[1:].upper() for w in words if w.startswith("$")]
+        bare = [w.lstrip("$").rstrip(".-") for w in words]
+        for symbol in cashtags:
+            if self.valid(symbol):
+                return symbol
+        for w in bare:
+            if w.isupper() and 1 < len(w) <= 5 and w not in STOP_WORDS and self.valid(w):
+                return w
+        # Listed symbols typed in lower case beat company-name guesses ("price of gme")
+        for w in bare:
+            upper = w.upper()
+            if 2 < len(w) <= 5 and w.isalpha() and upper not in STOP_WORDS and self.valid(upper):
+                return upper
+        if self._names:
+            for w in bare:
+                if len(w) >= 4 and w.upper() not in STOP_WORDS:
+                    symbol = self.by_name(w)
+                    if symbol and self.valid(symbol):
+                        return symbol
+        return None
+
+
+_universe: Optional[TickerUniverse] = None
+_universe_lock = threading.Lock()
+
+
+def get_universe() -> TickerUniverse:
+    global _universe
+    with _universe_lock:
+        if _universe is None:
+            path = get_settings().ticker_universe_path
+            symbols: Dict[str, str] = {}
+            if path and os.path.exists(path):
+                try:
+                    symbols = read_symbol_file(path)
+                    logger.info(f"Loaded {len(symbols)} symbols from {path}")
+                except (OSError, csv.Error) as e:
+                    logger.warning(f"Could not read symbol file {path}: {e}")
+            elif path:
+                logger.warning(f"No symbol file at {path}; ticker parsing falls back to word heuristics and "
+                               f"company names are not recognised. Run `python fetch_symbols.py` to download it")
+            _universe = TickerUniverse(symbols)
+        return _universe
+
+
+def set_universe(symbols: Iterable[str] = (), names: Optional[Dict[str, str]] = None):
+    """Replace the process-wide universe (tests, or a reload after refreshing the symbol file)."""
+    global _universe
+    table = dict(names or {})
+    table.update({s.upper(): table.get(s.upper(), "") for s in symbols})
+    with _universe_lock:
+        _universe = TickerUniverse(table)
+    _parse_memo.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _parse_memo(text: str) -> Optional[str]:
+    return get_universe().parse(text)
+
+
+def parse_ticker(text: str) -> Optional[str]:
+    """Memoized :meth:`TickerUniverse.parse`, shared by the agent and the bots so a message is parsed once.
+
+    The memo is dropped whenever negative-cache entries lapse, so a symbol
+    refused earlier is parsed again once ``TICKER_NEGATIVE_TTL`` has passed.
+    """
+    if get_universe().expire_negative():
+        _parse_memo.cache_clear()
+    return _parse_memo(text)
+
+
+def mark_unknown(symbol: str):
+    """Record that the market API has no such symbol."""
+    get_universe().mark_unknown(symbol)
+    logger.info(f"Negative-cached unknown symbol {symbol.upper()}")
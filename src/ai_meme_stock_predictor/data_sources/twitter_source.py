@@ -1,11 +1,250 @@
-from typing import List, Dict
+from datetime import datetime
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+import asyncio
+import threading
+import time
 import requests
+import httpx
+from cachetools import LRUCache
+from .http_client import aget, get_session
+from ..utils.cache import SourceCache, get_cache
 from ..utils.config import settings
 from ..utils.logging_setup import get_logger
 
 logger = get_logger(__name__)
 
 TWITTER_SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+# Recent search rejects a since_id older than 7 days; drop ours a little before that
+SINCE_ID_MAX_AGE = 7 * 24 * 3600 - 600
+_SNOWFLAKE_EPOCH_MS = 1288834974657
+
+
+def _mentions_cache() -> SourceCache:
+    return get_cache("twitter", ttl=lambda: settings.cache_mentions_ttl)
+
+
+def _search_params(ticker: str, limit: int, since_id: Optional[str] = None,
+                   next_token: Optional[str] = None) -> Dict:
+    params = {
+        "query": f"({ticker} OR ${ticker}) -is:retweet lang:en",
+        # The endpoint accepts 10..100 results per page
+        "max_results": max(10, min(limit, 100)),
+        "tweet.fields": "created_at,author_id,public_metrics"
+    }
+    if since_id:
+        params["since_id"] = since_id
+    if next_token:
+        params["next_token"] = next_token
+    return params
+
+
+def _parse_tweets(payload: Dict) -> List[Dict]:
+    results = []
+    for tweet in payload.get('data', []):
+        results.append({
+            'id': tweet.get('id', ''),
+            'text': tweet.get('text', ''),
+            'created_at': tweet.get('created_at', ''),
+            'author_id': tweet.get('author_id', ''),
+            'retweets': tweet.get('public_metrics', {}).get('retweet_count', 0),
+            'likes': tweet.get('public_metrics', {}).get('like_count', 0)
+        })
+    return results
+
+
+def _check_status(status_code: int, body: str, ticker: str) -> bool:
+    """Log non-200 responses; returns True when the payload is usable."""
+    if status_code == 429:
+        logger.warning(f"Twitter API rate limit reached for {ticker} - serving known tweets")
+        return False
+    elif status_code == 403:
+        logger.warning(f"Twitter API access forbidden for {ticker} - check credentials")
+        return False
+    elif status_code != 200:
+        logger.error(f"Twitter API error {status_code} for {ticker}: {body[:200]}")
+        return False
+    return True
+
+
+class RateLimitTracker:
+    """Per-endpoint view of the ``x-rate-limit-*`` response headers.
+
+    Calls are paused once only ``reserve`` requests remain in the current
+    window, rather than sent and answered with 429. Pauses longer than the
+    caller can afford return None so the caller serves what it has.
+    """
+
+    def __init__(self, reserve: int = 1):
+        self.reserve = reserve
+        self._state: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, endpoint: str, status_code: int, headers: Mapping[str, str]):
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        if remaining is None and status_code != 429:
+            return
+        left = 0 if status_code == 429 else int(remaining)
+        reset_at = float(reset) if reset else time.time() + 60
+        with self._lock:
+            self._state[endpoint] = (left, reset_at)
+
+    def pause_for(self, endpoint: str, max_pause: float) -> Optional[float]:
+        """Seconds to wait before calling ``endpoint`` (0.0 to go now), or None if too long."""
+        with self._lock:
+            state = self._state.get(endpoint)
+            if state is None:
+                return 0.0
+            remaining, reset_at = state
+            wait = reset_at - time.time()
+            if wait <= 0 or remaining > self.reserve:
+                # Count the call locally so concurrent callers don't all spend the last requests
+                self._state[endpoint] = (remaining - 1, reset_at) if wait > 0 else (remaining, reset_at)
+                return 0.0
+            return wait if wait <= max_pause else None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {e: {'remaining': r, 'reset_in': round(max(0.0, t - time.time()), 1)}
+                    for e, (r, t) in self._state.items()}
+
+
+def _tweet_ts(tweet: Dict) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(tweet.get('created_at', '').replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _snowflake_ts(tweet_id: Optional[str]) -> Optional[float]:
+    """Creation time encoded in a tweet id, or None for ids that are not snowflakes."""
+    try:
+        ms = int(tweet_id) >> 22
+    except (TypeError, ValueError):
+        return None
+    return (ms + _SNOWFLAKE_EPOCH_MS) / 1000 if ms else None
+
+
+class _TimelineEntry(NamedTuple):
+    since_id: Optional[str]
+    tweets: List[Dict]
+    # (next_token, newest_id) of a search that stopped before its last page
+    resume: Optional[Tuple[str, str]]
+
+
+class TweetTimeline:
+    """Per-ticker tweets seen so far plus the ``since_id`` watermark for the next fetch.
+
+    The watermark only moves once a search has paged through everything
+    newer than it. A search cut short (limit, page cap, rate limit, error)
+    leaves a resume token instead, so the next fetch continues into the gap
+    rather than skipping it. A watermark the API rejects (400) or that has
+    aged out of its 7-day window is dropped for a fresh search. Tweets older
+    than ``max_age`` seconds are dropped.
+    """
+
+    def __init__(self, max_tweets: int, maxsize: int, max_age: float = 0.0):
+        self.max_tweets = max(1, max_tweets)
+        self.max_age = max_age
+        self._entries: LRUCache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def state(self, key: str) -> _TimelineEntry:
+        with self._lock:
+            return self._entries.get(key) or _TimelineEntry(None, [], None)
+
+    def _recent(self, tweets: List[Dict], now: float) -> List[Dict]:
+        if self.max_age <= 0:
+            return tweets
+        cutoff = now - self.max_age
+        return [t for t in tweets if (_tweet_ts(t) or now) >= cutoff]
+
+    def merge(self, key: str, new_tweets: List[Dict], newest_id: Optional[str],
+              resume: Optional[Tuple[str, str]] = None, now: Optional[float] = None) -> List[Dict]:
+        """Merge ``new_tweets`` and either advance the watermark to ``newest_id`` or record ``resume``."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            since_id, old, _ = self._entries.get(key) or _TimelineEntry(None, [], None)
+            seen = {t['id'] for t in new_tweets}
+            tweets = sorted(new_tweets + [t for t in old if t['id'] not in seen],
+                            key=lambda t: int(t['id']) if str(t['id']).isdigit() else 0, reverse=True)
+            tweets = self._recent(tweets, now)[:self.max_tweets]
+            if resume is None:
+                ids = [i for i in (since_id, newest_id) if i]
+                since_id = max(ids, key=int) if ids else None
+            self._entries[key] = _TimelineEntry(since_id, tweets, resume)
+            return tweets
+
+    def reset(self, key: str):
+        """Forget the watermark and resume token (the tweets stay) so the next search starts fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = _TimelineEntry(None, entry.tweets, None)
+
+    def tweets(self, key: str, now: Optional[float] = None) -> List[Dict]:
+        return self._recent(self.state(key).tweets, now if now is not None else time.time())
+
+
+SEARCH_ENDPOINT = "tweets/search/recent"
+_rate_limits = RateLimitTracker(settings.twitter_rate_reserve)
+_timeline = TweetTimeline(settings.twitter_timeline_size, settings.cache_maxsize,
+                          settings.feature_window_seconds())
+
+
+class _Pager:
+    """Pagination state shared by the sync and async clients."""
+
+    def __init__(self, ticker: str, limit: int):
+        self.ticker = ticker
+        self.key = ticker.upper()
+        self.limit = limit
+        state = _timeline.state(self.key)
+        watermark_ts = _snowflake_ts(state.resume[1] if state.resume else state.since_id)
+        if watermark_ts is not None and time.time() - watermark_ts > SINCE_ID_MAX_AGE:
+            # A quiet ticker's watermark aged out of the search window; the API would reject it
+            _timeline.reset(self.key)
+            state = _timeline.state(self.key)
+        self.since_id = state.since_id
+        self.collected: List[Dict] = []
+        # Resuming an interrupted search: keep its token and the newest id it started from
+        self.next_token, self.newest_id = state.resume or (None, None)
+        self.pages = 0
+
+    def params(self) -> Dict:
+        return _search_params(self.ticker, self.limit - len(self.collected), self.since_id, self.next_token)
+
+    def more(self) -> bool:
+        if self.pages == 0:
+            return True
+        return bool(self.next_token) and len(self.collected) < self.limit and self.pages < settings.twitter_max_pages
+
+    def restart(self, status_code: int) -> bool:
+        """After a 400, drop the watermark and resume token and search afresh (once)."""
+        if status_code != 400 or self.pages or not (self.since_id or self.next_token):
+            return False
+        logger.warning(f"Twitter rejected the watermark/resume token for {self.ticker}; searching afresh")
+        _timeline.reset(self.key)
+        self.since_id = self.next_token = self.newest_id = None
+        return True
+
+    def add_page(self, payload: Dict):
+        self.pages += 1
+        self.collected.extend(_parse_tweets(payload))
+        meta = payload.get('meta', {})
+        self.newest_id = self.newest_id or meta.get('newest_id')
+        self.next_token = meta.get('next_token')
+
+    def result(self) -> List[Dict]:
+        if self.pages == 0:
+            # Nothing was fetched; leave the watermark and any resume token alone
+            return _timeline.tweets(self.key)[:self.limit]
+        resume = (self.next_token, self.newest_id or self.since_id or "") if self.next_token else None
+        tweets = _timeline.merge(self.key, self.collected, self.newest_id, resume)
+        logger.info(f"Fetched {len(self.collected)} new tweets for {self.ticker} in {self.pages} page(s)"
+                    + (" (more pending)" if resume else ""))
+        return tweets[:self.limit]
+
 
 class TwitterSource:
     def __init__(self):
@@ -13,47 +252,73 @@ class TwitterSource:
         if not self.bearer:
             logger.warning("Twitter bearer token missing; TwitterSource disabled")
 
-    def fetch_mentions(self, ticker: str, limit: int = 10) -> List[Dict]:
+    def fetch_mentions(self, ticker: str, limit: Optional[int] = None) -> List[Dict]:
         if not self.bearer:
             logger.warning("Twitter bearer token missing")
             return []
-        
+        limit = limit or settings.twitter_fetch_limit
+        return _mentions_cache().get_or_fetch((ticker.upper(), limit), lambda: self._search(ticker, limit))
+
+    def _search(self, ticker: str, limit: int) -> List[Dict]:
+        """Pull tweets newer than the ticker's watermark, page by page, within the rate limit."""
         headers = {"Authorization": f"Bearer {self.bearer}"}
-        params = {
-            "query": f"({ticker} OR ${ticker}) -is:retweet lang:en",
-            "max_results": min(limit, 100),
-            "tweet.fields": "created_at,author_id,public_metrics"
-        }
-        
+        pager = _Pager(ticker, limit)
         try:
-            r = requests.get(TWITTER_SEARCH_URL, headers=headers, params=params, timeout=10)
-            if r.status_code == 429:
-                logger.warning(f"Twitter API rate limit reached for {ticker} - returning empty list")
-                return []
-            elif r.status_code == 403:
-                logger.warning(f"Twitter API access forbidden for {ticker} - check credentials")
-                return []
-            elif r.status_code != 200:
-                logger.error(f"Twitter API error {r.status_code} for {ticker}: {r.text[:200]}")
-                return []
-                
-            data = r.json().get('data', [])
-            results = []
-            for tweet in data:
-                results.append({
-                    'text': tweet.get('text', ''),
-                    'created_at': tweet.get('created_at', ''),
-                    'author_id': tweet.get('author_id', ''),
-                    'retweets': tweet.get('public_metrics', {}).get('retweet_count', 0),
-                    'likes': tweet.get('public_metrics', {}).get('like_count', 0)
-                })
-            
-            logger.info(f"Fetched {len(results)} tweets for {ticker}")
-            return results
-            
+            while pager.more():
+                pause = _rate_limits.pause_for(SEARCH_ENDPOINT, settings.twitter_max_rate_pause)
+                if pause is None:
+                    logger.warning(f"Twitter rate limit nearly spent; serving known tweets for {ticker}")
+                    break
+                if pause:
+                    time.sleep(pause)
+                r = get_session().get(TWITTER_SEARCH_URL, headers=headers, params=pager.params(), timeout=10)
+                _rate_limits.update(SEARCH_ENDPOINT, r.status_code, r.headers)
+                if pager.restart(r.status_code):
+                    continue
+                if not _check_status(r.status_code, r.text, ticker):
+                    break
+                pager.add_page(r.json())
         except requests.exceptions.Timeout:
             logger.warning(f"Twitter API timeout for {ticker}")
-            return []
         except Exception as e:
             logger.error(f"Twitter API error for {ticker}: {e}")
+        return pager.result()
+
+
+class AsyncTwitterSource:
+    """``httpx.AsyncClient`` variant of :class:`TwitterSource`."""
+
+    def __init__(self):
+        self.bearer = settings.twitter_bearer_token
+        if not self.bearer:
+            logger.warning("Twitter bearer token missing; AsyncTwitterSource disabled")
+
+    async def fetch_mentions(self, ticker: str, limit: Optional[int] = None) -> List[Dict]:
+        if not self.bearer:
             return []
+        limit = limit or settings.twitter_fetch_limit
+        return await _mentions_cache().aget_or_fetch((ticker.upper(), limit), lambda: self._search(ticker, limit))
+
+    async def _search(self, ticker: str, limit: int) -> List[Dict]:
+        headers = {"Authorization": f"Bearer {self.bearer}"}
+        pager = _Pager(ticker, limit)
+        try:
+            while pager.more():
+                pause = _rate_limits.pause_for(SEARCH_ENDPOINT, settings.twitter_max_rate_pause)
+                if pause is None:
+                    logger.warning(f"Twitter rate limit nearly spent; serving known tweets for {ticker}")
+                    break
+                if pause:
+                    await asyncio.sleep(pause)
+                r = await aget(TWITTER_SEARCH_URL, headers=headers, params=pager.params(), timeout=10)
+                _rate_limits.update(SEARCH_ENDPOINT, r.status_code, r.headers)
+                if pager.restart(r.status_code):
+                    continue
+                if not _check_status(r.status_code, r.text, ticker):
+                    break
+                pager.add_page(r.json())
+        except httpx.TimeoutException:
+            logger.warning(f"Twitter API timeout for {ticker}")
+        except Exception as e:
+            logger.error(f"Twitter API error for {ticker}: {e}")
+        return pager.result()
@@ -0,0 +1,313 @@
+"""TTL caches for data-source payloads and workflow results.
+
+Each source owns a :class:`SourceCache` namespace with its own TTL. Entries
+past their TTL but still inside the stale window are served immediately
+while a single background refresh replaces them (stale-while-revalidate),
+so hot tickers never wait on the network. When ``REDIS_URL`` is configured
+a shared Redis tier sits behind the in-process LRU so all workers warm one
+another.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import asyncio
+import threading
+import time
+from cachetools import LRUCache
+from .config import get_settings
+from .logging_setup import get_logger
+from .rate_budget import background
+from .redis_cache import RedisCacheBackend, get_shared_backend, shared_backend_resolved
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+logger = get_logger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE_HOUR = 16
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+_SHARED = object()  # sentinel: resolve the process-wide Redis backend lazily
+
+
+class Uncached:
+    """Fetch result to hand back to the caller without storing it.
+
+    Fetchers wrap fallbacks in it - e.g. last-known data served because the
+    upstream call budget is spent - so the stale value is not re-stamped
+    fresh for a whole TTL.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def unwrap(value: Any) -> Any:
+    """``value`` itself, or the payload of an :class:`Uncached` wrapper."""
+    return value.value if isinstance(value, Uncached) else value
+
+
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    global _refresh_executor
+    with _executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=max(1, get_settings().cache_refresh_workers),
+                thread_name_prefix="cache-refresh",
+            )
+    return _refresh_executor
+
+
+def seconds_until_market_close(now: Optional[datetime] = None) -> float:
+    """Seconds until the next weekday 16:00 New York close (holidays ignored)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if now >= close:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:
+        close += timedelta(days=1)
+    return (close - now).total_seconds()
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """True during the regular weekday New York session (holidays ignored)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5:
+        return False
+    return (now.hour, now.minute) >= MARKET_OPEN and now.hour < MARKET_CLOSE_HOUR
+
+
+class SourceCache:
+    """Thread-safe LRU of ``key -> value`` with per-namespace TTL and a stale window.
+
+    Empty results (``[]``/``{}``/``None``) are never stored: sources return
+    them on failure and caching them would pin an outage for a full TTL.
+    Concurrent misses for the same key are coalesced into a single fetch.
+    The async paths run Redis calls on a worker thread so a slow or
+    unreachable Redis never blocks the event loop.
+    """
+
+    def __init__(self, namespace: str, ttl: Union[float, Callable[[], float]],
+                 stale_ttl: Optional[Union[float, Callable[[], float]]] = None,
+                 maxsize: Optional[int] = None, backend: Any = _SHARED):
+        self.namespace = namespace
+        self._backend = backend
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._entries: LRUCache = LRUCache(maxsize or get_settings().cache_maxsize)
+        self._lock = threading.Lock()
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._flight = SingleFlight()
+        self._aflight = AsyncSingleFlight()
+
+    @staticmethod
+    def _resolve(value: Union[float, Callable[[], float]]) -> float:
+        return float(value() if callable(value) else value)
+
+    def ttl(self) -> float:
+        return self._resolve(self._ttl)
+
+    def stale_ttl(self) -> float:
+        if self._stale_ttl is None:
+            return get_settings().cache_stale_ttl
+        return self._resolve(self._stale_ttl)
+
+    @property
+    def backend(self) -> Optional[RedisCacheBackend]:
+        return get_shared_backend() if self._backend is _SHARED else self._backend
+
+    async def _abackend(self) -> Optional[RedisCacheBackend]:
+        if self._backend is not _SHARED:
+            return self._backend
+        if shared_backend_resolved():
+            return get_shared_backend()
+        return await asyncio.to_thread(get_shared_backend)
+
+    def _remember_shared(self, key: Hashable, hit: Optional[Tuple[Any, float]]) -> Optional[tuple]:
+        if hit is None:
+            return None
+        value, fresh_until_wall = hit
+        fresh_until = time.monotonic() + (fresh_until_wall - time.time())
+        entry = (value, fresh_until, fresh_until + self.stale_ttl())
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _load_shared(self, key: Hashable) -> Optional[tuple]:
+        backend = self.backend
+        if backend is None:
+            return None
+        return self._remember_shared(key, backend.get(self.namespace, key))
+
+    async def _aload_shared(self, key: Hashable) -> Optional[tuple]:
+        backend = await self._abackend()
+        if backend is None or not backend.available():
+            return None
+        return self._remember_shared(key, await asyncio.to_thread(backend.get, self.namespace, key))
+
+    def _local(self, key: Hashable, now: float) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None or now >= entry[2] else entry
+
+    @staticmethod
+    def _state(entry: Optional[tuple], now: float) -> Tuple[Any, str]:
+        if entry is None:
+            return None, MISS
+        value, fresh_until, stale_until = entry
+        if now < fresh_until:
+            return value, FRESH
+        if now < stale_until:
+            return value, STALE
+        return None, MISS
+
+    def lookup(self, key: Hashable) -> Tuple[Any, str]:
+        """Return ``(value, state)`` where state is ``fresh``, ``stale`` or ``miss``."""
+        now = time.monotonic()
+        entry = self._local(key, now)
+        if entry is None:
+            entry = self._load_shared(key)
+        return self._state(entry, now)
+
+    async def alookup(self, key: Hashable) -> Tuple[Any, str]:
+        """:meth:`lookup` with the Redis read moved off the event loop."""
+        now = time.monotonic()
+        entry = self._local(key, now)
+        if entry is None:
+            entry = await self._aload_shared(key)
+        return self._state(entry, now)
+
+    def peek(self, key: Hashable) -> Any:
+        """Last stored value regardless of age, for when refetching is not an option."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def _store_local(self, key: Hashable, value: Any) -> Optional[Tuple[float, float]]:
+        """Store in-process; returns ``(ttl, stale_ttl)`` for the shared tier, or None if skipped."""
+        if not value or isinstance(value, Uncached):
+            return None
+        now = time.monotonic()
+        ttl, stale_ttl = self.ttl(), self.stale_ttl()
+        with self._lock:
+            self._entries[key] = (value, now + ttl, now + ttl + stale_ttl)
+        return ttl, stale_ttl
+
+    def store(self, key: Hashable, value: Any):
+        ttls = self._store_local(key, value)
+        backend = self.backend if ttls is not None else None
+        if backend is not None:
+            backend.set(self.namespace, key, value, *ttls)
+
+    async def astore(self, key: Hashable, value: Any):
+        """:meth:`store` with the Redis write moved off the event loop."""
+        ttls = self._store_local(key, value)
+        backend = await self._abackend() if ttls is not None else None
+        if backend is not None and backend.available():
+            await asyncio.to_thread(backend.set, self.namespace, key, value, *ttls)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _claim_refresh(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _release_refresh(self, key: Hashable):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Any]):
+        try:
+            with background():
+                self.store(key, fetch())
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.namespace}:{key} failed: {e}")
+        finally:
+            self._release_refresh(key)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        if not get_settings().cache_enabled:
+            return unwrap(fetch())
+        value, state = self.lookup(key)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if self._claim_refresh(key):
+                _get_refresh_executor().submit(self._refresh, key, fetch)
+            return value
+        return self._flight.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        value = fetch()
+        self.store(key, value)
+        return unwrap(value)
+
+    async def _arefresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        try:
+            with background():
+                await self.astore(key, await fetch())
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.namespace}:{key} failed: {e}")
+        finally:
+            self._release_refresh(key)
+
+    async def aget_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of :meth:`get_or_fetch`; refreshes run as loop tasks."""
+        if not get_settings().cache_enabled:
+            return unwrap(await fetch())
+        value, state = await self.alookup(key)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if self._claim_refresh(key):
+                task = asyncio.create_task(self._arefresh(key, fetch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        return await self._aflight.do(key, lambda: self._afetch_and_store(key, fetch))
+
+    async def _afetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        await self.astore(key, value)
+        return unwrap(value)
+
+
+_caches: Dict[str, SourceCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: Union[float, Callable[[], float]],
+              stale_ttl: Optional[Union[float, Callable[[], float]]] = None) -> SourceCache:
+    """Return the process-wide cache for ``namespace``, creating it on first use.
+
+    Sync and async variants of a source share the same namespace, so either
+    one warms the cache for the other.
+    """
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = SourceCache(namespace, ttl, stale_ttl)
+        return cache
+
+
+def clear_all():
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.clear()
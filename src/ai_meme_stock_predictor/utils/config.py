@@ -1,3 +1,4 @@
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic import Field
 
@@ -19,6 +20,119 @@ class Settings(BaseSettings):
     portia_api_key: str = Field(default="", env="PORTIA_API_KEY")
     telegram_bot_token: str = Field(default="", env="TELEGRAM_BOT_TOKEN")
     env: str = Field(default="dev", env="ENV")
+    # Workflow fan-out: bounded pool size and per-source deadlines (seconds)
+    workflow_max_workers: int = Field(default=8, env="WORKFLOW_MAX_WORKERS")
+    reddit_timeout: float = Field(default=12.0, env="REDDIT_TIMEOUT")
+    twitter_timeout: float = Field(default=10.0, env="TWITTER_TIMEOUT")
+    quote_timeout: float = Field(default=10.0, env="QUOTE_TIMEOUT")
+    history_timeout: float = Field(default=15.0, env="HISTORY_TIMEOUT")
+    # Batch analysis: tickers fetching sources at once, and max watchlist size
+    batch_max_in_flight: int = Field(default=8, env="BATCH_MAX_IN_FLIGHT")
+    batch_max_tickers: int = Field(default=200, env="BATCH_MAX_TICKERS")
+    # /query admission control per worker (API_MAX_QUEUE=0 means unbounded wait queue)
+    api_max_concurrency: int = Field(default=32, env="API_MAX_CONCURRENCY")
+    api_max_queue: int = Field(default=256, env="API_MAX_QUEUE")
+    # Telegram: updates processed in parallel, and analyses one user may have running
+    telegram_concurrent_updates: int = Field(default=64, env="TELEGRAM_CONCURRENT_UPDATES")
+    telegram_max_analyses_per_user: int = Field(default=2, env="TELEGRAM_MAX_ANALYSES_PER_USER")
+    # Sentiment: VADER memo size, and batch size above which scoring uses a process pool
+    sentiment_cache_size: int = Field(default=50_000, env="SENTIMENT_CACHE_SIZE")
+    sentiment_process_threshold: int = Field(default=2_000, env="SENTIMENT_PROCESS_THRESHOLD")
+    sentiment_processes: int = Field(default=0, env="SENTIMENT_PROCESSES")
+    # FinBERT model (hub name or local dir) and inference backend: "torch"
+    # (reference), "int8" (dynamic quantization) or "onnx" (exported to FINBERT_ONNX_PATH)
+    finbert_model: str = Field(default="yiyanghkust/finbert-tone", env="FINBERT_MODEL")
+    finbert_backend: str = Field(default="torch", env="FINBERT_BACKEND")
+    finbert_onnx_path: str = Field(default="models/finbert.onnx", env="FINBERT_ONNX_PATH")
+    # FinBERT CPU inference (ENABLE_FINBERT=1): batch size, model window, long-post
+    # handling ("chunk" or "truncate") and torch intra-op threads (0 = torch default)
+    finbert_batch_size: int = Field(default=16, env="FINBERT_BATCH_SIZE")
+    finbert_max_length: int = Field(default=512, env="FINBERT_MAX_LENGTH")
+    finbert_long_text: str = Field(default="chunk", env="FINBERT_LONG_TEXT")
+    finbert_num_threads: int = Field(default=0, env="FINBERT_NUM_THREADS")
+    # Cross-request micro-batching window (ms, 0 disables) and max texts per forward pass
+    finbert_microbatch_wait_ms: float = Field(default=10.0, env="FINBERT_MICROBATCH_WAIT_MS")
+    finbert_microbatch_max_size: int = Field(default=64, env="FINBERT_MICROBATCH_MAX_SIZE")
+    # Extra meme keywords, one per line; reloaded when the file changes
+    meme_lexicon_path: str = Field(default="", env="MEME_LEXICON_PATH")
+    # Ticker universe for query parsing (NASDAQ Trader listing or symbol,name CSV) and
+    # how long symbols the market API reported as unknown are refused (seconds)
+    ticker_universe_path: str = Field(default="data/symbols.txt", env="TICKER_UNIVERSE_PATH")
+    ticker_negative_ttl: float = Field(default=86_400.0, env="TICKER_NEGATIVE_TTL")
+    # Reddit search: subreddits searched together as one multireddit, and how far back
+    # (hours, 0 = no cutoff) results are paged
+    reddit_search_subreddits: str = Field(default="wallstreetbets,stocks,options,pennystocks",
+                                          env="REDDIT_SEARCH_SUBREDDITS")
+    reddit_search_hours: float = Field(default=24.0, env="REDDIT_SEARCH_HOURS")
+    # Opt-in comments from the busiest search results: threads walked, comment cap per
+    # ticker, pool size, reply depth, depth above which "more comments" stubs are
+    # expanded, and the time budget (seconds) for the whole walk
+    reddit_comments_enabled: bool = Field(default=False, env="REDDIT_COMMENTS_ENABLED")
+    reddit_comment_threads: int = Field(default=5, env="REDDIT_COMMENT_THREADS")
+    reddit_comments_max: int = Field(default=200, env="REDDIT_COMMENTS_MAX")
+    reddit_comment_workers: int = Field(default=4, env="REDDIT_COMMENT_WORKERS")
+    reddit_comment_depth: int = Field(default=3, env="REDDIT_COMMENT_DEPTH")
+    reddit_comment_more_depth: int = Field(default=1, env="REDDIT_COMMENT_MORE_DEPTH")
+    reddit_comment_budget: float = Field(default=4.0, env="REDDIT_COMMENT_BUDGET")
+    # Background subreddit stream (comma-separated subreddits) serving Reddit
+    # mentions from a rolling in-memory window instead of per-query searches
+    reddit_stream_enabled: bool = Field(default=False, env="REDDIT_STREAM_ENABLED")
+    reddit_stream_subreddits: str = Field(default="wallstreetbets", env="REDDIT_STREAM_SUBREDDITS")
+    reddit_stream_comments: bool = Field(default=False, env="REDDIT_STREAM_COMMENTS")
+    reddit_stream_window_hours: float = Field(default=24.0, env="REDDIT_STREAM_WINDOW_HOURS")
+    reddit_stream_max_posts: int = Field(default=100_000, env="REDDIT_STREAM_MAX_POSTS")
+    # Ticker -> post index over ingested posts: bucket width and how long counts are kept
+    mention_bucket_seconds: float = Field(default=3600.0, env="MENTION_BUCKET_SECONDS")
+    mention_retention_hours: float = Field(default=168.0, env="MENTION_RETENTION_HOURS")
+    # Incremental per-ticker features: items older than this drop out once no
+    # longer fetched (unset follows REDDIT_SEARCH_HOURS; 0 recomputes every run from scratch)
+    feature_window_hours: Optional[float] = Field(default=None, env="FEATURE_WINDOW_HOURS")
+    # Persistent per-post score store (SQLite, WAL); empty disables it
+    score_store_path: str = Field(default="data/scores.sqlite3", env="SCORE_STORE_PATH")
+    # Local daily OHLCV store (one memory-mapped .npy per symbol; empty disables it), how
+    # many symbol files stay mapped, and how soon a fetch missing the session's bar is retried
+    price_store_path: str = Field(default="data/prices", env="PRICE_STORE_PATH")
+    price_store_max_open: int = Field(default=64, env="PRICE_STORE_MAX_OPEN")
+    price_store_retry_seconds: float = Field(default=900.0, env="PRICE_STORE_RETRY_SECONDS")
+    # Shared HTTP pool: host pools kept alive, connections per host, retry policy
+    http_pool_connections: int = Field(default=10, env="HTTP_POOL_CONNECTIONS")
+    http_pool_maxsize: int = Field(default=20, env="HTTP_POOL_MAXSIZE")
+    http_max_retries: int = Field(default=3, env="HTTP_MAX_RETRIES")
+    http_backoff_factor: float = Field(default=0.5, env="HTTP_BACKOFF_FACTOR")
+    http_backoff_jitter: float = Field(default=0.5, env="HTTP_BACKOFF_JITTER")
+    # Alpha Vantage call budget (token bucket) and how long each lane may queue for a token
+    alphavantage_calls_per_minute: float = Field(default=5.0, env="ALPHAVANTAGE_CALLS_PER_MINUTE")
+    alphavantage_burst: int = Field(default=5, env="ALPHAVANTAGE_BURST")
+    alphavantage_interactive_wait: float = Field(default=8.0, env="ALPHAVANTAGE_INTERACTIVE_WAIT")
+    alphavantage_background_wait: float = Field(default=60.0, env="ALPHAVANTAGE_BACKGROUND_WAIT")
+    # Twitter recent search: tweets per fetch, page cap, requests kept in reserve per rate
+    # window, longest pause before serving known tweets, and tweets remembered per ticker
+    twitter_fetch_limit: int = Field(default=50, env="TWITTER_FETCH_LIMIT")
+    twitter_max_pages: int = Field(default=3, env="TWITTER_MAX_PAGES")
+    twitter_rate_reserve: int = Field(default=1, env="TWITTER_RATE_RESERVE")
+    twitter_max_rate_pause: float = Field(default=5.0, env="TWITTER_MAX_RATE_PAUSE")
+    twitter_timeline_size: int = Field(default=200, env="TWITTER_TIMELINE_SIZE")
+    # Per-source result caches (seconds); history expires at the next market close
+    cache_enabled: bool = Field(default=True, env="CACHE_ENABLED")
+    cache_quote_ttl: float = Field(default=60.0, env="CACHE_QUOTE_TTL")
+    cache_mentions_ttl: float = Field(default=300.0, env="CACHE_MENTIONS_TTL")
+    cache_stale_ttl: float = Field(default=300.0, env="CACHE_STALE_TTL")
+    cache_maxsize: int = Field(default=1024, env="CACHE_MAXSIZE")
+    cache_refresh_workers: int = Field(default=4, env="CACHE_REFRESH_WORKERS")
+    # Optional shared tier (e.g. redis://localhost:6379/0); empty keeps caches per-process
+    redis_url: str = Field(default="", env="REDIS_URL")
+    redis_key_prefix: str = Field(default="memestock", env="REDIS_KEY_PREFIX")
+    workflow_result_ttl: float = Field(default=10.0, env="WORKFLOW_RESULT_TTL")
+    # Background Portia interaction logging: bounded queue, batching, sampling under pressure
+    portia_log_queue_size: int = Field(default=1000, env="PORTIA_LOG_QUEUE_SIZE")
+    portia_log_batch_size: int = Field(default=20, env="PORTIA_LOG_BATCH_SIZE")
+    portia_log_flush_interval: float = Field(default=5.0, env="PORTIA_LOG_FLUSH_INTERVAL")
+    portia_log_sample_rate: float = Field(default=0.25, env="PORTIA_LOG_SAMPLE_RATE")
+
+    def feature_window_seconds(self) -> float:
+        """Feature window; by default the search window, so features cover what each fetch sees."""
+        hours = self.reddit_search_hours if self.feature_window_hours is None else self.feature_window_hours
+        return hours * 3600
 
     class Config:
         case_sensitive = False
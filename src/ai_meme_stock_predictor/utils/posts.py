@@ -0,0 +1,36 @@
+"""Post payloads shared by the data sources and the analysis layer.
+
+Reddit submissions and comments are flattened into the same dict shape, so
+features and aggregates can read them without importing the source clients.
+"""
+from typing import Dict
+
+
+def submission_to_dict(s) -> Dict:
+    return {
+        "id": s.id,
+        "title": s.title,
+        "selftext": s.selftext,
+        "score": s.score,
+        "num_comments": s.num_comments,
+        "created_utc": s.created_utc,
+        "url": s.url,
+    }
+
+
+def comment_to_dict(c) -> Dict:
+    return {
+        "id": c.id,
+        "title": "",
+        "selftext": c.body,
+        "score": c.score,
+        "num_comments": 0,
+        "created_utc": c.created_utc,
+        "url": f"https://www.reddit.com{c.permalink}",
+        "kind": "comment",
+    }
+
+
+def reddit_source(post: Dict) -> str:
+    """Source key for a Reddit item; comment and submission ids are separate namespaces."""
+    return 'reddit_comment' if post.get('kind') == 'comment' else 'reddit'
@@ -0,0 +1,131 @@
+"""Token-bucket budget for rate-limited upstream APIs, with priority lanes.
+
+Interactive work (a user waiting on a reply) always gets the next token
+before background work such as stale-while-revalidate refreshes. A caller
+that cannot get a token within its lane's wait limit is told so, and can
+then fall back to cached data instead of spending a call the API would
+reject anyway.
+
+The lane is read from a context variable, so code deep inside a fetch does
+not need a priority argument threaded through it. :class:`.cache.SourceCache`
+marks its background refreshes with :func:`background`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import asyncio
+import threading
+import time
+
+INTERACTIVE, BACKGROUND = "interactive", "background"
+
+_priority: ContextVar[str] = ContextVar("rate_budget_priority", default=INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def background():
+    """Run the enclosed calls in the background lane."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """``rate_per_minute`` tokens refilled continuously, holding at most ``burst``.
+
+    Safe to share between threads and event loops: async waiters poll with
+    ``asyncio.sleep`` rather than blocking the loop.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_wait: Optional[Dict[str, float]] = None):
+        self.rate = max(rate_per_minute, 1e-6) / 60.0
+        self.burst = max(1, burst)
+        self.max_wait = max_wait or {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+        self.stats = {'granted': 0, 'denied': 0, INTERACTIVE: 0, BACKGROUND: 0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try(self, priority: str) -> float:
+        """Take a token (returns 0.0) or return how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Background work never takes a token an interactive caller is waiting for
+            blocked = priority == BACKGROUND and self._interactive_waiting > 0
+            if self._tokens >= 1 and not blocked:
+                self._tokens -= 1
+                self.stats['granted'] += 1
+                self.stats[priority] += 1
+                return 0.0
+            return max((1 - self._tokens) / self.rate, 0.01)
+
+    def _wait_for(self, priority: str, timeout: Optional[float]) -> float:
+        return self.max_wait.get(priority, 0.0) if timeout is None else timeout
+
+    def _enter(self, priority: str):
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+
+    def _leave(self, priority: str, granted: bool):
+        with self._lock:
+            if priority == INTERACTIVE:
+                self._interactive_waiting -= 1
+            if not granted:
+                self.stats['denied'] += 1
+
+    def acquire(self, priority: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block up to the lane's wait limit for a token; False when over budget."""
+        priority = priority or current_priority()
+        deadline = time.monotonic() + self._wait_for(priority, timeout)
+        self._enter(priority)
+        granted = False
+        try:
+            while True:
+                wait = self._try(priority)
+                if wait == 0.0:
+                    granted = True
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(wait, remaining))
+        finally:
+            self._leave(priority, granted)
+
+    async def aacquire(self, priority: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Async :meth:`acquire`."""
+        priority = priority or current_priority()
+        deadline = time.monotonic() + self._wait_for(priority, timeout)
+        self._enter(priority)
+        granted = False
+        try:
+            while True:
+                wait = self._try(priority)
+                if wait == 0.0:
+                    granted = True
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            self._leave(priority, granted)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {'tokens': round(self._tokens, 2), 'interactive_waiting': self._interactive_waiting,
+                    **self.stats}
@@ -0,0 +1,182 @@
+"""Optional Redis tier shared by every worker process.
+
+Enabled by setting ``REDIS_URL``. Values are packed with msgpack (JSON when
+msgpack is missing) and compressed with zstd (zlib fallback) above a small
+size threshold. Keys carry :data:`CACHE_KEY_VERSION` so a deploy that
+changes payload shapes simply stops reading the old entries.
+"""
+from typing import Any, Hashable, Optional, Tuple
+import json
+import threading
+import time
+import zlib
+from .config import get_settings
+from .logging_setup import get_logger
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# Bump whenever a cached payload changes shape
+CACHE_KEY_VERSION = 1
+
+COMPRESS_MIN_BYTES = 512
+
+# After a failed call the backend is bypassed for this long, doubling per
+# consecutive failure, so an outage does not cost a socket timeout per lookup
+FAILURE_BACKOFF = 1.0
+MAX_FAILURE_BACKOFF = 30.0
+
+# One-byte headers: serialization format, then compression
+_FMT_MSGPACK, _FMT_JSON = b"m", b"j"
+_COMP_NONE, _COMP_ZSTD, _COMP_ZLIB = b"-", b"z", b"l"
+
+
+def encode(value: Any) -> bytes:
+    if MSGPACK_AVAILABLE:
+        fmt, body = _FMT_MSGPACK, msgpack.packb(value, use_bin_type=True)
+    else:
+        fmt, body = _FMT_JSON, json.dumps(value, separators=(",", ":")).encode()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return fmt + _COMP_NONE + body
+    if ZSTD_AVAILABLE:
+        return fmt + _COMP_ZSTD + zstandard.ZstdCompressor(level=3).compress(body)
+    return fmt + _COMP_ZLIB + zlib.compress(body)
+
+
+def decode(blob: bytes) -> Any:
+    fmt, comp, body = blob[:1], blob[1:2], blob[2:]
+    if comp == _COMP_ZSTD:
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif comp == _COMP_ZLIB:
+        body = zlib.decompress(body)
+    if fmt == _FMT_MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class RedisCacheBackend:
+    """Stores ``(fresh_until, value)`` pairs; Redis expiry covers the stale window.
+
+    Acts as a circuit breaker: after a failure, calls return immediately as
+    misses until the backoff has passed.
+    """
+
+    def __init__(self, client, prefix: Optional[str] = None, version: int = CACHE_KEY_VERSION):
+        self._client = client
+        self._prefix = f"{prefix or get_settings().redis_key_prefix}:v{version}"
+        self._lock = threading.Lock()
+        self._backoff = 0.0
+        self._open_until = 0.0
+
+    def key(self, namespace: str, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self._prefix, namespace, *map(str, parts)])
+
+    def available(self) -> bool:
+        """False while backing off after a failure."""
+        return time.monotonic() >= self._open_until
+
+    def _failed(self, op: str, e: Exception):
+        with self._lock:
+            self._backoff = min(MAX_FAILURE_BACKOFF, self._backoff * 2 if self._backoff else FAILURE_BACKOFF)
+            self._open_until = time.monotonic() + self._backoff
+            backoff = self._backoff
+        logger.warning(f"Redis {op} failed ({e}); using in-process cache only for {backoff:.0f}s")
+
+    def _succeeded(self):
+        if self._backoff:
+            with self._lock:
+                self._backoff = 0.0
+            logger.info("Redis reachable again; shared cache resumed")
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, fresh_until)`` in wall-clock seconds, or None."""
+        if not self.available():
+            return None
+        try:
+            blob = self._client.get(self.key(namespace, key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        self._succeeded()
+        if blob is None:
+            return None
+        try:
+            fresh_until, value = decode(blob)
+        except Exception as e:
+            logger.warning(f"Undecodable Redis entry for {namespace}:{key}: {e}")
+            return None
+        return value, fresh_until
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float, stale_ttl: float):
+        if not self.available():
+            return
+        try:
+            blob = encode([time.time() + ttl, value])
+            self._client.set(self.key(namespace, key), blob, px=max(1, int((ttl + stale_ttl) * 1000)))
+        except Exception as e:
+            self._failed("set", e)
+            return
+        self._succeeded()
+
+
+_backend: Optional[RedisCacheBackend] = None
+_backend_checked = False
+_backend_lock = threading.Lock()
+
+
+def get_shared_backend() -> Optional[RedisCacheBackend]:
+    """Return the configured Redis backend, or None when disabled/unreachable.
+
+    Connection problems are logged once and the process falls back to its
+    in-memory tier rather than failing requests.
+    """
+    global _backend, _backend_checked
+    if _backend_checked:
+        return _backend
+    with _backend_lock:
+        if _backend_checked:
+            return _backend
+        url = get_settings().redis_url
+        if url and not REDIS_AVAILABLE:
+            logger.warning("REDIS_URL set but redis package not installed; shared cache disabled")
+        elif url:
+            try:
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                client.ping()
+                _backend = RedisCacheBackend(client)
+                logger.info("Shared Redis cache enabled")
+            except Exception as e:
+                logger.warning(f"Redis unavailable ({e}); using in-process cache only")
+        _backend_checked = True
+    return _backend
+
+
+def shared_backend_resolved() -> bool:
+    """True once :func:`get_shared_backend` no longer needs to connect (and so cannot block)."""
+    return _backend_checked
+
+
+def set_shared_backend(backend: Optional[RedisCacheBackend]):
+    """Install (or clear) the shared backend explicitly, e.g. a fakeredis one in tests."""
+    global _backend, _backend_checked
+    with _backend_lock:
+        _backend = backend
+        _backend_checked = True
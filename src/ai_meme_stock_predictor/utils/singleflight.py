@@ -0,0 +1,67 @@
+"""Request coalescing: concurrent calls for the same key share one execution."""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from concurrent.futures import Future
+import asyncio
+import threading
+
+
+class SingleFlight:
+    """Thread-based singleflight.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block on the same future and receive its result (or exception).
+    Nothing is remembered once the call completes - pair it with a cache
+    for that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of :class:`SingleFlight`.
+
+    The shared work runs as a task and each caller awaits it through
+    ``asyncio.shield``, so one caller being cancelled does not cancel the
+    execution the others are waiting on. Calls are keyed per event loop.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda _t: self._tasks.pop(flight_key, None))
+        return await asyncio.shield(task)
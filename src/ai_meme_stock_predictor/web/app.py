@@ -1,11 +1,22 @@
-from fastapi import FastAPI, Body
+from typing import List
+import json
+from fastapi import FastAPI, Body, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from pydantic import BaseModel
 from ..agent.portia_agent import PortiaMemeAgent
+from ..data_sources.market_data import alpha_budget
+from ..data_sources.mention_index import get_mention_index
+from ..data_sources.reddit_stream import stop_ingestor
+from ..utils.config import get_settings
 from ..utils.logging_setup import init_logging
+from .limits import ConcurrencyLimiter, QueueFull
 
 init_logging()
 app = FastAPI(title="AI Meme Stock Predictor")
 agent = PortiaMemeAgent()
+# Queries run on the async pipeline; this caps how many are in flight per worker
+query_limiter = ConcurrencyLimiter(get_settings().api_max_concurrency, get_settings().api_max_queue)
 
 class Query(BaseModel):
     conversation_id: str
@@ -13,9 +24,75 @@ class Query(BaseModel):
 
 @app.post("/query")
 async def query(payload: Query):
-    result = agent.handle_query(payload.conversation_id, payload.text)
-    return result
+    try:
+        async with query_limiter:
+            return await agent.ahandle_query(payload.conversation_id, payload.text)
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Too many queries in flight, retry shortly")
+
+class BatchQuery(BaseModel):
+    tickers: List[str]
+
+class _LimitedStream(StreamingResponse):
+    """Streaming response that gives back its ``query_limiter`` slot however sending ends,
+    including when the client is gone before the body iterator ever starts."""
+
+    def __init__(self, content, limiter: ConcurrencyLimiter, **kwargs):
+        super().__init__(content, **kwargs)
+        self._limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        except BaseException as e:
+            await self._limiter.__aexit__(type(e), e, e.__traceback__)
+            raise
+        await self._limiter.__aexit__(None, None, None)
+
+@app.post("/query/batch")
+async def query_batch(payload: BatchQuery):
+    """Stream one NDJSON line per unique ticker, in completion order."""
+    limit = get_settings().batch_max_tickers
+    if len(payload.tickers) > limit:
+        raise HTTPException(status_code=422, detail=f"At most {limit} tickers per batch")
+    # A batch holds one query slot until its stream ends, so batches count
+    # against the same per-worker cap as single queries
+    limiter = query_limiter
+    try:
+        await limiter.__aenter__()
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Too many queries in flight, retry shortly")
+
+    async def lines():
+        # run_many blocks on its worker pools; drain it in the threadpool, off the event loop
+        async for result in iterate_in_threadpool(agent.workflow.run_many(payload.tickers)):
+            yield json.dumps(result) + "\n"
+
+    return _LimitedStream(lines(), limiter, media_type="application/x-ndjson")
+
+@app.get("/trending")
+async def trending(hours: float = 6, top: int = 10):
+    """Most-mentioned tickers in ingested posts, with per-bucket counts (needs REDDIT_STREAM_ENABLED)."""
+    index = get_mention_index()
+    buckets = max(1, int(hours * 3600 // index.bucket_seconds))
+    return {
+        'hours': hours,
+        'tickers': [
+            {'ticker': ticker, 'mentions': count, 'buckets': index.bucket_counts(ticker, buckets)}
+            for ticker, count in index.trending(hours * 3600, top)
+        ],
+    }
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    return {"query": query_limiter.snapshot(), "alphavantage": alpha_budget().snapshot()}
+
+@app.on_event("shutdown")
+async def shutdown():
+    await agent.async_workflow.aclose()
+    agent.close()
+    stop_ingestor()
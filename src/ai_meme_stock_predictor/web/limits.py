@@ -0,0 +1,105 @@
+"""Admission control shared by the web front-ends."""
+from typing import Dict, Hashable, Optional
+import asyncio
+import time
+
+
+class QueueFull(Exception):
+    """Raised when a limiter's wait queue is already at capacity."""
+
+
+class ConcurrencyLimiter:
+    """Async semaphore that also reports queue depth and latency counters.
+
+    ``max_queue`` bounds how many callers may wait for a slot (0 means
+    unbounded); beyond that :class:`QueueFull` is raised immediately so the
+    caller can shed load instead of piling up requests.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's loop, not the import-time one
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def __aenter__(self):
+        if self.max_queue and self.waiting >= self.max_queue and self.in_flight >= self.max_concurrency:
+            self.rejected += 1
+            raise QueueFull()
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await self._get_semaphore().acquire()
+        finally:
+            self.waiting -= 1
+        self._total_wait += time.monotonic() - queued_at
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._get_semaphore().release()
+        if exc_type is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+        return False
+
+    def snapshot(self) -> Dict:
+        done = self.completed + self.failed
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'avg_queue_wait_ms': round(self._total_wait / done * 1000, 2) if done else 0.0,
+        }
+
+
+# Reply for a chat user already at their PerKeyLimiter cap (both Telegram bots)
+BUSY_MESSAGE = (
+    "⏳ I'm still working on your previous analyses, {user_name}! "
+    "I'll pick up new tickers as soon as those finish."
+)
+
+
+class PerKeyLimiter:
+    """Caps simultaneous work per key (e.g. per chat user) without queueing.
+
+    Used from a single event loop, so plain counters are sufficient.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active: Dict[Hashable, int] = {}
+
+    def try_acquire(self, key: Hashable) -> bool:
+        count = self._active.get(key, 0)
+        if count >= self.limit:
+            return False
+        self._active[key] = count + 1
+        return True
+
+    def release(self, key: Hashable):
+        count = self._active.get(key, 0) - 1
+        if count > 0:
+            self._active[key] = count
+        else:
+            self._active.pop(key, None)
+
+    def active(self, key: Hashable) -> int:
+        return self._active.get(key, 0)
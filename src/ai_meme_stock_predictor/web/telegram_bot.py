@@ -3,11 +3,15 @@ from typing import Optional
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
 from ..agent.portia_agent import PortiaMemeAgent
+from ..utils.config import get_settings
 from ..utils.logging_setup import get_logger
+from .limits import BUSY_MESSAGE, PerKeyLimiter
 
 logger = get_logger(__name__)
 
 _bot_agent: Optional[PortiaMemeAgent] = None
+# One user's burst of queries can't occupy every concurrent update slot
+_user_limiter = PerKeyLimiter(get_settings().telegram_max_analyses_per_user)
 
 def get_agent() -> PortiaMemeAgent:
     global _bot_agent
@@ -69,13 +73,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(thanks_response)
         return
     
+    if not _user_limiter.try_acquire(user_id):
+        await update.message.reply_text(BUSY_MESSAGE.format(user_name=user_name))
+        return
+
     try:
-        result = agent.handle_query(str(user_id), text)
+        result = await agent.ahandle_query(str(user_id), text)
         response = result.get('response', 'Sorry, I had trouble processing that request.')
         
         # Make response more personal and friendly
-        if 'memes?' in text.lower():
-            ticker = text.split()[0].upper()
+        ticker = (result.get('details') or {}).get('ticker')
+        if ticker:
             personal_touch = f"\n\n💡 Hey {user_name}, here's my analysis for {ticker}! "
             response += personal_touch + "Remember, this is for entertainment and educational purposes only. Always do your own research! 📊✨"
         else:
@@ -88,6 +96,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         error_msg = f"Oops {user_name}! 😅 I encountered a hiccup processing that. Could you try again? If the issue persists, use /help for guidance."
         await update.message.reply_text(error_msg)
         logger.error(f"Error handling message: {e}")
+    finally:
+        _user_limiter.release(user_id)
 
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_name = update.effective_user.first_name or "Friend"
@@ -238,7 +248,13 @@ def build_application():
     token = os.getenv('TELEGRAM_BOT_TOKEN')
     if not token:
         raise RuntimeError('TELEGRAM_BOT_TOKEN missing')
-    app = ApplicationBuilder().token(token).build()
+    # Process updates concurrently so one slow analysis doesn't block other chats
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(get_settings().telegram_concurrent_updates)
+        .build()
+    )
     
     # Add all command handlers
     app.add_handler(CommandHandler('start', start))
@@ -26,7 +26,10 @@ def main():
         from telegram import Update
         from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
         from src.ai_meme_stock_predictor.agent.portia_agent import PortiaMemeAgent
+        from src.ai_meme_stock_predictor.data_sources.price_store import get_price_store
+        from src.ai_meme_stock_predictor.data_sources.ticker_universe import parse_ticker
         from src.ai_meme_stock_predictor.utils.config import get_settings
+        from src.ai_meme_stock_predictor.web.limits import BUSY_MESSAGE, PerKeyLimiter
         
         # Get settings
         settings = get_settings()
@@ -40,6 +43,9 @@ def main():
         agent = PortiaMemeAgent()
         print("✅ AI agent initialized")
         
+        # Cap analyses per user so one chat can't starve the others
+        user_limiter = PerKeyLimiter(settings.telegram_max_analyses_per_user)
+        
         # Bot handlers
         async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             user_name = update.effective_user.first_name or "Friend"
@@ -94,21 +100,18 @@ def main():
                 await update.message.reply_text(thanks_response)
                 return
             
+            if not user_limiter.try_acquire(user_id):
+                await update.message.reply_text(BUSY_MESSAGE.format(user_name=user_name))
+                return
+            
             try:
                 import time
                 start_time = time.time()
                 
                 # Send initial "analyzing" message for ticker queries
-                text_lower = text.lower()
-                words = [w.strip("$?!. ,") for w in text_lower.split()]
-                is_ticker_query = False
-                potential_ticker = None
-                
-                for w in words:
-                    if w.isalpha() and 2 < len(w) <= 5:
-                        potential_ticker = w.upper()
-                        is_ticker_query = True
-                        break
+                # Same memoized parse the agent uses, so the text is only parsed once
+                potential_ticker = parse_ticker(text)
+                is_ticker_query = potential_ticker is not None
                 
                 if is_ticker_query and potential_ticker:
                     wait_message = (
@@ -117,11 +120,11 @@ def main():
                         f"🔴 Scanning Reddit discussions\n"
                         f"🐦 Checking Twitter sentiment\n"
                         f"🧠 Running AI analysis\n\n"
-                        f"⏳ This will take 15-30 seconds. Please wait..."
+                        f"⏳ This usually takes a few seconds. Please wait..."
                     )
                     await update.message.reply_text(wait_message)
                 
-                result = agent.handle_query(str(user_id), text)
+                result = await agent.ahandle_query(str(user_id), text)
                 response = result.get('response', 'Sorry, I had trouble processing that request.')
                 details = result.get('details') or {}
                 pred = details.get('prediction', {})
@@ -186,10 +189,19 @@ def main():
                         
                         enriched_block += f"• Confidence: {pred.get('confidence', 0):.3f}\n"
                     
-                    # ASCII Price Chart
-                    if history and len(history) >= 5:
+                    # ASCII Price Chart, read from the local price store's arrays when it has the bars
+                    store = get_price_store()
+                    bars = store.bars(ticker)[-20:] if store is not None else []
+                    if len(bars) >= 5:
+                        closes = bars['close']
+                        last_close, last_volume = float(closes[-1]), int(bars['volume'][-1])
+                    elif history and len(history) >= 5:
                         closes = [h['close'] for h in history][-20:]
-                        lo, hi = min(closes), max(closes)
+                        last_close, last_volume = history[-1]['close'], history[-1]['volume']
+                    else:
+                        closes = []
+                    if len(closes):
+                        lo, hi = float(min(closes)), float(max(closes))
                         span = hi - lo or 1
                         blocks = "▁▂▃▄▅▆▇█"
                         def map_close(c):
@@ -201,9 +213,7 @@ def main():
                         enriched_block += f"• Range: ${lo:.2f} - ${hi:.2f}\n"
                         enriched_block += f"• Chart: {spark}\n"
                         
-                        if history:
-                            last = history[-1]
-                            enriched_block += f"• Latest: ${last['close']:.2f} (Vol: {last['volume']:,})\n"
+                        enriched_block += f"• Latest: ${last_close:.2f} (Vol: {last_volume:,})\n"
                     
                     # Data Quality Warning
                     if meme_score < 0.01 and feats.get('social_sentiment', 0) == 0:
@@ -234,6 +244,8 @@ def main():
                 error_msg = f"Oops {user_name}! 😅 I encountered a hiccup processing that. Could you try again? If the issue persists, use /help for guidance."
                 await update.message.reply_text(error_msg)
                 print(f"❌ Error handling message: {e}")
+            finally:
+                user_limiter.release(user_id)
         
         async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             user_name = update.effective_user.first_name or "Friend"
@@ -455,7 +467,12 @@ def main():
         
         # Build application
         print("🔧 Building bot application...")
-        app = ApplicationBuilder().token(settings.telegram_bot_token).build()
+        app = (
+            ApplicationBuilder()
+            .token(settings.telegram_bot_token)
+            .concurrent_updates(settings.telegram_concurrent_updates)
+            .build()
+        )
         
         # Add handlers
         app.add_handler(CommandHandler('start', start))
@@ -1,5 +1,9 @@
-import sys, pathlib
+import os, sys, pathlib
 # Ensure project root (where src/ lives) is on sys.path for imports
 root = pathlib.Path(__file__).resolve().parent.parent
 if str(root) not in sys.path:
     sys.path.insert(0, str(root))
+# Keep test runs independent of local data files (score database, symbol list, price store)
+os.environ.setdefault("SCORE_STORE_PATH", "")
+os.environ.setdefault("TICKER_UNIVERSE_PATH", "")
+os.environ.setdefault("PRICE_STORE_PATH", "")
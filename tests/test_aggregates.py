@@ -0,0 +1,95 @@
+import pytest
+
+from src.ai_meme_stock_predictor.analysis import aggregates
+from src.ai_meme_stock_predictor.analysis.aggregates import TickerAggregate, _items, incremental_features
+from src.ai_meme_stock_predictor.analysis.features import score_keyed
+from src.ai_meme_stock_predictor.analysis.meme_extraction import meme_intensity
+
+NOW = 1_700_000_000.0
+
+
+def _post(i, age_hours=0.0, title="GME to the moon"):
+    return {"id": f"p{i}", "title": title, "selftext": "", "created_utc": NOW - age_hours * 3600}
+
+
+def _counting_scorer(calls):
+    def score(items):
+        calls.append(len(items))
+        return score_keyed(items)
+    return score
+
+
+def test_refresh_only_scores_new_items_and_matches_scratch():
+    calls = []
+    agg = TickerAggregate("GME", window_seconds=3600 * 24)
+    first = [_post(1, 2), _post(2, 1, "bagholder here")]
+    agg.update(_items(first, []), _counting_scorer(calls), now=NOW)
+    tweets = [{"id": "1700000000000000001", "text": "GME tendies", "created_at": "2023-11-14T22:00:00.000Z"}]
+    second = [_post(3, 0, "apes strong")] + first
+    agg.update(_items(second, tweets), _counting_scorer(calls), now=NOW)
+
+    assert calls == [2, 2]
+    feats = agg.features()
+    vader, _ = score_keyed([(i.source, None, i.text) for i in _items(second, tweets)])
+    assert feats["meme_intensity"] == meme_intensity(second + tweets, "GME")
+    assert feats["social_sentiment"] == pytest.approx(sum(vader) / len(vader))
+
+
+def test_items_older_than_window_drop_out_once_unfetched():
+    agg = TickerAggregate("GME", window_seconds=3600)
+    agg.update(_items([_post(1, 5), _post(2, 0)], []), score_keyed, now=NOW)
+    assert len(agg._contributions) == 2  # old post is still being fetched
+    agg.update(_items([_post(2, 0)], []), score_keyed, now=NOW)
+    assert list(agg._contributions) == [("reddit", "p2")]
+
+
+def test_missing_ids_fall_back_to_scratch(monkeypatch):
+    monkeypatch.setattr(aggregates, "_aggregates", {})
+    assert incremental_features("GME", [{"title": "no id"}], [], score_keyed) is None
+    assert incremental_features("GME", [_post(1)], [], score_keyed) is not None
+
+
+def test_comments_from_older_threads_are_not_hidden_by_the_watermark():
+    calls = []
+    agg = TickerAggregate("GME", window_seconds=3600 * 24)
+    posts = [_post(1, 0)]
+    agg.update(_items(posts, []), _counting_scorer(calls), now=NOW)
+    comment = {"id": "p1", "kind": "comment", "title": "", "selftext": "GME diamond hands",
+               "created_utc": NOW - 3600}
+    agg.update(_items(posts + [comment], []), _counting_scorer(calls), now=NOW)
+    agg.update(_items(posts + [comment], []), _counting_scorer(calls), now=NOW)
+
+    assert calls == [1, 1]  # nothing fresh on the third refresh, so no scoring call
+    assert len(agg._contributions) == 2  # same id as the post, separate namespace
+
+
+def test_aggregate_scores_the_same_text_as_the_scratch_path():
+    from src.ai_meme_stock_predictor.analysis.features import keyed_texts
+    posts = [_post(1), {"id": "c1", "kind": "comment", "title": "", "selftext": "GME to the moon",
+                        "created_utc": NOW}]
+    tweets = [{"id": "1700000000000000001", "text": "$GME rocket", "created_at": "2023-11-14T22:00:00.000Z"}]
+    assert [(i.source, i.post_id, i.text) for i in _items(posts, tweets)] == keyed_texts(posts, tweets)
+
+
+def test_batch_scores_only_items_the_aggregate_has_not_seen(monkeypatch):
+    from src.ai_meme_stock_predictor.agent import workflow as workflow_module
+    monkeypatch.setattr(aggregates, "_aggregates", aggregates.LRUCache(8))
+    calls = []
+    monkeypatch.setattr(workflow_module, "score_keyed", _counting_scorer(calls))
+    wf = workflow_module.MemeStockWorkflow()
+    sources = {"reddit_posts": [_post(1), _post(2)], "tweets": [], "quote": {}, "history": []}
+    first = list(wf._score_batch([("GME", sources)]))
+    sources = dict(sources, reddit_posts=[_post(3)] + sources["reddit_posts"])
+    second = list(wf._score_batch([("GME", sources)]))
+
+    assert calls == [2, 1]
+    assert first[0]["features"]["meme_intensity"] > 0 and second[0]["ticker"] == "GME"
+
+
+def test_feature_window_follows_the_search_window_unless_set(monkeypatch):
+    settings = aggregates.get_settings()
+    monkeypatch.setattr(settings, "feature_window_hours", None)
+    monkeypatch.setattr(settings, "reddit_search_hours", 24.0)
+    assert settings.feature_window_seconds() == 24 * 3600
+    monkeypatch.setattr(settings, "feature_window_hours", 0.0)
+    assert settings.feature_window_seconds() == 0
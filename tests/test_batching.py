@@ -0,0 +1,42 @@
+import threading
+from src.ai_meme_stock_predictor.analysis.batching import MicroBatcher
+
+
+def test_concurrent_submits_share_forward_passes():
+    seen = []
+
+    def forward(items):
+        seen.append(len(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(forward, max_batch_size=100, max_wait_ms=100)
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def caller(n):
+        barrier.wait()
+        results[n] = batcher.submit([n, n + 100])
+
+    threads = [threading.Thread(target=caller, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {n: [n * 10, (n + 100) * 10] for n in range(8)}
+    assert sum(seen) == 16
+    assert len(seen) < 8
+
+
+def test_batch_failure_reaches_every_caller():
+    def forward(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(forward, max_batch_size=10, max_wait_ms=1)
+    try:
+        batcher.submit(["x"])
+    except ValueError as e:
+        assert "model exploded" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    assert batcher.submit([]) == []
@@ -0,0 +1,56 @@
+import time
+from datetime import datetime
+from src.ai_meme_stock_predictor.utils.cache import (
+    FRESH, MARKET_TZ, STALE, SourceCache, Uncached, seconds_until_market_close,
+)
+
+
+def test_fresh_hit_skips_fetch():
+    cache = SourceCache("test-fresh", ttl=60, stale_ttl=60)
+    calls = []
+    fetch = lambda: calls.append(1) or {"price": 1.0}
+    assert cache.get_or_fetch("GME", fetch) == {"price": 1.0}
+    assert cache.get_or_fetch("GME", fetch) == {"price": 1.0}
+    assert len(calls) == 1
+    assert cache.lookup("GME")[1] == FRESH
+
+
+def test_empty_results_are_not_cached():
+    cache = SourceCache("test-empty", ttl=60, stale_ttl=60)
+    calls = []
+    fetch = lambda: calls.append(1) or []
+    cache.get_or_fetch("AMC", fetch)
+    cache.get_or_fetch("AMC", fetch)
+    assert len(calls) == 2
+
+
+def test_uncached_fallbacks_are_returned_but_never_stored():
+    cache = SourceCache("test-uncached", ttl=0.05, stale_ttl=60)
+    cache.get_or_fetch("GME", lambda: [{"id": "old"}])
+    time.sleep(0.06)
+    # A denied background refresh hands back last-known data; it must not look fresh again
+    cache._refresh("GME", lambda: Uncached(cache.peek("GME")))
+    assert cache.lookup("GME")[1] == STALE
+    assert cache.get_or_fetch("AMC", lambda: Uncached([{"id": "fallback"}])) == [{"id": "fallback"}]
+    assert cache.lookup("AMC")[1] != FRESH
+
+
+def test_stale_value_served_while_refreshing():
+    cache = SourceCache("test-stale", ttl=0.05, stale_ttl=60)
+    values = iter([[{"id": "old"}], [{"id": "new"}]])
+    fetch = lambda: next(values)
+    cache.get_or_fetch("TSLA", fetch)
+    time.sleep(0.06)
+    assert cache.lookup("TSLA")[1] == STALE
+    assert cache.get_or_fetch("TSLA", fetch) == [{"id": "old"}]
+    deadline = time.monotonic() + 2
+    while cache.lookup("TSLA")[0] != [{"id": "new"}] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.lookup("TSLA") == ([{"id": "new"}], FRESH)
+
+
+def test_history_ttl_runs_to_next_weekday_close():
+    friday_evening = datetime(2024, 1, 5, 17, 0, tzinfo=MARKET_TZ)
+    assert seconds_until_market_close(friday_evening) == (2 * 24 + 23) * 3600
+    tuesday_morning = datetime(2024, 1, 2, 10, 0, tzinfo=MARKET_TZ)
+    assert seconds_until_market_close(tuesday_morning) == 6 * 3600
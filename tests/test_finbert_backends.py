@@ -0,0 +1,56 @@
+import pytest
+
+from src.ai_meme_stock_predictor.analysis.finbert_backends import load_backend, parity_check
+
+
+def _fake_backend(scores):
+    def backend(texts, batch_size=8, truncation=True, max_length=None):
+        return [[{'label': 'Positive', 'score': p}, {'label': 'Negative', 'score': 1 - p}]
+                for p in scores[:len(texts)]]
+    return backend
+
+
+def test_parity_check_passes_within_tolerance():
+    report = parity_check(_fake_backend([0.9, 0.2]), _fake_backend([0.89, 0.21]), ["a", "b"])
+    assert report['passed']
+    assert report['label_agreement'] == 1.0
+    assert report['max_abs_diff'] == pytest.approx(0.02)
+
+
+def test_parity_check_flags_label_flip():
+    report = parity_check(_fake_backend([0.52]), _fake_backend([0.48]), ["a"], tolerance=0.5)
+    assert not report['passed']
+    assert report['label_agreement'] == 0.0
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        load_backend("tensorrt", "any-model")
+
+
+def _tiny_model(path):
+    transformers = pytest.importorskip("transformers")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "stock", "moon", "crash", "buy", "sell"]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    tokenizer = transformers.BertTokenizer(str(path / "vocab.txt"))
+    config = transformers.BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64, num_labels=3,
+                                     id2label={0: "Neutral", 1: "Positive", 2: "Negative"},
+                                     label2id={"Neutral": 0, "Positive": 1, "Negative": 2})
+    transformers.BertForSequenceClassification(config).eval().save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("kind", ["int8", "onnx"])
+def test_backend_parity_with_torch(tmp_path, kind):
+    pytest.importorskip("torch")
+    if kind == "onnx":
+        pytest.importorskip("onnxruntime")
+    model = _tiny_model(tmp_path / "model")
+    texts = ["buy stock", "sell sell crash", "moon", "stock moon buy sell crash"]
+    reference = load_backend("torch", model)
+    candidate = load_backend(kind, model, onnx_path=str(tmp_path / "model.onnx"))
+    report = parity_check(reference, candidate, texts, tolerance=0.1)
+    assert report['texts'] == len(texts)
+    assert report['max_abs_diff'] <= 0.1
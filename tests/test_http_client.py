@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from src.ai_meme_stock_predictor.data_sources import http_client
+from src.ai_meme_stock_predictor.utils.config import settings
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_GET(self):
+        type(self).calls += 1
+        status = 503 if type(self).calls == 1 else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    _FlakyHandler.calls = 0
+    server = HTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def test_session_is_shared_and_retries_5xx(monkeypatch):
+    monkeypatch.setattr(settings, "http_backoff_factor", 0.01)
+    monkeypatch.setattr(settings, "http_backoff_jitter", 0.01)
+    monkeypatch.setattr(http_client, "_session", None)
+    server, url = _serve()
+    try:
+        session = http_client.get_session()
+        assert http_client.get_session() is session
+        r = session.get(url, timeout=5)
+        assert r.status_code == 200
+        assert _FlakyHandler.calls == 2
+    finally:
+        server.shutdown()
+
+
+def test_aget_retries_5xx(monkeypatch):
+    monkeypatch.setattr(settings, "http_backoff_factor", 0.01)
+    monkeypatch.setattr(settings, "http_backoff_jitter", 0.01)
+    server, url = _serve()
+
+    async def go():
+        try:
+            return await http_client.aget(url, timeout=5)
+        finally:
+            await http_client.close_async_client()
+
+    try:
+        r = asyncio.run(go())
+        assert r.status_code == 200
+        assert _FlakyHandler.calls == 2
+    finally:
+        server.shutdown()
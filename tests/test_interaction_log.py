@@ -0,0 +1,26 @@
+import threading
+from src.ai_meme_stock_predictor.agent.interaction_log import InteractionLogger
+
+
+def test_interactions_are_batched_and_flushed_on_close():
+    prompts = []
+    log = InteractionLogger(sink=prompts.append, maxsize=100, batch_size=50, flush_interval=5.0)
+    for i in range(5):
+        assert log.submit("c1", f"GME memes? {i}", "to the moon", {"type": "analysis"})
+    log.close()
+
+    assert len(prompts) == 1
+    assert "Log these 5 interactions" in prompts[0]
+    assert "GME memes? 4" in prompts[0]
+
+
+def test_full_queue_sheds_load_without_blocking():
+    release = threading.Event()
+    log = InteractionLogger(sink=lambda prompt: release.wait(5), maxsize=4, batch_size=1,
+                            flush_interval=0.0, sample_rate=0.0)
+    accepted = sum(log.submit("c1", "hi", "hello", {}) for _ in range(50))
+    release.set()
+    log.close()
+
+    assert accepted < 50
+    assert log.stats['sampled_out'] + log.stats['dropped'] == 50 - accepted
@@ -12,3 +12,32 @@ def test_meme_intensity_basic():
     ]
     val = meme_intensity(posts, 'TSLA')
     assert 0 < val <= 1.0
+
+
+def test_matcher_word_boundaries_and_multiword():
+    from src.ai_meme_stock_predictor.analysis.meme_extraction import MemeMatcher
+    m = MemeMatcher(["moon", "moonshot", "diamond hands", "HODL"])
+    counts = m.scan("Mooning? no. MOONSHOT and diamond\n hands, hodl hodl #gme $GME", "GME")
+    # moonshot, diamond hands, hodl (once per post) + the ticker
+    assert counts.keyword_hits == 4
+    assert counts.ticker_hashtags == 1
+    assert counts.tokens == 10
+    assert m.scan("apes moonwalk", "GME").keyword_hits == 0
+
+
+def test_lexicon_hot_reload(tmp_path, monkeypatch):
+    import os
+    from src.ai_meme_stock_predictor.analysis import meme_extraction
+    from src.ai_meme_stock_predictor.utils.config import settings
+    lexicon = tmp_path / "lexicon.txt"
+    lexicon.write_text("\n".join(f"term{i}" for i in range(5000)))
+    monkeypatch.setattr(settings, "meme_lexicon_path", str(lexicon))
+    monkeypatch.setattr(meme_extraction, "_lexicon_state", None)
+    monkeypatch.setattr(meme_extraction, "_matcher", meme_extraction._matcher)
+
+    assert meme_extraction.get_matcher().scan("term4999 term5000", "X").keyword_hits == 1
+    lexicon.write_text("term5000\n")
+    os.utime(lexicon, ns=(0, 10**18))
+    matcher = meme_extraction.get_matcher()
+    assert matcher.scan("term4999 term5000", "X").keyword_hits == 1
+    assert "term5000" in matcher.keywords and "term4999" not in matcher.keywords
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from src.ai_meme_stock_predictor.data_sources import market_data
+from src.ai_meme_stock_predictor.data_sources.price_store import (
+    PriceStore, last_complete_session, rows_to_bars,
+)
+from src.ai_meme_stock_predictor.utils.cache import MARKET_TZ, clear_all
+from src.ai_meme_stock_predictor.utils.config import settings
+from src.ai_meme_stock_predictor.utils.rate_budget import BACKGROUND, INTERACTIVE, TokenBucket
+
+
+def _row(day, close):
+    return {"date": day, "open": close, "high": close, "low": close, "close": close, "volume": 100}
+
+
+def test_last_complete_session_skips_open_day_and_weekend():
+    assert last_complete_session(datetime(2024, 1, 8, 12, tzinfo=MARKET_TZ)) == date(2024, 1, 5)  # Monday midday
+    assert last_complete_session(datetime(2024, 1, 8, 17, tzinfo=MARKET_TZ)) == date(2024, 1, 8)
+
+
+def test_append_merges_and_reads_back_as_read_only_map(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.append("gme", rows_to_bars([_row("2024-01-02", 20.0), _row("2024-01-03", 21.0)])) == 2
+    assert store.append("GME", rows_to_bars([_row("2024-01-04", 23.0), _row("2024-01-03", 22.0)])) == 1
+
+    bars = store.bars("GME")
+    assert isinstance(bars, np.memmap) and not bars.flags.writeable
+    assert list(bars["close"]) == [20.0, 22.0, 23.0]
+    assert store.last_date("GME") == date(2024, 1, 4)
+
+
+class _Response:
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class _Session:
+    def __init__(self, series):
+        self.series = series
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return _Response({"Time Series (Daily)": {
+            day: {"1. open": c, "2. high": c, "3. low": c, "4. close": c, "6. volume": "10"}
+            for day, c in self.series
+        }})
+
+
+def test_history_fetches_only_new_completed_bars(monkeypatch, tmp_path):
+    clear_all()
+    session = _Session([("2024-01-05", "25"), ("2024-01-04", "24"), ("2024-01-03", "23")])
+    store = PriceStore(str(tmp_path))
+    store.append("GME", rows_to_bars([_row("2024-01-03", 23.0)]))
+    monkeypatch.setattr(settings, "alphavantage_api_key", "demo")
+    monkeypatch.setattr(market_data, "get_session", lambda: session)
+    monkeypatch.setattr(market_data, "get_price_store", lambda: store)
+    monkeypatch.setattr(market_data, "_budget", TokenBucket(60, 5, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    # Jan 5 is still trading, so its partial bar must not be stored
+    monkeypatch.setattr(market_data, "last_complete_session", lambda: date(2024, 1, 4))
+    monkeypatch.setattr(store, "is_current", lambda symbol: store.last_date(symbol) >= date(2024, 1, 4))
+
+    md = market_data.MarketData()
+    assert [r["close"] for r in md.history("GME")] == [23.0, 24.0]
+    assert [r["close"] for r in md.history("GME", days=1)] == [24.0]
+    assert session.calls == 1
+
+
+def test_open_maps_are_bounded(tmp_path):
+    store = PriceStore(str(tmp_path), max_open=4)
+    for i in range(20):
+        symbol = f"S{i}"
+        store.append(symbol, rows_to_bars([_row("2024-01-02", float(i))]))
+        assert store.bars(symbol)["close"][0] == float(i)
+    assert len(store._maps) == 4
+
+
+def test_missing_session_bar_is_retried_soon_not_next_close(monkeypatch, tmp_path):
+    clear_all()
+    # Just after the close: the new session's bar is not published yet
+    session = _Session([("2024-01-03", "23")])
+    store = PriceStore(str(tmp_path))
+    store.append("GME", rows_to_bars([_row("2024-01-03", 23.0)]))
+    monkeypatch.setattr(settings, "alphavantage_api_key", "demo")
+    monkeypatch.setattr(settings, "price_store_retry_seconds", 0.05)
+    monkeypatch.setattr(market_data, "get_session", lambda: session)
+    monkeypatch.setattr(market_data, "get_price_store", lambda: store)
+    monkeypatch.setattr(market_data, "_budget", TokenBucket(600, 5, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    monkeypatch.setattr(market_data, "last_complete_session", lambda: date(2024, 1, 4))
+    monkeypatch.setattr(store, "is_current", lambda symbol: store.last_date(symbol) >= date(2024, 1, 4))
+
+    md = market_data.MarketData()
+    assert len(md.bars("GME")) == 1
+    assert len(md.bars("GME")) == 1
+    assert session.calls == 1  # retry window still open
+    time.sleep(0.1)
+    session.series = [("2024-01-04", "24"), ("2024-01-03", "23")]
+    bars = md.bars("GME")
+    assert isinstance(bars, np.memmap) and list(bars["close"]) == [23.0, 24.0]
+    assert session.calls == 2
+
+
+def test_async_bars_keep_store_io_off_the_event_loop(monkeypatch, tmp_path):
+    clear_all()
+    session = _Session([("2024-01-04", "24"), ("2024-01-03", "23")])
+    store = PriceStore(str(tmp_path))
+    store.append("GME", rows_to_bars([_row("2024-01-03", 23.0)]))
+    threads = []
+    for name in ("bars", "append", "last_date"):
+        original = getattr(store, name)
+        monkeypatch.setattr(store, name, lambda *a, _f=original: threads.append(threading.get_ident()) or _f(*a))
+
+    async def aget(url, params=None, timeout=None):
+        return session.get(url, params, timeout)
+
+    monkeypatch.setattr(settings, "alphavantage_api_key", "demo")
+    monkeypatch.setattr(market_data, "aget", aget)
+    monkeypatch.setattr(market_data, "get_price_store", lambda: store)
+    monkeypatch.setattr(market_data, "_budget", TokenBucket(60, 5, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    monkeypatch.setattr(market_data, "last_complete_session", lambda: date(2024, 1, 4))
+    monkeypatch.setattr(store, "is_current", lambda symbol: store.last_date(symbol) >= date(2024, 1, 4))
+
+    async def go():
+        return threading.get_ident(), await market_data.AsyncMarketData().bars("GME")
+
+    loop_thread, bars = asyncio.run(go())
+    assert list(bars["close"]) == [23.0, 24.0]
+    assert threads and loop_thread not in threads
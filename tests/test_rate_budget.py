@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from datetime import date
+
+from src.ai_meme_stock_predictor.data_sources import market_data
+from src.ai_meme_stock_predictor.utils.cache import clear_all
+from src.ai_meme_stock_predictor.utils.config import settings
+from src.ai_meme_stock_predictor.utils.rate_budget import (
+    BACKGROUND, INTERACTIVE, TokenBucket, background, current_priority,
+)
+
+
+def test_bucket_denies_when_empty_and_lane_limit_passes():
+    bucket = TokenBucket(rate_per_minute=60, burst=1, max_wait={INTERACTIVE: 0.0, BACKGROUND: 0.0})
+    assert bucket.acquire()
+    assert not bucket.acquire()
+    assert bucket.acquire(timeout=1.5)
+    assert bucket.snapshot()['denied'] == 1
+
+
+def test_interactive_waiter_beats_background():
+    bucket = TokenBucket(rate_per_minute=600, burst=1, max_wait={INTERACTIVE: 2.0, BACKGROUND: 2.0})
+    assert bucket.acquire()
+    order = []
+
+    def run(priority):
+        bucket.acquire(priority)
+        order.append(priority)
+
+    waiters = [threading.Thread(target=run, args=(BACKGROUND,))]
+    waiters[0].start()
+    time.sleep(0.02)
+    waiters.append(threading.Thread(target=run, args=(INTERACTIVE,)))
+    waiters[1].start()
+    for t in waiters:
+        t.join(3)
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_background_context_sets_lane_for_async_acquire():
+    bucket = TokenBucket(rate_per_minute=60, burst=1, max_wait={INTERACTIVE: 0.0, BACKGROUND: 0.0})
+
+    async def main():
+        with background():
+            assert current_priority() == BACKGROUND
+            return await bucket.aacquire()
+
+    assert asyncio.run(main())
+    assert bucket.stats[BACKGROUND] == 1
+    assert current_priority() == INTERACTIVE
+
+
+class _Response:
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class _Session:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params["function"])
+        if params["function"] == "GLOBAL_QUOTE":
+            return _Response({"Global Quote": {"01. symbol": "GME", "05. price": "25.0", "06. volume": "10"}})
+        return _Response({"Time Series (Daily)": {
+            "2024-01-03": {"4. close": "22.0", "6. volume": "300"},
+            "2024-01-02": {"4. close": "20.0", "6. volume": "200"},
+        }})
+
+
+def _setup(monkeypatch, market_open, bucket):
+    clear_all()
+    session = _Session()
+    monkeypatch.setattr(settings, "alphavantage_api_key", "demo")
+    monkeypatch.setattr(market_data, "get_session", lambda: session)
+    monkeypatch.setattr(market_data, "is_market_open", lambda: market_open)
+    monkeypatch.setattr(market_data, "_budget", bucket)
+    return session
+
+
+def test_after_hours_quote_is_derived_from_history(monkeypatch):
+    session = _setup(monkeypatch, False, TokenBucket(60, 5, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    monkeypatch.setattr(market_data, "last_complete_session", lambda: date(2024, 1, 3))
+    md = market_data.MarketData()
+    quote = md.quote("GME")
+    assert quote["price"] == 22.0 and quote["change_percent"] == "10.0000%"
+    assert md.history("GME", days=1)[0]["close"] == 22.0
+    assert session.calls == ["TIME_SERIES_DAILY_ADJUSTED"]
+
+
+def test_after_hours_quote_from_stale_history_asks_for_a_real_quote(monkeypatch):
+    session = _setup(monkeypatch, False, TokenBucket(60, 5, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    # The Jan 4 bar never arrived (budget denied, or not published yet)
+    monkeypatch.setattr(market_data, "last_complete_session", lambda: date(2024, 1, 4))
+    md = market_data.MarketData()
+    assert md.quote("GME")["price"] == 25.0
+    assert session.calls == ["TIME_SERIES_DAILY_ADJUSTED", "GLOBAL_QUOTE"]
+
+
+def test_over_budget_serves_last_known_quote(monkeypatch):
+    session = _setup(monkeypatch, True, TokenBucket(60, 1, {INTERACTIVE: 0.0, BACKGROUND: 0.0}))
+    monkeypatch.setattr(settings, "cache_quote_ttl", 0)
+    monkeypatch.setattr(settings, "cache_stale_ttl", 0)
+    md = market_data.MarketData()
+    first = md.quote("GME")
+    assert first["price"] == 25.0
+    assert md.quote("GME") == first
+    assert session.calls == ["GLOBAL_QUOTE"]
@@ -0,0 +1,108 @@
+import threading
+from types import SimpleNamespace
+
+from src.ai_meme_stock_predictor.data_sources import reddit_comments, reddit_source
+from src.ai_meme_stock_predictor.data_sources.reddit_source import RedditSource
+
+NOW = 1_700_000_000.0
+
+
+def _submission(post_id, age_hours):
+    return SimpleNamespace(id=post_id, title=f"$GME {post_id}", selftext="", score=1, num_comments=0,
+                           created_utc=NOW - age_hours * 3600, url="")
+
+
+class _FakeClient:
+    def __init__(self, listing):
+        self.listing = listing
+        self.searched = []
+
+    def subreddit(self, name):
+        def search(query, **kwargs):
+            self.searched.append((name, kwargs))
+            for s in self.listing:
+                self.consumed = s.id
+                yield s
+        return SimpleNamespace(search=search)
+
+
+def test_search_uses_one_multireddit_dedupes_and_stops_at_cutoff(monkeypatch):
+    monkeypatch.setattr(reddit_source.settings, "reddit_search_subreddits", "wallstreetbets, stocks,wallstreetbets")
+    monkeypatch.setattr(reddit_source.settings, "reddit_search_hours", 24.0)
+    monkeypatch.setattr(reddit_source.time, "time", lambda: NOW)
+    client = _FakeClient([_submission("a", 1), _submission("b", 2), _submission("a", 1),
+                          _submission("old", 30), _submission("never", 31)])
+    source = RedditSource.__new__(RedditSource)
+    source._client = client
+
+    posts = source._search("GME", 50)
+
+    assert [p["id"] for p in posts] == ["a", "b"]
+    assert client.searched == [("wallstreetbets+stocks", {"limit": 50, "sort": "new", "time_filter": "day"})]
+    assert client.consumed == "old"  # stopped without pulling further results
+
+
+class _More:
+    def __init__(self, children):
+        self.children = children
+        self.expanded = False
+
+    def comments(self, update=True):
+        self.expanded = True
+        if isinstance(self.children, Exception):
+            raise self.children
+        return self.children
+
+
+def _comment(cid, replies=(), body="to the moon"):
+    return SimpleNamespace(id=cid, body=body, score=1, created_utc=NOW, permalink=f"/c/{cid}",
+                           replies=list(replies))
+
+
+def test_comment_walk_respects_depth_more_stubs_and_quota(monkeypatch):
+    monkeypatch.setattr(reddit_comments, "MoreComments", _More)
+    for name, value in [("reddit_comment_threads", 2), ("reddit_comments_max", 5),
+                        ("reddit_comment_depth", 2), ("reddit_comment_more_depth", 1),
+                        ("reddit_comment_budget", 5.0)]:
+        monkeypatch.setattr(reddit_comments.settings, name, value)
+    deep_more = _More([_comment("hidden")])
+    forests = {
+        "busy": [_comment("a", [_comment("a1", [_comment("a1x")]), deep_more]),
+                 _comment("gone", body="[removed]"), _More([_comment("b"), _More(AttributeError("fullname"))])],
+        "quiet": [_comment("q")],
+    }
+    monkeypatch.setattr(reddit_comments, "_local", threading.local())
+    client = SimpleNamespace(submission=lambda id: SimpleNamespace(comments=forests[id]))
+    posts = [{"id": "busy", "num_comments": 90}, {"id": "quiet", "num_comments": 3},
+             {"id": "dead", "num_comments": 0}]
+
+    comments = reddit_comments.fetch_comments(lambda: client, posts)
+
+    assert sorted(c["id"] for c in comments) == ["a", "a1", "b", "q"]
+    assert all(c["kind"] == "comment" for c in comments)
+    assert not deep_more.expanded  # below REDDIT_COMMENT_MORE_DEPTH
+
+    monkeypatch.setattr(reddit_comments.settings, "reddit_comments_max", 2)
+    assert len(reddit_comments.fetch_comments(lambda: client, posts)) == 2
+
+
+def test_each_comment_worker_walks_with_its_own_client(monkeypatch):
+    monkeypatch.setattr(reddit_comments, "_local", threading.local())
+    monkeypatch.setattr(reddit_comments.settings, "reddit_comment_threads", 6)
+    calls = []
+
+    def make_client():
+        client_no = len(calls)
+        calls.append(set())
+
+        def submission(id):
+            calls[client_no].add(threading.get_ident())
+            return SimpleNamespace(comments=[_comment(f"{id}-c")])
+        return SimpleNamespace(submission=submission)
+
+    posts = [{"id": f"t{i}", "num_comments": 10 + i} for i in range(6)]
+    comments = reddit_comments.fetch_comments(make_client, posts)
+
+    assert sorted(c["id"] for c in comments) == sorted(f"t{i}-c" for i in range(6))
+    assert all(len(threads) == 1 for threads in calls)
+    assert len(set().union(*calls)) == len(calls)
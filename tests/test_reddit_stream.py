@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+from src.ai_meme_stock_predictor.data_sources import reddit_stream
+from src.ai_meme_stock_predictor.data_sources.mention_index import MentionIndex
+from src.ai_meme_stock_predictor.data_sources.reddit_stream import (
+    PostWindow, RedditStreamIngestor, extract_tickers,
+)
+
+NOW = 1_700_000_000.0
+
+
+def _post(i, created, title="$gme and AMC"):
+    return {"id": f"p{i}", "title": title, "selftext": "", "created_utc": created}
+
+
+def test_extract_tickers_skips_jargon():
+    assert extract_tickers("YOLO into $gme, AMC to the moon, DD inside") == {"GME", "AMC"}
+
+
+def test_window_serves_newest_first_and_evicts():
+    window = PostWindow(window_seconds=3600, max_posts=3, index=MentionIndex(3600, 7 * 24 * 3600))
+    for i in range(4):
+        window.add(_post(i, NOW - 100 + i), {"GME"} if i % 2 else {"GME", "AMC"}, now=NOW)
+
+    assert [p["id"] for p in window.mentions("gme", limit=2, now=NOW)] == ["p3", "p2"]
+    assert [p["id"] for p in window.mentions("AMC", now=NOW)] == ["p2"]  # p0 evicted by size
+    assert window.mentions("GME", now=NOW + 7200) == []
+    assert len(window) == 0
+
+
+class _FakeStream:
+    def __init__(self, submissions):
+        self._submissions = submissions
+
+    def submissions(self, pause_after=None):
+        yield from self._submissions
+        # Then idle like a quiet subreddit: pause markers with a real gap, not a busy spin
+        while True:
+            time.sleep(0.01)
+            yield None
+
+
+def test_ingestor_backfills_then_marks_ready():
+    now = time.time()
+    submissions = [SimpleNamespace(id=f"s{i}", title=f"${t} calls", selftext="", score=1, num_comments=0,
+                                   created_utc=now, url="") for i, t in enumerate(["GME", "AMC", "GME"])]
+    client = SimpleNamespace(subreddit=lambda name: SimpleNamespace(stream=_FakeStream(submissions)))
+    ingestor = RedditStreamIngestor(client, ["wallstreetbets", "stocks"], window=PostWindow(3600, 100, MentionIndex(3600, 3600)))
+    ingestor.start()
+    try:
+        assert ingestor.ready.wait(2)
+        assert [p["id"] for p in ingestor.window.mentions("GME")] == ["s2", "s0"]
+        assert ingestor.ingested == 3
+    finally:
+        ingestor.stop()
+
+
+def test_window_only_replaces_search_once_it_covers_the_window(monkeypatch):
+    now = time.time()
+    ingestor = RedditStreamIngestor(None, ["wallstreetbets"], window=PostWindow(3600, 100, MentionIndex(3600, 3600)))
+    ingestor.window.add(_post(1, now), {"GME"})
+    ingestor.ready.set()
+    ingestor.started_at = now - 60
+    monkeypatch.setattr(reddit_stream, "_ingestor", ingestor)
+
+    # Just restarted: the window only holds the backfill, so search is still needed
+    assert reddit_stream.stream_mentions("GME", 10) is None
+    ingestor.started_at = now - 3600
+    assert [p["id"] for p in reddit_stream.stream_mentions("GME", 10)] == ["p1"]
+    assert reddit_stream.stream_mentions("TSLA", 10) is None
+
+
+def test_mention_index_buckets_counts_and_retention():
+    index = MentionIndex(bucket_seconds=3600, retention_seconds=3 * 3600)
+    base = 1_700_002_800.0 + 3599  # last second of an hour bucket
+    for i, age_h in enumerate([0.1, 0.5, 1.5, 2.5, 2.6]):
+        index.add(f"p{i}", {"amc"} if i != 2 else {"AMC", "GME"}, base - age_h * 3600, now=base)
+
+    assert index.bucket_counts("AMC", 3, now=base) == [2, 1, 2]
+    assert index.count("AMC", 3600, now=base) == 2
+    assert index.posts("amc", 2 * 3600, now=base) == ["p0", "p1", "p2"]
+    assert index.posts("amc", 10 * 3600, limit=1, now=base) == ["p0"]
+    assert index.trending(3 * 3600, now=base) == [("AMC", 5), ("GME", 1)]
+
+    later = base + 2 * 3600
+    index.add("p9", {"AMC"}, later, now=later)
+    assert index.bucket_counts("AMC", 5, now=later) == [0, 0, 2, 0, 1]  # two oldest buckets expired
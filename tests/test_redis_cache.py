@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import pytest
+from src.ai_meme_stock_predictor.utils import redis_cache
+from src.ai_meme_stock_predictor.utils.cache import FRESH, SourceCache
+from src.ai_meme_stock_predictor.utils.redis_cache import RedisCacheBackend, decode, encode
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_encode_roundtrip_compresses_large_payloads():
+    small = {"price": 1.5, "symbol": "GME"}
+    large = [{"id": str(i), "title": "diamond hands " * 10} for i in range(50)]
+    assert decode(encode(small)) == small
+    blob = encode(large)
+    assert decode(blob) == large
+    assert blob[1:2] != b"-"
+    assert len(blob) < len(repr(large))
+
+
+def test_workers_share_one_warm_cache():
+    server = fakeredis.FakeServer()
+    worker_a = SourceCache("quote", ttl=60, stale_ttl=60, backend=RedisCacheBackend(fakeredis.FakeRedis(server=server)))
+    worker_b = SourceCache("quote", ttl=60, stale_ttl=60, backend=RedisCacheBackend(fakeredis.FakeRedis(server=server)))
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"price": 20.0}
+
+    assert worker_a.get_or_fetch("GME", fetch) == {"price": 20.0}
+    assert worker_b.get_or_fetch("GME", fetch) == {"price": 20.0}
+    assert len(calls) == 1
+    assert worker_b.lookup("GME")[1] == FRESH
+
+
+def test_key_version_isolates_old_entries():
+    client = fakeredis.FakeRedis()
+    RedisCacheBackend(client, prefix="t", version=1).set("quote", ("GME", 30), [1], ttl=60, stale_ttl=0)
+    assert RedisCacheBackend(client, prefix="t", version=1).get("quote", ("GME", 30))[0] == [1]
+    assert RedisCacheBackend(client, prefix="t", version=2).get("quote", ("GME", 30)) is None
+    assert redis_cache.CACHE_KEY_VERSION >= 1
+
+
+class _DownRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+    set = get
+
+
+def test_backend_backs_off_after_failure_and_recovers(monkeypatch):
+    client = _DownRedis()
+    backend = RedisCacheBackend(client, prefix="t")
+    assert backend.get("quote", "GME") is None
+    backend.set("quote", "GME", [1], ttl=60, stale_ttl=0)
+    assert backend.get("quote", "GME") is None
+    assert client.calls == 1
+    assert not backend.available()
+
+    monkeypatch.setattr(redis_cache.time, "monotonic", lambda: float("inf"))
+    backend._client = fakeredis.FakeRedis()
+    backend.set("quote", "GME", [1], ttl=60, stale_ttl=0)
+    assert backend.get("quote", "GME")[0] == [1]
+    assert backend._backoff == 0
+
+
+def test_async_cache_reads_and_writes_redis_off_the_loop():
+    server = fakeredis.FakeServer()
+    cache = SourceCache("quote", ttl=60, stale_ttl=60, backend=RedisCacheBackend(fakeredis.FakeRedis(server=server)))
+    loop_thread = threading.get_ident()
+    threads = []
+    backend = cache.backend
+    original_get, original_set = backend.get, backend.set
+    backend.get = lambda *a: threads.append(threading.get_ident()) or original_get(*a)
+    backend.set = lambda *a: threads.append(threading.get_ident()) or original_set(*a)
+
+    async def fetch():
+        return {"price": 20.0}
+
+    assert asyncio.run(cache.aget_or_fetch("GME", fetch)) == {"price": 20.0}
+    assert len(threads) == 2 and loop_thread not in threads
+    other = SourceCache("quote", ttl=60, stale_ttl=60, backend=RedisCacheBackend(fakeredis.FakeRedis(server=server)))
+    assert asyncio.run(other.alookup("GME")) == ({"price": 20.0}, FRESH)
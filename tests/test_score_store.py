@@ -0,0 +1,33 @@
+from src.ai_meme_stock_predictor.analysis import features, score_store
+from src.ai_meme_stock_predictor.analysis.score_store import ScoreStore
+from src.ai_meme_stock_predictor.utils.config import settings
+
+
+def test_store_roundtrip_requires_matching_hash_and_version(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.sqlite3"))
+    store.put_many("v1", [("reddit", "a", "h1", 0.5, 0.1), ("twitter", "a", "h2", -0.2, 0.0)])
+
+    assert store.get_many("v1", [("reddit", "a", "h1"), ("twitter", "a", "h2")]) == {
+        ("reddit", "a"): (0.5, 0.1), ("twitter", "a"): (-0.2, 0.0)}
+    assert store.get_many("v1", [("reddit", "a", "edited")]) == {}
+    assert store.get_many("v2", [("reddit", "a", "h1")]) == {}
+    store.close()
+
+
+def test_scores_survive_restart_and_only_misses_are_scored(tmp_path, monkeypatch):
+    path = str(tmp_path / "scores.sqlite3")
+    monkeypatch.setattr(settings, "score_store_path", path)
+    scored = []
+    original = features.score_texts
+    monkeypatch.setattr(features, "score_texts", lambda texts: scored.append(list(texts)) or original(texts))
+    posts = [{"id": "p1", "title": "GME to the moon", "selftext": ""},
+             {"id": "p2", "title": "bagholding again", "selftext": ""}]
+    tweets = [{"id": "t1", "text": "great earnings"}, {"text": "no id, always rescored"}]
+
+    first = features.score_keyed(features.keyed_texts(posts, tweets))
+    monkeypatch.setattr(score_store, "_store", None)  # simulate a restart
+    second = features.score_keyed(features.keyed_texts(posts + [{"id": "p3", "title": "new", "selftext": ""}], tweets))
+
+    assert scored[1] == ["new ", "no id, always rescored"]
+    assert second[0][:2] == first[0][:2]
+    assert second[0][3] == first[0][2]
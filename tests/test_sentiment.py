@@ -1,6 +1,87 @@
+from src.ai_meme_stock_predictor.analysis import sentiment
+from src.ai_meme_stock_predictor.utils.config import settings
 from src.ai_meme_stock_predictor.analysis.sentiment import vader_compound
 
 
 def test_vader_compound_range():
     score = vader_compound("This is great and awesome!")
     assert -1.0 <= score <= 1.0
+
+
+def test_vader_batch_dedupes_and_memoizes(monkeypatch):
+    calls = []
+    original = sentiment.vader_compound
+    monkeypatch.setattr(sentiment, "vader_compound", lambda t: calls.append(t) or original(t))
+    texts = ["GME squeeze is glorious", "paper hands are sad", "GME squeeze is glorious"]
+
+    first = sentiment.vader_batch(texts)
+    assert first[0] == first[2]
+    assert first == [original(t) for t in texts]
+    assert len(calls) == 2
+
+    sentiment.vader_batch(texts + ["new tweet, who dis"])
+    assert len(calls) == 3
+
+
+def test_vader_batch_process_pool_matches_inline(monkeypatch):
+    monkeypatch.setattr(settings, "sentiment_process_threshold", 2)
+    monkeypatch.setattr(settings, "sentiment_processes", 2)
+    texts = [f"stonks go up {i} times, amazing!" for i in range(6)]
+    assert sentiment.vader_batch(texts) == [vader_compound(t) for t in texts]
+
+
+class _WordTokenizer:
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": text.split()}
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+
+class _FakeFinbert:
+    tokenizer = _WordTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=None, max_length=None):
+        self.calls.append({"texts": list(texts), "batch_size": batch_size, "max_length": max_length})
+        return [[{"label": "Positive", "score": 1.0 if "moon" in t else 0.0},
+                 {"label": "Negative", "score": 1.0 if "crash" in t else 0.0}] for t in texts]
+
+
+def test_finbert_scores_buckets_chunks_and_restores_order(monkeypatch):
+    fake = _FakeFinbert()
+    monkeypatch.setattr(sentiment, "_finbert", fake)
+    monkeypatch.setattr(settings, "finbert_batch_size", 8)
+    monkeypatch.setattr(settings, "finbert_max_length", 6)
+    texts = ["crash", "moon", "moon moon moon moon crash crash crash crash"]
+
+    scores = sentiment.finbert_scores(texts)
+
+    assert scores == [-1.0, 1.0, 0.0]
+    call = fake.calls[0]
+    assert call["batch_size"] == 8 and call["max_length"] == 6
+    assert [len(t) for t in call["texts"]] == sorted(len(t) for t in call["texts"])
+    assert len(call["texts"]) == 4
+
+
+def test_concurrent_callers_share_one_process_pool(monkeypatch):
+    import threading
+    import time
+    created = []
+
+    def slow_pool(**kwargs):
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(sentiment, "_process_pool", None)
+    monkeypatch.setattr(sentiment, "ProcessPoolExecutor", slow_pool)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(sentiment._get_process_pool())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1 and all(p is created[0] for p in pools)
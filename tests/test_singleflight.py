@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+from src.ai_meme_stock_predictor.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def analyse():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"ticker": "GME"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("GME", analyse))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"ticker": "GME"}] * 10
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    def boom():
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("AMC", boom)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["upstream down"] * 5
+
+
+def test_async_callers_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def analyse():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def go():
+        return await asyncio.gather(*(flight.do("TSLA", analyse) for _ in range(20)))
+
+    assert asyncio.run(go()) == [42] * 20
+    assert len(calls) == 1
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from src.ai_meme_stock_predictor.data_sources import ticker_universe
+from src.ai_meme_stock_predictor.data_sources.market_data import _parse_quote
+from src.ai_meme_stock_predictor.data_sources.ticker_universe import (
+    TickerUniverse, parse_ticker, read_symbol_file, set_universe,
+)
+
+LISTING = """Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+TSLA|Tesla, Inc. - Common Stock|Q|N|N|100|N|N
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+APLE|Apple Hospitality REIT, Inc. Common Shares|Q|N|N|100|N|N
+GME|GameStop Corporation Common Stock|Q|N|N|100|N|N
+WHAT|Whatever Holdings|Q|N|N|100|N|N
+PSMT|PriceSmart, Inc. - Common Stock|Q|N|N|100|N|N
+MOMO|Hello Group Inc. - American Depositary Shares|Q|N|N|100|N|N
+NWS|News Corporation - Class B Common Stock|Q|N|N|100|N|N
+File Creation Time: 0101202500:00|||||||
+"""
+
+
+@pytest.fixture
+def universe(tmp_path):
+    path = tmp_path / "nasdaqlisted.txt"
+    path.write_text(LISTING)
+    symbols = read_symbol_file(str(path))
+    set_universe(names=symbols)
+    yield ticker_universe.get_universe()
+    set_universe()
+
+
+def test_read_nasdaq_listing(tmp_path):
+    path = tmp_path / "nasdaqlisted.txt"
+    path.write_text(LISTING)
+    symbols = read_symbol_file(str(path))
+    assert set(symbols) == {"TSLA", "AAPL", "APLE", "GME", "WHAT", "PSMT", "MOMO", "NWS"}
+
+
+def test_parse_prefers_real_symbols_over_filler_words(universe):
+    assert parse_ticker("what do you think of GME") == "GME"
+    assert parse_ticker("what do you think of gme") == "GME"
+    assert parse_ticker("tesla memes?") == "TSLA"
+    assert parse_ticker("how's appl... I mean apple doing") == "AAPL"
+    assert parse_ticker("$aple please") == "APLE"
+    assert parse_ticker("hello there") is None
+
+
+def test_company_names_do_not_shadow_lowercase_symbols(universe):
+    assert parse_ticker("price of gme") == "GME"
+    assert parse_ticker("hello, gme memes?") == "GME"
+    assert parse_ticker("any news on gme?") == "GME"
+    assert parse_ticker("gamestop squeeze") == "GME"
+    # A name match must cover whole words of the company name
+    assert universe.by_name("price") is None
+    assert universe.by_name("pricesmart") == "PSMT"
+
+
+def test_parse_memo_forgets_lapsed_negative_entries(universe, monkeypatch):
+    monkeypatch.setattr(ticker_universe.get_settings(), "ticker_negative_ttl", 0.05)
+    set_universe(names={"GME": "GameStop Corp"})
+    ticker_universe.mark_unknown("GME")
+    assert parse_ticker("GME memes?") is None
+    time.sleep(0.1)
+    assert parse_ticker("GME memes?") == "GME"
+
+
+def test_negative_cache_from_market_api(universe):
+    assert parse_ticker("GME memes?") == "GME"
+    _parse_quote({"Global Quote": {}}, "GME")
+    assert parse_ticker("GME memes?") is None
+    # Throttled responses are not evidence the symbol is missing
+    _parse_quote({"Note": "API call frequency"}, "TSLA")
+    assert parse_ticker("TSLA memes?") == "TSLA"
+
+
+def test_without_symbol_file_falls_back_to_word_heuristic():
+    u = TickerUniverse({})
+    assert u.parse("what do you think of gme") == "GME"
+    assert u.parse("tesla memes?") == "TESLA"
+
+
+def test_listing_skips_test_issues_and_missing_file_is_reported(monkeypatch, tmp_path, caplog):
+    other = ("ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+             "GME|GameStop Corporation Common Stock|N|GME|N|100|N|GME\n"
+             "ZXZZT|NYSE Test Issue|N|ZXZZT|N|100|Y|ZXZZT\n")
+    assert ticker_universe.parse_symbol_table(other.splitlines()) == {"GME": "GameStop Corporation Common Stock"}
+
+    monkeypatch.setattr(ticker_universe, "_universe", None)
+    monkeypatch.setattr(ticker_universe.get_settings(), "ticker_universe_path", str(tmp_path / "missing.txt"))
+    with caplog.at_level("WARNING"):
+        assert len(ticker_universe.get_universe()) == 0
+    assert "fetch_symbols.py" in caplog.text
@@ -0,0 +1,123 @@
+import time
+from types import SimpleNamespace
+
+from src.ai_meme_stock_predictor.data_sources import twitter_source
+from src.ai_meme_stock_predictor.data_sources.twitter_source import (
+    RateLimitTracker, TweetTimeline, TwitterSource,
+)
+
+
+def _tweet(i):
+    return {"id": str(i), "text": f"$GME tweet {i}", "created_at": "2024-01-01T00:00:00Z"}
+
+
+class _FakeSession:
+    def __init__(self, pages, remaining=100):
+        self.pages = list(pages)
+        self.remaining = remaining
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append(dict(params))
+        page = self.pages.pop(0)
+        status, (data, meta) = (page, ([], {})) if isinstance(page, int) else (200, page)
+        self.remaining -= 1
+        return SimpleNamespace(
+            status_code=status, text="", json=lambda: {"data": data, "meta": meta},
+            headers={"x-rate-limit-remaining": str(self.remaining),
+                     "x-rate-limit-reset": str(int(time.time()) + 900)},
+        )
+
+
+def _source(monkeypatch, session):
+    monkeypatch.setattr(twitter_source, "get_session", lambda: session)
+    monkeypatch.setattr(twitter_source, "_rate_limits", RateLimitTracker(reserve=1))
+    monkeypatch.setattr(twitter_source, "_timeline", TweetTimeline(200, 16))
+    monkeypatch.setattr(twitter_source.settings, "twitter_bearer_token", "token")
+    return TwitterSource()
+
+
+def test_search_follows_next_token_then_resumes_from_since_id(monkeypatch):
+    session = _FakeSession([
+        ([_tweet(30), _tweet(29)], {"newest_id": "30", "next_token": "t1"}),
+        ([_tweet(28)], {}),
+        ([_tweet(31)], {"newest_id": "31"}),
+    ])
+    source = _source(monkeypatch, session)
+
+    assert [t["id"] for t in source._search("GME", 5)] == ["30", "29", "28"]
+    assert session.calls[1]["next_token"] == "t1"
+    assert "since_id" not in session.calls[0]
+
+    assert [t["id"] for t in source._search("GME", 5)] == ["31", "30", "29", "28"]
+    assert session.calls[2]["since_id"] == "30"
+
+
+def test_search_serves_known_tweets_when_rate_window_is_spent(monkeypatch):
+    session = _FakeSession([([_tweet(1)], {"newest_id": "1"})], remaining=2)
+    source = _source(monkeypatch, session)
+
+    assert [t["id"] for t in source._search("GME", 5)] == ["1"]
+    # One request left is the reserve and the window resets in 15 minutes
+    assert [t["id"] for t in source._search("GME", 5)] == ["1"]
+    assert len(session.calls) == 1
+
+
+def test_tracker_treats_429_as_exhausted():
+    tracker = RateLimitTracker(reserve=0)
+    tracker.update("search", 429, {"x-rate-limit-reset": str(time.time() + 2)})
+    assert 0 < tracker.pause_for("search", max_pause=5) <= 2
+    assert tracker.pause_for("search", max_pause=1) is None
+
+
+def test_search_cut_short_resumes_instead_of_skipping_the_gap(monkeypatch):
+    session = _FakeSession([
+        ([_tweet(30), _tweet(29)], {"newest_id": "30", "next_token": "t1"}),
+        ([_tweet(28)], {}),
+        ([_tweet(31)], {"newest_id": "31"}),
+    ])
+    source = _source(monkeypatch, session)
+    monkeypatch.setattr(twitter_source.settings, "twitter_max_pages", 1)
+
+    assert [t["id"] for t in source._search("GME", 5)] == ["30", "29"]
+    assert [t["id"] for t in source._search("GME", 5)] == ["30", "29", "28"]
+    assert session.calls[1]["next_token"] == "t1" and "since_id" not in session.calls[1]
+    # Only now is everything up to 30 known
+    source._search("GME", 5)
+    assert session.calls[2]["since_id"] == "30"
+
+
+def test_timeline_drops_tweets_older_than_the_feature_window():
+    timeline = TweetTimeline(200, 4, max_age=3600)
+    now = 1_704_067_200.0  # 2024-01-01T00:00:00Z
+    old = {"id": "1", "text": "old", "created_at": "2023-12-31T20:00:00Z"}
+    new = {"id": "2", "text": "new", "created_at": "2023-12-31T23:30:00Z"}
+    assert [t["id"] for t in timeline.merge("GME", [new, old], "2", now=now)] == ["2"]
+    assert timeline.tweets("GME", now=now + 3600) == []
+
+
+def test_rejected_watermark_is_dropped_for_a_fresh_search(monkeypatch):
+    session = _FakeSession([
+        ([_tweet(30)], {"newest_id": "30"}),
+        400,
+        ([_tweet(41), _tweet(40)], {"newest_id": "41"}),
+        ([_tweet(42)], {"newest_id": "42"}),
+    ])
+    source = _source(monkeypatch, session)
+
+    source._search("GME", 5)
+    assert [t["id"] for t in source._search("GME", 5)] == ["41", "40", "30"]
+    assert session.calls[1]["since_id"] == "30"
+    assert "since_id" not in session.calls[2]
+    source._search("GME", 5)
+    assert session.calls[3]["since_id"] == "41"
+
+
+def test_watermark_older_than_the_search_window_is_not_sent(monkeypatch):
+    session = _FakeSession([([_tweet(1)], {"newest_id": "1"})])
+    source = _source(monkeypatch, session)
+    eight_days_ago_ms = int((time.time() - 8 * 24 * 3600) * 1000) - twitter_source._SNOWFLAKE_EPOCH_MS
+    twitter_source._timeline.merge("GME", [], str(eight_days_ago_ms << 22))
+
+    source._search("GME", 5)
+    assert "since_id" not in session.calls[0]
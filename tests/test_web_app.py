@@ -0,0 +1,110 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+from src.ai_meme_stock_predictor.web import app as web_app
+from src.ai_meme_stock_predictor.web.limits import ConcurrencyLimiter, PerKeyLimiter, QueueFull
+
+
+def test_query_uses_async_pipeline_and_reports_metrics(monkeypatch):
+    async def fake_ahandle_query(conversation_id, text):
+        await asyncio.sleep(0)
+        return {"response": f"{conversation_id}:{text}"}
+
+    monkeypatch.setattr(web_app.agent, "ahandle_query", fake_ahandle_query)
+    client = TestClient(web_app.app)
+
+    r = client.post("/query", json={"conversation_id": "c1", "text": "GME memes?"})
+    assert r.status_code == 200
+    assert r.json() == {"response": "c1:GME memes?"}
+
+    metrics = client.get("/metrics").json()["query"]
+    assert metrics["completed"] >= 1
+    assert metrics["in_flight"] == 0
+    assert metrics["queue_depth"] == 0
+
+
+def test_limiter_caps_concurrency_and_sheds_excess_queue():
+    limiter = ConcurrencyLimiter(max_concurrency=2, max_queue=1)
+    peak = 0
+    outcomes = []
+
+    async def job():
+        nonlocal peak
+        try:
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.05)
+            outcomes.append("ok")
+        except QueueFull:
+            outcomes.append("rejected")
+
+    async def go():
+        await asyncio.gather(*(job() for _ in range(5)))
+
+    asyncio.run(go())
+    assert peak == 2
+    assert outcomes.count("ok") == 3
+    assert outcomes.count("rejected") == 2
+    assert limiter.snapshot()["rejected"] == 2
+
+
+def test_per_user_limiter_isolates_users():
+    limiter = PerKeyLimiter(limit=2)
+    assert limiter.try_acquire(1) and limiter.try_acquire(1)
+    assert not limiter.try_acquire(1)
+    assert limiter.try_acquire(2)
+    limiter.release(1)
+    assert limiter.try_acquire(1)
+
+
+def test_batch_endpoint_streams_ndjson(monkeypatch):
+    def fake_run_many(tickers):
+        for t in dict.fromkeys(x.upper() for x in tickers):
+            yield {"ticker": t}
+
+    monkeypatch.setattr(web_app.agent.workflow, "run_many", fake_run_many)
+    client = TestClient(web_app.app)
+    r = client.post("/query/batch", json={"tickers": ["gme", "amc", "GME"]})
+    assert r.status_code == 200
+    assert [json.loads(line)["ticker"] for line in r.text.splitlines()] == ["GME", "AMC"]
+
+
+def test_batch_endpoint_is_admitted_through_query_limiter(monkeypatch):
+    monkeypatch.setattr(web_app.agent.workflow, "run_many", lambda tickers: iter([{"ticker": "GME"}]))
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+    limiter.in_flight = limiter.waiting = 1
+    monkeypatch.setattr(web_app, "query_limiter", limiter)
+    client = TestClient(web_app.app)
+
+    assert client.post("/query/batch", json={"tickers": ["gme"]}).status_code == 503
+
+    monkeypatch.setattr(web_app, "query_limiter", ConcurrencyLimiter(max_concurrency=1))
+    r = client.post("/query/batch", json={"tickers": ["gme"]})
+    assert r.status_code == 200
+    assert web_app.query_limiter.snapshot()["completed"] == 1
+    assert web_app.query_limiter.in_flight == 0
+
+
+def test_batch_slot_is_released_when_the_client_is_gone_before_streaming(monkeypatch):
+    monkeypatch.setattr(web_app.agent.workflow, "run_many", lambda tickers: iter([{"ticker": "GME"}]))
+    limiter = ConcurrencyLimiter(max_concurrency=1)
+    monkeypatch.setattr(web_app, "query_limiter", limiter)
+
+    async def send(message):
+        raise OSError("client disconnected")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def go():
+        response = await web_app.query_batch(web_app.BatchQuery(tickers=["gme"]))
+        assert limiter.in_flight == 1
+        # Newer Starlette re-raises the failed send as ClientDisconnect
+        with pytest.raises((OSError, ClientDisconnect)):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+
+    asyncio.run(go())
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()["failed"] == 1
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from src.ai_meme_stock_predictor.agent import workflow as workflow_module
+from src.ai_meme_stock_predictor.agent.workflow import MemeStockWorkflow, AsyncMemeStockWorkflow
+from src.ai_meme_stock_predictor.data_sources.price_store import rows_to_bars
+from src.ai_meme_stock_predictor.utils.config import settings
+
+
+class _SlowSource:
+    def __init__(self, delay, value):
+        self.delay = delay
+        self.value = value
+
+    def fetch_mentions(self, ticker, limit=10):
+        time.sleep(self.delay)
+        return self.value
+
+
+class _Market:
+    def quote(self, symbol):
+        time.sleep(0.2)
+        return {"price": 10.0, "volume": 100}
+
+    def bars(self, symbol, days=30):
+        time.sleep(0.2)
+        return rows_to_bars([{"date": "2024-01-02", "open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0,
+                              "volume": 100}])
+
+
+def test_run_fans_out_and_respects_deadlines(monkeypatch):
+    monkeypatch.setattr(settings, "twitter_timeout", 0.3)
+    monkeypatch.setattr(settings, "workflow_result_ttl", 0)
+    wf = MemeStockWorkflow()
+    wf.reddit = _SlowSource(0.2, [{"id": "a", "title": "GME to the moon", "selftext": ""}])
+    wf.twitter = _SlowSource(1.0, [{"text": "never arrives"}])
+    wf.market = _Market()
+
+    started = time.monotonic()
+    result = wf.run("gme")
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.8
+    assert result['ticker'] == 'GME'
+    assert result['features']['price'] == 10.0
+    assert result['features']['meme_intensity'] > 0
+    assert result['history'] == [{"date": "2024-01-02", "open": 10.0, "high": 10.0, "low": 10.0,
+                                  "close": 10.0, "volume": 100}]
+
+
+class _AsyncSource:
+    def __init__(self, delay, value):
+        self.delay = delay
+        self.value = value
+
+    async def fetch_mentions(self, ticker, limit=10):
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+class _AsyncMarket:
+    async def quote(self, symbol):
+        return {"price": 5.0, "volume": 10}
+
+    async def bars(self, symbol, days=30):
+        await asyncio.sleep(1.0)
+        return rows_to_bars([{"date": "2024-01-02", "open": 5.0, "high": 5.0, "low": 5.0, "close": 5.0,
+                              "volume": 10}])
+
+
+def test_async_run_gathers_sources(monkeypatch):
+    monkeypatch.setattr(settings, "history_timeout", 0.2)
+    monkeypatch.setattr(settings, "workflow_result_ttl", 0)
+    wf = AsyncMemeStockWorkflow()
+    wf.reddit = _AsyncSource(0.05, [{"id": "b", "title": "AMC apes", "selftext": ""}])
+    wf.twitter = _AsyncSource(0.05, [{"text": "AMC YOLO"}])
+    wf.market = _AsyncMarket()
+
+    result = asyncio.run(wf.run("amc"))
+
+    assert result['ticker'] == 'AMC'
+    assert result['features']['price'] == 5.0
+    assert result['history'] == []
+
+
+def test_run_many_dedupes_and_scores_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "workflow_result_ttl", 0)
+    wf = MemeStockWorkflow()
+    wf.reddit = _SlowSource(0.05, [{"id": "c", "title": "tendies incoming", "selftext": ""}])
+    wf.twitter = _SlowSource(0.05, [{"text": "great news"}])
+    wf.market = _Market()
+    batches = []
+    original = workflow_module.score_keyed
+    monkeypatch.setattr(workflow_module, "score_keyed", lambda items: batches.append(len(items)) or original(items))
+
+    results = list(wf.run_many(["gme", "GME", "amc", " tsla "], max_in_flight=3))
+
+    assert sorted(r['ticker'] for r in results) == ["AMC", "GME", "TSLA"]
+    assert sum(batches) == 6
+    assert len(batches) <= 3
+    assert all(r['features']['social_sentiment'] != 0 for r in results)
+
+
+class _DownMarket:
+    def quote(self, symbol):
+        raise ConnectionError("market down")
+
+    def bars(self, symbol, days=30):
+        raise ConnectionError("market down")
+
+
+def test_results_from_failed_sources_are_not_memoised(monkeypatch):
+    monkeypatch.setattr(settings, "workflow_result_ttl", 60)
+    workflow_module._result_cache().clear()
+    wf = MemeStockWorkflow()
+    wf.reddit = _SlowSource(0, [])
+    wf.twitter = _SlowSource(0, [])
+    wf.market = _DownMarket()
+
+    assert wf.run("dead")['ticker'] == 'DEAD'
+    assert list(wf.run_many(["dead"]))[0]['ticker'] == 'DEAD'
+    assert workflow_module._result_cache().peek("DEAD") is None
+
+    wf.market = _Market()
+    wf.run("dead")
+    assert workflow_module._result_cache().peek("DEAD")['features']['price'] == 10.0
+
+
+def test_batches_share_the_process_wide_pools(monkeypatch):
+    monkeypatch.setattr(settings, "workflow_result_ttl", 0)
+    wf = MemeStockWorkflow()
+    wf.reddit = _SlowSource(0, [{"id": "d", "title": "to the moon", "selftext": ""}])
+    wf.twitter = _SlowSource(0, [])
+    wf.market = _Market()
+
+    list(wf.run_many(["gme"]))
+    pools = workflow_module._get_batch_pools()
+    list(wf.run_many(["amc", "bb"], max_in_flight=100))
+    assert workflow_module._get_batch_pools() is pools
+    assert pools[0]._max_workers == settings.batch_max_in_flight